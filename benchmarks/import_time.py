@@ -0,0 +1,60 @@
+"""
+Startup time of the matcher
+
+Measures the time to import the matcher in a fresh interpreter
+(best of the runs, the interpreter startup itself subtracted)
+and prints the results as JSON.
+
+Usage:
+    python benchmarks/import_time.py [--runs 5] [--max-seconds 0.5]
+
+Exits with 1 if --max-seconds is given and exceeded.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+STATEMENTS = {
+    "baseline": "pass",
+    "numpy": "import numpy",
+    "matcher": "from ecosys.trading_platform.matcher.stockmarket import StockMatcher",
+    "exchange": "from ecosys.trading_platform import Exchange",
+}
+
+
+def startup_time(statement, runs):
+    "Best wall time of running the statement in a fresh interpreter"
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], env=env, check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None, help="limit of the matcher import")
+    args = parser.parse_args(argv)
+
+    times = {name: startup_time(statement, args.runs) for name, statement in STATEMENTS.items()}
+    results = {name: seconds - times["baseline"] for name, seconds in times.items() if name != "baseline"}
+    print(json.dumps({"benchmark": "import_time", "runs": args.runs, "seconds": results}, indent=2))
+
+    if args.max_seconds is not None and results["matcher"] > args.max_seconds:
+        print(f"Matcher import took {results['matcher']:.3f} s (limit {args.max_seconds} s)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
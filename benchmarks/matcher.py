@@ -0,0 +1,240 @@
+"""
+Benchmarks of the matcher hot paths
+
+Runs each case on seeded synthetic order flows (see
+ecosys/tools/generate/orderflow.py) and prints the results as JSON.
+A case is timed repeat times on fresh matchers (the setup is not
+timed) and the best and the median times are reported.
+
+Usage:
+    python benchmarks/matcher.py [--quick] [--output results.json]
+    python benchmarks/matcher.py --compare baseline.json [--tolerance 0.25]
+
+With --compare the exit code is 1 if a case is slower than
+the same case in the baseline by more than the tolerance.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+from ecosys.tools.generate.orderflow import random_orders, ladder, crossed_book, stop_cascade
+
+SIZES = {
+    "place": [1000, 10000],
+    "place_bulk": [10000, 100000],
+    "clear_crossed": [100, 1000, 10000],
+    "sweep": [100, 1000, 10000],
+    "stop_cascade": [100, 1000],
+    "frames": [1000, 10000],
+    "memory": [10000, 100000],
+}
+QUICK_SIZES = {name: sizes[:1] for name, sizes in SIZES.items()}
+BACKENDS = ["array", "ladder"]
+
+
+def measure(setup, run, repeat):
+    "Best and median seconds of run(setup()) over the repeats"
+    times = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+    return min(times), float(np.median(times))
+
+
+def placed(backend, flow):
+    market = StockMatcher(backend=backend)
+    market.place_orders(flow)
+    return market
+
+
+def bench_place(backend, n, repeat):
+    "Orders placed one by one"
+    flow = random_orders(n, seed=0, market_share=0)
+    orders = list(zip(flow["side"].tolist(), flow["party"].tolist(), flow["price"].tolist(), flow["quantity"].tolist()))
+    def run(market):
+        for side, party, price, quantity in orders:
+            place = market.place_bid if side == "bid" else market.place_ask
+            place(price=price, quantity=quantity, party=party)
+    return measure(lambda: StockMatcher(backend=backend), run, repeat), n
+
+
+def bench_place_bulk(backend, n, repeat):
+    "Orders placed with one place_orders"
+    flow = random_orders(n, seed=0, stop_share=0.1)
+    return measure(lambda: StockMatcher(backend=backend), lambda market: market.place_orders(flow), repeat), n
+
+
+def bench_clear_crossed(backend, depth, repeat):
+    "Clearing of a book crossed through depth levels (10 orders per level)"
+    flow = crossed_book(depth, orders_per_level=10, seed=0)
+    return measure(lambda: placed(backend, flow), lambda market: market.clear(), repeat), len(flow["side"])
+
+
+def bench_sweep(backend, depth, repeat):
+    "A market order sweeping through depth levels of asks"
+    flow = ladder("ask", depth, seed=0)
+    quantity = int(flow["quantity"].sum())
+    def setup():
+        market = placed(backend, flow)
+        market.place_bid(order_type="market", quantity=quantity, party="Sweeper")
+        return market
+    return measure(setup, lambda market: market.clear(), repeat), depth
+
+
+def bench_stop_cascade(backend, n, repeat):
+    "Clearing that triggers n stop orders one after another"
+    flow = stop_cascade(n)
+    return measure(lambda: placed(backend, flow), lambda market: market.clear(), repeat), n
+
+
+def bench_frames(backend, n, repeat):
+    "to_frame and historical of a market with about n trades"
+    flow = random_orders(2 * n, seed=0)
+    def setup():
+        market = placed(backend, flow)
+        market.clear()
+        return market
+    def run(market):
+        market.to_frame()
+        market.historical
+    return measure(setup, run, repeat), n
+
+
+def bench_memory(backend, n, repeat):
+    "Peak memory of placing n resting orders (bytes)"
+    flow = ladder("bid", n // 10, orders_per_level=10, seed=0)
+    tracemalloc.start()
+    market = placed(backend, flow)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del market
+    return (peak, peak), len(flow["side"])
+
+
+CASES = {
+    "place": bench_place,
+    "place_bulk": bench_place_bulk,
+    "clear_crossed": bench_clear_crossed,
+    "sweep": bench_sweep,
+    "stop_cascade": bench_stop_cascade,
+    "frames": bench_frames,
+    "memory": bench_memory,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(cases=None, sizes=SIZES, backends=BACKENDS, repeat=5):
+    """Run the benchmarks
+
+    Keyword Arguments:
+        cases {List[str]} -- names of the cases (default: {None}, all)
+        sizes {dict} -- sizes to run by case (default: {SIZES})
+        backends {List[str]} -- book backends (default: {BACKENDS})
+        repeat {int} -- times each case is run (default: {5})
+
+    Returns:
+        dict -- results (machine-readable, see --output)
+    """
+    results = []
+    for name in cases or CASES:
+        for backend in backends:
+            for size in sizes[name]:
+                (best, median), n_items = CASES[name](backend, size, repeat)
+                result = {"case": name, "backend": backend, "size": size}
+                if name == "memory":
+                    result.update(peak_bytes=best, bytes_per_order=best / n_items)
+                else:
+                    result.update(best=best, median=median, per_second=n_items / best if best else None)
+                results.append(result)
+    return {
+        "benchmark": "matcher",
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Cases slower (or using more memory) than in the baseline
+
+    Returns:
+        List[str] -- descriptions of the regressions
+    """
+    key = lambda result: (result["case"], result["backend"], result["size"])
+    previous = {key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        metric = "peak_bytes" if result["case"] == "memory" else "best"
+        if result[metric] > old[metric] * (1 + tolerance):
+            regressions.append(
+                f"{result['case']} (backend: {result['backend']}, size: {result['size']}): "
+                f"{metric} {old[metric]:.6g} -> {result[metric]:.6g}"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cases", nargs="*", help=f"cases to run (default: all of {list(CASES)})")
+    parser.add_argument("--quick", action="store_true", help="only the smallest sizes")
+    parser.add_argument("--backend", action="append", choices=BACKENDS, help="backends to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="file to write the JSON to (default: stdout)")
+    parser.add_argument("--compare", help="JSON of a previous run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown in --compare")
+    args = parser.parse_args(argv)
+    unknown = set(args.cases) - set(CASES)
+    if unknown:
+        parser.error(f"Unknown cases {sorted(unknown)}. Options: {list(CASES)}")
+
+    results = run(
+        cases=args.cases or None, sizes=QUICK_SIZES if args.quick else SIZES,
+        backends=args.backend or BACKENDS, repeat=args.repeat,
+    )
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    else:
+        print(output)
+
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
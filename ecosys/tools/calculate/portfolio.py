@@ -1,14 +1,140 @@
+"""
+Risk and return of portfolios
 
+The functions taking returns work on a matrix of returns with
+a row per portfolio (agent) and a column per period and compute
+the statistics of all the rows at once. The rolling variants use
+running sums thus their cost does not depend on the window.
+"""
+
+import numpy as np
 
 
 def sharpe(r_portfolio, r_riskfree, std_portfolio):
     """Calculate Sharpe
-    
+
     Arguments:
         r_portfolio {[type]} -- Average return of portfolio
         r_riskfree {[type]} -- Risk-free rate of return
         std_portfolio {[type]} -- Standard deviation of portfolio returns (r_portfolio)
-    
+
     """
 
-    return (r_portfolio - r_riskfree) / std_portfolio
\ No newline at end of file
+    return (r_portfolio - r_riskfree) / std_portfolio
+
+
+def _rolling_sum(values, window):
+    "Sums of the windows along the last axis (incremental)"
+    sums = np.cumsum(values, axis=-1)
+    sums[..., window:] = sums[..., window:] - sums[..., :-window]
+    return sums[..., window - 1:]
+
+
+def _mean_std(returns, window=None, ddof=1):
+    "Means and standard deviations of the rows (or of their windows)"
+    returns = np.asarray(returns, dtype=np.float64)
+    if window is None:
+        return returns.mean(axis=-1), returns.std(axis=-1, ddof=ddof)
+    # Centered first to keep the running sums of squares accurate
+    centered = returns - returns.mean(axis=-1, keepdims=True)
+    sums = _rolling_sum(centered, window)
+    squares = _rolling_sum(centered ** 2, window)
+    variance = (squares - sums ** 2 / window) / (window - ddof)
+    means = sums / window + returns.mean(axis=-1, keepdims=True)
+    return means, np.sqrt(np.maximum(variance, 0))
+
+
+def sharpe_ratio(returns, r_riskfree=0, window=None, periods=1):
+    """Sharpe ratios of the portfolios
+
+    Arguments:
+        returns {np.ndarray} -- returns (portfolios x periods)
+
+    Keyword Arguments:
+        r_riskfree {float} -- risk-free return per period (default: {0})
+        window {int} -- periods of rolling ratios (default: {None}, all)
+        periods {int} -- periods per year to annualize (default: {1})
+
+    Returns:
+        np.ndarray -- ratio per portfolio (or per portfolio and
+            window end, shape (..., n_periods - window + 1))
+    """
+    means, stds = _mean_std(returns, window=window)
+    return sharpe(means, r_riskfree, stds) * np.sqrt(periods)
+
+
+def sortino_ratio(returns, r_target=0, window=None, periods=1):
+    """Sortino ratios of the portfolios
+    (excess return per downside deviation from r_target)
+
+    Arguments:
+        returns {np.ndarray} -- returns (portfolios x periods)
+
+    Keyword Arguments:
+        r_target {float} -- target return per period (default: {0})
+        window {int} -- periods of rolling ratios (default: {None}, all)
+        periods {int} -- periods per year to annualize (default: {1})
+
+    Returns:
+        np.ndarray -- ratio per portfolio (see sharpe_ratio)
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    excess = returns - r_target
+    downside = np.minimum(excess, 0) ** 2
+    if window is None:
+        means, downside = excess.mean(axis=-1), downside.mean(axis=-1)
+    else:
+        means, downside = _rolling_sum(excess, window) / window, _rolling_sum(downside, window) / window
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return means / np.sqrt(downside) * np.sqrt(periods)
+
+
+def max_drawdown(returns):
+    """Largest drops of the values from their previous peaks
+
+    Arguments:
+        returns {np.ndarray} -- returns (portfolios x periods)
+
+    Returns:
+        np.ndarray -- drawdown per portfolio as share of the peak
+            (0 if never below the peak)
+    """
+    values = np.cumprod(1 + np.asarray(returns, dtype=np.float64), axis=-1)
+    peaks = np.maximum.accumulate(values, axis=-1)
+    # Starting value (1) is a peak as well
+    np.maximum(peaks, 1, out=peaks)
+    return np.max(1 - values / peaks, axis=-1)
+
+
+def rolling_volatility(returns, window, periods=1, ddof=1):
+    """Standard deviations of the returns in rolling windows
+
+    Arguments:
+        returns {np.ndarray} -- returns (portfolios x periods)
+        window {int} -- periods in a window
+
+    Keyword Arguments:
+        periods {int} -- periods per year to annualize (default: {1})
+        ddof {int} -- delta degrees of freedom (default: {1})
+
+    Returns:
+        np.ndarray -- volatilities of shape (..., n_periods - window + 1)
+    """
+    return _mean_std(returns, window=window, ddof=ddof)[1] * np.sqrt(periods)
+
+
+def covariance(returns, ddof=1):
+    """Covariance matrix of the portfolios (or assets)
+
+    Arguments:
+        returns {np.ndarray} -- returns (portfolios x periods)
+
+    Keyword Arguments:
+        ddof {int} -- delta degrees of freedom (default: {1})
+
+    Returns:
+        np.ndarray -- covariances (portfolios x portfolios)
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    centered = returns - returns.mean(axis=-1, keepdims=True)
+    return centered @ centered.T / (returns.shape[-1] - ddof)
@@ -0,0 +1,185 @@
+"""
+Monte Carlo pricing
+
+The paths of the underlying (geometric Brownian motion with
+optional Merton jumps) are generated in chunks of chunk_size
+paths thus the memory use is bounded by the chunk regardless
+of n_paths. Each chunk has its own random stream spawned from
+the seed (np.random.SeedSequence) and the chunk results are
+combined in the order of the chunks thus a seed gives the same
+price whether the chunks are run in one or in many processes.
+
+Payoffs are functions of the paths (array of shape
+(n_paths, n_steps + 1)) returning the payoff of each path
+(shape (n_paths,) or (n_paths, n_instruments) for portfolios).
+They must be picklable (module level functions or
+functools.partial of them) to run in many processes.
+
+Example:
+    from functools import partial
+    monte_carlo(partial(asian, K=100), S=100, T=1, r=0.01, sigma=0.2, seed=1, n_workers=4)
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def gbm_paths(S, T, r, sigma, n_paths, n_steps, q=0, rng=None, antithetic=False,
+              jump_intensity=0, jump_mean=0, jump_std=0):
+    """Paths of geometric Brownian motion (with Merton jumps)
+
+    Arguments:
+        S {float} -- spot of the underlying
+        T {float} -- time to the end of the paths (years)
+        r {float} -- riskless rate (continuously compounded)
+        sigma {float} -- volatility of the underlying
+        n_paths {int} -- number of paths (even if antithetic)
+        n_steps {int} -- number of time steps
+
+    Keyword Arguments:
+        q {float} -- dividend rate (default: {0})
+        rng {np.random.Generator} -- random generator (default: {None}, new)
+        antithetic {bool} -- second half of the paths mirrors
+            the diffusion of the first half (default: {False})
+        jump_intensity {float} -- expected jumps per year (default: {0})
+        jump_mean, jump_std {float} -- mean and standard deviation
+            of the log jump sizes (default: {0})
+
+    Returns:
+        np.ndarray -- prices of shape (n_paths, n_steps + 1)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    dt = T / n_steps
+    # Drift compensated for the expected jumps (risk-neutral)
+    compensation = jump_intensity * (math.exp(jump_mean + 0.5 * jump_std ** 2) - 1)
+    drift = (r - q - compensation - 0.5 * sigma ** 2) * dt
+
+    if antithetic:
+        if n_paths % 2:
+            raise ValueError(f"Antithetic paths must be even, not {n_paths}")
+        half = rng.standard_normal((n_paths // 2, n_steps))
+        log_returns = np.concatenate([half, -half])
+    else:
+        log_returns = rng.standard_normal((n_paths, n_steps))
+    log_returns *= sigma * math.sqrt(dt)
+    log_returns += drift
+
+    if jump_intensity:
+        n_jumps = rng.poisson(jump_intensity * dt, size=log_returns.shape)
+        log_returns += n_jumps * jump_mean + np.sqrt(n_jumps) * jump_std * rng.standard_normal(log_returns.shape)
+
+    paths = np.empty((n_paths, n_steps + 1))
+    paths[:, 0] = 0
+    np.cumsum(log_returns, axis=1, out=paths[:, 1:])
+    np.exp(paths, out=paths)
+    paths *= S
+    return paths
+
+
+# Payoffs
+def european(paths, K, call=True):
+    "Payoff of European option"
+    return np.maximum((paths[:, -1] - K) if call else (K - paths[:, -1]), 0)
+
+
+def asian(paths, K, call=True):
+    "Payoff of Asian option (arithmetic average of the path)"
+    average = paths[:, 1:].mean(axis=1)
+    return np.maximum((average - K) if call else (K - average), 0)
+
+
+def barrier(paths, K, barrier, call=True, up=True, knock_in=False):
+    "Payoff of barrier option (monitored at the steps)"
+    crossed = (paths.max(axis=1) >= barrier) if up else (paths.min(axis=1) <= barrier)
+    active = crossed if knock_in else ~crossed
+    return european(paths, K, call=call) * active
+
+
+def _simulate_chunk(payoff, seed, n_paths, params):
+    """Sums of a chunk (for combining the chunks)
+
+    Y is the payoff and X the terminal price (control variate).
+    Antithetic pairs are averaged thus they count as one sample.
+    """
+    paths = gbm_paths(n_paths=n_paths, rng=np.random.default_rng(seed), **params)
+    y = np.asarray(payoff(paths), dtype=np.float64)
+    x = paths[:, -1]
+    if params["antithetic"]:
+        half = n_paths // 2
+        y = 0.5 * (y[:half] + y[half:])
+        x = 0.5 * (x[:half] + x[half:])
+    x = x.reshape((-1,) + (1,) * (y.ndim - 1))
+    return {
+        "n": len(y),
+        "y": y.sum(axis=0), "yy": (y * y).sum(axis=0),
+        "x": x.sum(), "xx": (x * x).sum(), "xy": (x * y).sum(axis=0),
+    }
+
+
+def monte_carlo(payoff, S, T, r, sigma, q=0, n_paths=100000, n_steps=252, seed=None,
+                chunk_size=10000, n_workers=1, antithetic=True, control_variate=True,
+                jump_intensity=0, jump_mean=0, jump_std=0):
+    """Price of a path-dependent payoff
+
+    Arguments:
+        payoff {callable} -- payoffs of the paths (see the module)
+        S, T, r, sigma {float} -- see gbm_paths
+
+    Keyword Arguments:
+        q {float} -- dividend rate (default: {0})
+        n_paths {int} -- number of paths (default: {100000})
+        n_steps {int} -- time steps per path (default: {252})
+        seed {int} -- seed of the random streams (default: {None})
+        chunk_size {int} -- paths generated at once (default: {10000})
+        n_workers {int} -- processes running the chunks (default: {1},
+            in this process)
+        antithetic {bool} -- use antithetic paths (default: {True})
+        control_variate {bool} -- use the discounted terminal price
+            as control variate (default: {True})
+        jump_intensity, jump_mean, jump_std {float} -- Merton jumps,
+            see gbm_paths (default: {0})
+
+    Returns:
+        dict -- price and std_error (standard error of the price), 
+            arrays if the payoff has many instruments, and n_paths
+    """
+    if antithetic and chunk_size % 2:
+        raise ValueError(f"Antithetic chunk_size must be even, not {chunk_size}")
+    n_chunks = math.ceil(n_paths / chunk_size)
+    sizes = [min(chunk_size, n_paths - i * chunk_size) for i in range(n_chunks)]
+    if antithetic:
+        sizes[-1] += sizes[-1] % 2
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    params = dict(S=S, T=T, r=r, sigma=sigma, q=q, n_steps=n_steps, antithetic=antithetic,
+                  jump_intensity=jump_intensity, jump_mean=jump_mean, jump_std=jump_std)
+    args = ([payoff] * n_chunks, seeds, sizes, [params] * n_chunks)
+
+    if n_workers == 1:
+        chunks = list(map(_simulate_chunk, *args))
+    else:
+        with ProcessPoolExecutor(n_workers) as pool:
+            chunks = list(pool.map(_simulate_chunk, *args))
+
+    # Combined in the order of the chunks (deterministic)
+    n = sum(chunk["n"] for chunk in chunks)
+    sums = {key: sum(chunk[key] for chunk in chunks) for key in ("y", "yy", "x", "xx", "xy")}
+    mean_y, mean_x = sums["y"] / n, sums["x"] / n
+    var_y = (sums["yy"] - n * mean_y ** 2) / (n - 1)
+    if control_variate:
+        # E[S_T] is known thus the error of the simulated mean
+        # of S_T is removed from the payoff in proportion to
+        # their covariance
+        var_x = (sums["xx"] - n * mean_x ** 2) / (n - 1)
+        cov_xy = (sums["xy"] - n * mean_x * mean_y) / (n - 1)
+        beta = cov_xy / var_x
+        mean_y = mean_y - beta * (mean_x - S * math.exp((r - q) * T))
+        var_y = var_y - beta * cov_xy
+
+    discount = math.exp(-r * T)
+    return {
+        "price": discount * mean_y,
+        "std_error": discount * np.sqrt(np.maximum(var_y, 0) / n),
+        "n_paths": n * (2 if antithetic else 1),
+    }
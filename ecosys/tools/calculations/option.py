@@ -1,62 +1,240 @@
-# Balck and Scholes
-def european_call_price(S, K, T, r, sigma, q=0):
+"""
+Black and Scholes
+
+The functions broadcast thus whole option chains (arrays of
+spots, strikes, maturities etc.) are valued in one call.
+black_scholes computes the price and all the Greeks at once
+sharing d1, d2 and the normal CDF evaluations between them.
+
+Notation:
+    S -- underlying's spot
+    K -- strike
+    T -- time to maturity (years, positive)
+    r -- riskless rate (continuously compounded)
+    sigma -- volatility of the underlying (positive)
+    q -- dividend rate (continuously compounded)
+"""
+
+import numpy as np
+from scipy.special import ndtr
+
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def _as_float(*values):
+    return [np.asarray(value, dtype=np.float64) for value in values]
+
+
+def _d1_d2(S, K, T, r, sigma, q):
+    "d1, d2 and sigma * sqrt(T)"
+    vol_sqrt_t = sigma * np.sqrt(T)
+    d1 = np.log(S / K)
+    d1 += (r - q + 0.5 * sigma ** 2) * T
+    d1 /= vol_sqrt_t
+    return d1, d1 - vol_sqrt_t, vol_sqrt_t
+
+
+def black_scholes(S, K, T, r, sigma, q=0, call=True):
+    """Price and Greeks of European options
+
+    Arguments:
+        S, K, T, r, sigma {float, np.ndarray} -- see the module (broadcasted)
+
+    Keyword Arguments:
+        q {float, np.ndarray} -- dividend rate (default: {0})
+        call {bool, np.ndarray} -- call (True) or put (False) (default: {True})
+
+    Returns:
+        dict -- arrays of price, delta, gamma, vega (per 1.00 of sigma),
+            theta (per year) and rho (per 1.00 of r)
+
+    Example:
+        strikes = np.arange(80, 121)[:, None]
+        maturities = np.array([0.25, 0.5, 1.0])
+        chain = black_scholes(100, strikes, maturities, 0.01, 0.2)
+        chain["price"] # shape (41, 3)
     """
-    S: Underlying's spot
-    K=Strike
-    T=time to maturity
-    r=riskless rate
-    sigma=volatility of underlying
-    q=dividend rate
+    # Views of the inputs in the shape of the outputs
+    # thus the intermediates can be updated in place
+    S, K, T, r, sigma, q, call = np.broadcast_arrays(*_as_float(S, K, T, r, sigma, q), call)
+    sign = np.where(call, 1.0, -1.0)
+    d1, d2, vol_sqrt_t = _d1_d2(S, K, T, r, sigma, q)
+
+    # Discounted spot and strike
+    spot = np.exp(-q * T)
+    spot *= S
+    strike = np.exp(-r * T)
+    strike *= K
+
+    # N(d1), N(d2) for calls and N(-d1), N(-d2) for puts
+    d1 *= sign
+    d2 *= sign
+    cdf_d1 = ndtr(d1)
+    cdf_d2 = ndtr(d2)
+    pdf_d1 = np.square(d1)
+    pdf_d1 *= -0.5
+    pdf_d1 = np.exp(pdf_d1)
+    pdf_d1 /= _SQRT_2PI
+
+    # Legs of the price: spot * N(d1) and strike * N(d2)
+    spot_leg = spot * cdf_d1
+    strike_leg = strike * cdf_d2
+
+    price = spot_leg - strike_leg
+    price *= sign
+
+    delta = spot_leg / S
+    delta *= sign
+
+    gamma = spot * pdf_d1
+    vega = gamma * np.sqrt(T)
+    gamma /= np.square(S) * vol_sqrt_t
+
+    theta = vega * sigma
+    theta /= -2 * T
+    theta += sign * (q * spot_leg - r * strike_leg)
+
+    rho = strike_leg * T
+    rho *= sign
+
+    return {"price": price, "delta": delta, "gamma": gamma, "vega": vega, "theta": theta, "rho": rho}
+
+
+def _price_vega(S, K, T, r, sigma, q, sign):
+    "Prices and vegas (for implied_volatility)"
+    d1, d2, _ = _d1_d2(S, K, T, r, sigma, q)
+    spot = S * np.exp(-q * T)
+    price = sign * (spot * ndtr(sign * d1) - K * np.exp(-r * T) * ndtr(sign * d2))
+    vega = spot * np.exp(-0.5 * d1 ** 2) / _SQRT_2PI * np.sqrt(T)
+    return price, vega
+
+
+def implied_volatility(price, S, K, T, r, q=0, call=True, tol=1e-8, max_iter=100, high=5.0):
+    """Volatilities whose Black-Scholes prices are the given prices
+
+    The options are solved together: Newton steps (with vega) are 
+    taken where they stay inside the bracket of the root and bisection
+    steps elsewhere. An option drops out of the iteration once 
+    its volatility is within tol thus each pass only works on 
+    the unsolved options.
+
+    Arguments:
+        price {float, np.ndarray} -- prices of the options
+        S, K, T, r {float, np.ndarray} -- see the module (broadcasted)
+
+    Keyword Arguments:
+        q {float, np.ndarray} -- dividend rate (default: {0})
+        call {bool, np.ndarray} -- call (True) or put (False) (default: {True})
+        tol {float} -- allowed error of the volatility (default: {1e-8})
+        max_iter {int} -- max passes over the options (default: {100})
+        high {float} -- initial upper bound of the volatility,
+            doubled where not enough (default: {5.0})
+
+    Returns:
+        np.ndarray -- implied volatilities (NaN where the price is 
+            outside the no-arbitrage bounds or not solved)
+
+    Example:
+        prices = black_scholes(100, strikes, maturities, 0.01, 0.2)["price"]
+        implied_volatility(prices, 100, strikes, maturities, 0.01) # ~0.2
     """
-    d1 = calculate_d1(S, K, T, r, sigma)
-    d2 = calculate_d2(S, K, T, r, sigma)
-    if q == 0:
-        return (S * stats.norm.cdf(d1) - K * np.exp(-r * T) * stats.norm.cdf(d2))
-    else:
-        return (S * np.exp(-q*T) * stats.norm.cdf(d1) - K * np.exp(-r * T) * stats.norm.cdf(d2))
+    arrays = np.broadcast_arrays(*_as_float(price, S, K, T, r, q), call)
+    shape = arrays[0].shape
+    price, S, K, T, r, q, call = [array.ravel() for array in arrays]
+    sign = np.where(call, 1.0, -1.0)
+    spot = S * np.exp(-q * T)
+    strike = K * np.exp(-r * T)
+
+    # No-arbitrage bounds of the prices
+    lower = np.maximum(sign * (spot - strike), 0)
+    upper = np.where(call, spot, strike)
+    sigma = np.full(price.shape, np.nan)
+    active = np.flatnonzero((price > lower) & (price < upper))
+
+    # Brackets of the roots (price increases with sigma)
+    low = np.zeros(active.size)
+    high = np.full(active.size, float(high))
+    def prices(sigma, where=slice(None)):
+        i = active[where]
+        return _price_vega(S[i], K[i], T[i], r[i], sigma, q[i], sign[i])
+    for _ in range(64):
+        short = prices(high)[0] < price[active]
+        if not short.any():
+            break
+        low[short] = high[short]
+        high[short] *= 2
+
+    # Initial guesses (Brenner-Subrahmanyam) inside the brackets
+    guess = np.sqrt(2 * np.pi / T[active]) * price[active] / S[active]
+    guess = np.clip(guess, low + 0.01 * (high - low), high - 0.01 * (high - low))
+
+    for _ in range(max_iter):
+        if not active.size:
+            break
+        model, vega = prices(guess)
+        error = model - price[active]
+
+        # Narrow the brackets
+        above = error > 0
+        high = np.where(above, guess, high)
+        low = np.where(above, low, guess)
+
+        # Solved if the Newton step or the bracket is within tol
+        with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+            step = error / vega
+        solved = (np.abs(step) <= tol) | (high - low <= tol)
+        sigma[active[solved]] = guess[solved]
+
+        # Newton step if it stays inside the bracket, else bisection
+        step = guess - step
+        inside = (step > low) & (step < high)
+        guess = np.where(inside, step, 0.5 * (low + high))
+
+        unsolved = ~solved
+        active, guess, low, high = active[unsolved], guess[unsolved], low[unsolved], high[unsolved]
+    return sigma.reshape(shape)
+
+
+def european_call_price(S, K, T, r, sigma, q=0):
+    "Price of European call (see black_scholes)"
+    S, K, T, r, sigma, q = _as_float(S, K, T, r, sigma, q)
+    d1, d2, _ = _d1_d2(S, K, T, r, sigma, q)
+    return S * np.exp(-q * T) * ndtr(d1) - K * np.exp(-r * T) * ndtr(d2)
+
 
 def european_put_price(S, K, T, r, sigma, q=0):
-    """
-    S: Underlying's spot
-    K=Strike
-    T=time to maturity
-    r=riskless rate
-    sigma=volatility of underlying
-    q=dividend rate
-    """
-    d1 = calculate_d1(S, K, T, r, sigma)
-    d2 = calculate_d2(S, K, T, r, sigma)
-    if q == 0:
-        return K * np.exp(-r * T) * stats.norm.cdf(-d2) - S * stats.norm.cdf(-d1)
-    else:
-        return K * np.exp(-r * T) * stats.norm.cdf(-d2) - S * np.exp(-q*T) * stats.norm.cdf(-d1)
+    "Price of European put (see black_scholes)"
+    S, K, T, r, sigma, q = _as_float(S, K, T, r, sigma, q)
+    d1, d2, _ = _d1_d2(S, K, T, r, sigma, q)
+    return K * np.exp(-r * T) * ndtr(-d2) - S * np.exp(-q * T) * ndtr(-d1)
+
+
+def d1(S, K, T, r, sigma, q=0):
+    return _d1_d2(*_as_float(S, K, T, r, sigma, q))[0]
 
-def d1(S, K, T, r, sigma):
-    return (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
 
-def d2(S, K, T, r, sigma):
-    return (np.log(S / K) + (r - 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+def d2(S, K, T, r, sigma, q=0):
+    return _d1_d2(*_as_float(S, K, T, r, sigma, q))[1]
 
 
 # Greeks
 def delta_call(S, K, T, r, sigma, q=0):
     "NOTE: European"
-    d1 = calculate_d1(S, K, T, r, sigma)
-    if q == 0:
-        return stats.norm.cdf(d1)
-    else:
-        return np.exp(-q*T) * stats.norm.cdf(d1)
+    S, K, T, r, sigma, q = _as_float(S, K, T, r, sigma, q)
+    return np.exp(-q * T) * ndtr(d1(S, K, T, r, sigma, q))
+
 
 def delta_put(S, K, T, r, sigma, q=0):
     "NOTE: European"
-    d1 = calculate_d1(S, K, T, r, sigma)
-    if q == 0:
-        return stats.norm.cdf(d1) - 1
-    else:
-        return np.exp(-q*T) * stats.norm.cdf(d1) - 1
+    S, K, T, r, sigma, q = _as_float(S, K, T, r, sigma, q)
+    return -np.exp(-q * T) * ndtr(-d1(S, K, T, r, sigma, q))
+
+
+def gamma(S, K, T, r, sigma, q=0):
+    "NOTE: European (same for calls and puts)"
+    return black_scholes(S, K, T, r, sigma, q)["gamma"]
 
-def gamma():
-    raise NotImplementedError
 
-def vega():
-    raise NotImplementedError
\ No newline at end of file
+def vega(S, K, T, r, sigma, q=0):
+    "NOTE: European (same for calls and puts)"
+    return black_scholes(S, K, T, r, sigma, q)["vega"]
@@ -0,0 +1,160 @@
+"""
+Payoffs of portfolios at expiry
+
+The legs of a portfolio are stored as arrays (a row per leg)
+thus the payoffs of all the legs over a grid of prices are
+evaluated with one broadcast operation. The latest grid and
+its payoffs are cached for the plots and the risk summaries.
+"""
+
+import numpy as np
+
+KINDS = ("call", "put", "share")
+
+
+class Portfolio:
+    """Calls, puts and shares of an underlying
+
+    The payoff of a leg is its profit at expiry per the price
+    of the underlying: quantity * (intrinsic value - premium).
+    Negative quantity is a short (written) position.
+
+    Example:
+        straddle = Portfolio().call(100, premium=5).put(100, premium=4)
+        prices = np.linspace(50, 150, 101)
+        straddle.payoff(prices)
+        straddle.summary(prices)
+        plot_payoff(straddle, pricerange=prices)
+    """
+
+    def __init__(self):
+        self._kind = np.empty(0, dtype=np.int8)
+        self._strike = np.empty(0)
+        self._quantity = np.empty(0)
+        self._premium = np.empty(0)
+        self.labels = []
+        self._cache = None
+
+    def add(self, kind, strike, quantity=1, premium=0, label=None):
+        """Add a leg (self returned)
+
+        Arguments:
+            kind {str} -- "call", "put" or "share"
+            strike {float} -- strike of the option or
+                purchase price of the share
+
+        Keyword Arguments:
+            quantity {float} -- number of contracts/shares (default: {1})
+            premium {float} -- price paid per option (default: {0})
+            label {str} -- name of the leg (default: {None}, from the leg)
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown kind {kind!r}. Options: {list(KINDS)}")
+        self._kind = np.append(self._kind, KINDS.index(kind))
+        self._strike = np.append(self._strike, strike)
+        self._quantity = np.append(self._quantity, quantity)
+        self._premium = np.append(self._premium, premium)
+        self.labels.append(label or f"{quantity:g} x {kind} ({strike:g})")
+        self._cache = None
+        return self
+
+    def call(self, strike, quantity=1, premium=0, label=None):
+        return self.add("call", strike, quantity=quantity, premium=premium, label=label)
+
+    def put(self, strike, quantity=1, premium=0, label=None):
+        return self.add("put", strike, quantity=quantity, premium=premium, label=label)
+
+    def share(self, price, quantity=1, label=None):
+        "Shares bought at the price"
+        return self.add("share", price, quantity=quantity, label=label)
+
+    def leg_payoffs(self, prices):
+        """Payoffs of the legs
+
+        Arguments:
+            prices {float, np.ndarray} -- prices of the underlying at expiry
+
+        Returns:
+            np.ndarray -- payoffs of shape (n_legs, *prices.shape), read-only
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        payoffs, _ = self._evaluate(prices.ravel())
+        return payoffs if prices.ndim == 1 else payoffs.reshape((len(self),) + prices.shape)
+
+    def payoff(self, prices):
+        """Payoff of the portfolio (sum of the legs)
+
+        Arguments:
+            prices {float, np.ndarray} -- prices of the underlying at expiry
+
+        Returns:
+            float, np.ndarray -- payoffs of the shape of prices, read-only
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        _, total = self._evaluate(prices.ravel())
+        return total if prices.ndim == 1 else total.reshape(prices.shape)[()]
+
+    def _evaluate(self, prices):
+        "Payoffs of the legs and their sum over 1-d prices (cached)"
+        cache = self._cache
+        if cache is not None and cache[0].shape == prices.shape and np.array_equal(cache[0], prices):
+            return cache[1], cache[2]
+
+        # Distance of the price from the strike, towards the
+        # money (puts mirrored) and floored at 0 for options
+        sign = np.where(self._kind == KINDS.index("put"), -1.0, 1.0)[:, None]
+        payoffs = sign * (prices[None, :] - self._strike[:, None])
+        options = self._kind != KINDS.index("share")
+        payoffs[options] = np.maximum(payoffs[options], 0)
+        payoffs -= self._premium[:, None]
+        payoffs *= self._quantity[:, None]
+
+        payoffs.setflags(write=False)
+        total = payoffs.sum(axis=0)
+        total.setflags(write=False)
+        self._cache = (prices.copy(), payoffs, total)
+        return payoffs, total
+
+    def slopes(self):
+        """Change of the payoff per price beyond the strikes
+
+        Returns:
+            tuple -- slopes (below the lowest, above the highest strike),
+                non-zero slope is unbounded profit/loss at that end
+        """
+        calls = self._kind == KINDS.index("call")
+        puts = self._kind == KINDS.index("put")
+        shares = self._quantity[self._kind == KINDS.index("share")].sum()
+        return shares - self._quantity[puts].sum(), shares + self._quantity[calls].sum()
+
+    def summary(self, prices):
+        """Risk summary of the payoff over the prices
+
+        Arguments:
+            prices {np.ndarray} -- prices of the underlying (increasing)
+
+        Returns:
+            dict -- max_profit and max_loss within the prices,
+                breakevens (prices where the payoff crosses 0,
+                interpolated) and slopes (see self.slopes)
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        payoff = self.payoff(prices)
+        # Zeros and sign changes between the grid points
+        signs = np.sign(payoff)
+        crossing = np.flatnonzero(signs[:-1] * signs[1:] < 0)
+        weights = payoff[crossing] / (payoff[crossing] - payoff[crossing + 1])
+        breakevens = prices[crossing] + weights * (prices[crossing + 1] - prices[crossing])
+        breakevens = np.sort(np.concatenate([breakevens, prices[signs == 0]]))
+        return {
+            "max_profit": payoff.max(),
+            "max_loss": payoff.min(),
+            "breakevens": breakevens,
+            "slopes": self.slopes(),
+        }
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __str__(self):
+        return "Portfolio(" + ", ".join(self.labels) + ")"
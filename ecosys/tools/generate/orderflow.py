@@ -0,0 +1,173 @@
+"""
+Synthetic order flows
+
+The flows are dicts of columns (side, type, party, price,
+quantity) that can be passed as such to StockMatcher.place_orders
+or Exchange.place_orders. The generators are seeded with
+np.random.RandomState whose streams do not change between
+numpy versions thus a seed gives the same flow everywhere.
+"""
+
+import numpy as np
+
+
+def _parties(rng, n, n_parties):
+    names = np.array([f"P{i}" for i in range(n_parties)])
+    return names[rng.randint(0, n_parties, size=n)]
+
+
+def random_orders(n, seed=None, mid=100.0, spread=1.0, tick_size=0.01,
+                  market_share=0.1, stop_share=0.0, max_quantity=100, n_parties=100):
+    """Random mix of orders around a mid price
+
+    The limit prices are uniform within mid ± spread thus roughly
+    half of them cross the other side.
+
+    Arguments:
+        n {int} -- number of orders
+
+    Keyword Arguments:
+        seed {int} -- seed of the generator (default: {None})
+        mid {float} -- price around which the orders are (default: {100.0})
+        spread {float} -- max distance of the prices from mid (default: {1.0})
+        tick_size {float} -- prices are multiples of it (default: {0.01})
+        market_share {float} -- share of market orders (default: {0.1})
+        stop_share {float} -- share of stop orders (default: {0.0})
+        max_quantity {int} -- quantities are 1 to max_quantity (default: {100})
+        n_parties {int} -- number of distinct parties (default: {100})
+
+    Returns:
+        dict -- columns of the orders
+    """
+    rng = np.random.RandomState(seed)
+    order_type = rng.choice(
+        ["limit", "market", "stop"], size=n,
+        p=[1 - market_share - stop_share, market_share, stop_share]
+    )
+    n_ticks = int(round(spread / tick_size))
+    price = mid + rng.randint(-n_ticks, n_ticks + 1, size=n) * tick_size
+    return {
+        "side": rng.choice(["bid", "ask"], size=n),
+        "type": order_type,
+        "party": _parties(rng, n, n_parties),
+        "price": np.where(order_type == "market", np.nan, np.round(price, 10)),
+        "quantity": rng.randint(1, max_quantity + 1, size=n),
+    }
+
+
+def ladder(side, depth, orders_per_level=1, seed=None, mid=100.0, tick_size=0.01,
+           max_quantity=100, n_parties=100):
+    """Limit orders resting on one side of the book
+
+    The levels start a tick away from mid and go away from it
+    (bids down, asks up). The orders are shuffled.
+
+    Arguments:
+        side {str} -- "bid" or "ask"
+        depth {int} -- number of price levels
+
+    Keyword Arguments:
+        orders_per_level {int} -- orders in each level (default: {1})
+        See random_orders for the rest
+
+    Returns:
+        dict -- columns of the orders
+    """
+    rng = np.random.RandomState(seed)
+    direction = -1 if side == "bid" else 1
+    levels = np.repeat(np.arange(1, depth + 1), orders_per_level)
+    rng.shuffle(levels)
+    n = len(levels)
+    return {
+        "side": np.full(n, side),
+        "type": np.full(n, "limit"),
+        "party": _parties(rng, n, n_parties),
+        "price": np.round(mid + direction * levels * tick_size, 10),
+        "quantity": rng.randint(1, max_quantity + 1, size=n),
+    }
+
+
+def crossed_book(depth, orders_per_level=1, seed=None, mid=100.0, tick_size=0.01,
+                 max_quantity=100, n_parties=100):
+    """Bids and asks that all cross each other
+
+    The bids are at mid and above, the asks at mid and below
+    (depth levels each) thus every bid crosses every ask.
+
+    Arguments:
+        depth {int} -- number of price levels per side
+
+    Keyword Arguments:
+        See ladder
+
+    Returns:
+        dict -- columns of the orders (bids and asks interleaved)
+    """
+    kwargs = dict(orders_per_level=orders_per_level, mid=mid, tick_size=tick_size,
+                  max_quantity=max_quantity, n_parties=n_parties)
+    # Ladders shifted through mid to the other side
+    bids = ladder("ask", depth, seed=seed, **kwargs)
+    asks = ladder("bid", depth, seed=None if seed is None else seed + 1, **kwargs)
+    bids["side"][:] = "bid"
+    asks["side"][:] = "ask"
+    bids["price"] = np.round(bids["price"] - tick_size, 10)
+    asks["price"] = np.round(asks["price"] + tick_size, 10)
+
+    n = len(bids["side"])
+    order = np.empty(2 * n, dtype=np.int64)
+    order[0::2] = np.arange(n)
+    order[1::2] = np.arange(n, 2 * n)
+    return {column: values[order] for column, values in concat(bids, asks).items()}
+
+
+def stop_cascade(n, mid=100.0, tick_size=0.01, quantity=10):
+    """Orders whose first trade sets off a cascade of n stop orders
+
+    Every triggered stop trades against a resting limit order
+    and the trade triggers the next stop (ask and bid stops in
+    turns). All the stops are triggered in one clearing.
+
+    Arguments:
+        n {int} -- number of stop orders
+
+    Keyword Arguments:
+        mid {float} -- price of the first trade is mid + tick (default: {100.0})
+        tick_size {float} -- distance of the levels (default: {0.01})
+        quantity {int} -- quantity of every order (default: {10})
+
+    Returns:
+        dict -- columns of the orders
+    """
+    n_asks = (n + 1) // 2
+    n_bids = n // 2
+    steps_asks = np.arange(n_asks)
+    steps_bids = np.arange(n_bids)
+    sides, types, prices = [], [], []
+    def add(side, order_type, price):
+        sides.append(np.full(len(price), side))
+        types.append(np.full(len(price), order_type))
+        prices.append(np.round(price, 10))
+
+    # Ask stop k is triggered by the trade at mid + (k + 1) ticks and
+    # sells to bid k, bid stop k is triggered by that and buys ask k
+    add("ask", "stop", mid + steps_asks * tick_size)
+    add("bid", "stop", mid - steps_bids * tick_size)
+    add("bid", "limit", mid - (steps_asks + 1) * tick_size)
+    add("ask", "limit", mid + (steps_bids + 2) * tick_size)
+    # The trade that starts the cascade
+    add("bid", "limit", np.array([mid + tick_size]))
+    add("ask", "limit", np.array([mid + tick_size]))
+
+    side = np.concatenate(sides)
+    return {
+        "side": side,
+        "type": np.concatenate(types),
+        "party": np.full(len(side), "Cascade"),
+        "price": np.concatenate(prices),
+        "quantity": np.full(len(side), quantity),
+    }
+
+
+def concat(*flows):
+    "Orders of the flows one after another"
+    return {column: np.concatenate([flow[column] for flow in flows]) for column in flows[0]}
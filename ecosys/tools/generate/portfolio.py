@@ -0,0 +1,75 @@
+"""
+Portfolios of assets
+
+Weights of portfolios (a row per portfolio, a column per asset)
+with their expected returns and volatilities.
+"""
+
+import numpy as np
+
+
+def _evaluate(weights, mean_returns, cov):
+    "Weights with their returns and volatilities"
+    variances = np.einsum("pi,ij,pj->p", weights, cov, weights)
+    return {
+        "weights": weights,
+        "returns": weights @ mean_returns,
+        "volatility": np.sqrt(np.maximum(variances, 0)),
+    }
+
+
+def efficient_frontier(mean_returns, cov, n_points=50, max_return=None):
+    """Minimum variance portfolios of the target returns
+    (fully invested, short selling allowed)
+
+    The weights of all the targets are computed at once from
+    the closed-form solution (Merton 1972).
+
+    Arguments:
+        mean_returns {np.ndarray} -- expected returns of the assets
+        cov {np.ndarray} -- covariance matrix of the assets
+
+    Keyword Arguments:
+        n_points {int} -- number of portfolios (default: {50})
+        max_return {float} -- return of the last portfolio
+            (default: {None}, highest of the assets)
+
+    Returns:
+        dict -- weights (n_points x assets), returns and volatility
+            from the minimum variance portfolio upwards
+    """
+    mean_returns = np.asarray(mean_returns, dtype=np.float64)
+    cov = np.asarray(cov, dtype=np.float64)
+    ones = np.ones_like(mean_returns)
+    inv_ones, inv_means = np.linalg.solve(cov, np.stack([ones, mean_returns], axis=1)).T
+
+    a = ones @ inv_ones
+    b = ones @ inv_means
+    c = mean_returns @ inv_means
+    d = a * c - b ** 2
+
+    max_return = mean_returns.max() if max_return is None else max_return
+    targets = np.linspace(b / a, max_return, n_points)[:, None]
+    weights = ((c - b * targets) * inv_ones + (a * targets - b) * inv_means) / d
+    return _evaluate(weights, mean_returns, cov)
+
+
+def random_portfolios(n, mean_returns, cov, seed=None):
+    """Random fully invested long-only portfolios
+    (weights uniform over the simplex)
+
+    Arguments:
+        n {int} -- number of portfolios
+        mean_returns {np.ndarray} -- expected returns of the assets
+        cov {np.ndarray} -- covariance matrix of the assets
+
+    Keyword Arguments:
+        seed {int} -- seed of the generator (default: {None})
+
+    Returns:
+        dict -- weights (n x assets), returns and volatility
+    """
+    mean_returns = np.asarray(mean_returns, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    weights = rng.dirichlet(np.ones(len(mean_returns)), size=n)
+    return _evaluate(weights, mean_returns, np.asarray(cov, dtype=np.float64))
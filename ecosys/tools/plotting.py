@@ -1,17 +1,31 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from .calculations.payoff import Portfolio
+
 def plot_payoff(*investments, pricerange=None, invline_kwds={}, portfline_kwds={}, title="Payoff"):
-    total = np.sum([investment.payoff(pricerange) for investment in investments], axis=0)
-    
+    # Payoffs of each investment (legs of portfolios) evaluated once
+    labels, payoffs = [], []
     for investment in investments:
-        plt.plot(pricerange, investment.payoff(pricerange), label=str(investment), **invline_kwds)
-        
+        if isinstance(investment, Portfolio):
+            labels.extend(investment.labels)
+            payoffs.extend(investment.leg_payoffs(pricerange))
+        else:
+            labels.append(str(investment))
+            payoffs.append(investment.payoff(pricerange))
+    if len(investments) == 1 and isinstance(investments[0], Portfolio):
+        total = investments[0].payoff(pricerange)
+    else:
+        total = np.sum(payoffs, axis=0)
+
+    for label, payoff in zip(labels, payoffs):
+        plt.plot(pricerange, payoff, label=label, **invline_kwds)
+
     plt.plot(pricerange, total, label="Portfolio", **portfline_kwds)
-    
+
     #plt.axvline(0, linestyle="-", alpha=0.5, color="k", zorder=-1)
     plt.axhline(0, linestyle="-", alpha=0.5, color="k", zorder=-1)
     plt.axis('equal')
     #plt.grid(True)
     plt.legend()
-    plt.title(title)
\ No newline at end of file
+    plt.title(title)
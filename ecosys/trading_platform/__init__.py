@@ -1 +1,2 @@
-from .matcher.stockmarket import StockMatcher
\ No newline at end of file
+from .matcher.stockmarket import StockMatcher
+from .matcher.exchange import Exchange
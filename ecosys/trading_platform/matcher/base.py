@@ -1,6 +1,11 @@
 
 from abc import ABC, abstractmethod
 import numpy as np
+
+from .books import ArrayBook, LadderBook, get_book_backend
+from .history import TradeHistory, TradeLog, trade_dtype
+from .events import EventDispatcher, order_event_dtype, POSITIONS, NO_TICKS, TOP_DTYPE
+from .parties import PartyRegistry
 """
 
 https://docs.scipy.org/doc/numpy-1.15.1/reference/arrays.dtypes.html
@@ -19,15 +24,28 @@ class MarketMatcher(ABC):
         
     Use Auctions for imperfect markets
     
+    Keyword Arguments:
+        asset {str} -- traded asset (default: {None})
+        backend {str, OrderBook} -- book backend of the limit orders,
+            see books.BOOK_BACKENDS (default: {"array"})
+        history {bool, int, TradeLog} -- retain all trades (True), none (False),
+            the given number of latest trades or stream them to 
+            disk (TradeLog) (default: {True})
+        parties {PartyRegistry} -- registry of the parties if they are
+            stored as integers, pass to share it between matchers 
+            (default: {None}, new registry)
+
     Attributes:
         _dtype_mapping {Dict[Dict[Tuple]]} -- dict of numpy dtype 
+        parties {PartyRegistry, None} -- names of the parties 
+            (None if the parties are stored as strings)
 
     """
 
 
 
     _dtype_mapping = {
-        "limit": {'names':('party', 'price', 'quantity'), 'formats':('U10', 'float32', 'u4')}
+        "limit": {'names':('id', 'seq', 'party', 'price', 'quantity'), 'formats':('u8', 'u8', 'U10', 'float32', 'u4')}
     }
     # Numpy takes as dtype to structured array in form of 
     # dict(names=..., formats=...) 
@@ -35,43 +53,81 @@ class MarketMatcher(ABC):
     # dict(key=np.dtype)
     
 
-    def __init__(self, asset=None):
+    def __init__(self, asset=None, backend="array", history=True, parties=None):
 
-        #Order book contain only limit orders
+        self.backend = get_book_backend(backend)
         self.order_book = {}
         self._setup_books()
         self._last_trade_ticks = None
         self.asset = asset
-
-        self._historical_trades = []
+        self._next_order_id = 0
+        # Sequence number of the next order put to a book
+        # (time priority)
+        self._next_seq = 0
+
+        # Order types are stored in the trades as their index
+        self._order_types = list(self._dtype_mapping)
+        party_format = np.dtype(self._dtype_mapping[self._order_types[0]])["party"]
+        if party_format.kind in "iu":
+            self.parties = PartyRegistry() if parties is None else parties
+        else:
+            self.parties = None
+        if isinstance(history, TradeLog):
+            self._trades = TradeHistory(trade_dtype(party_format), log=history)
+        else:
+            max_trades = None if history is True else int(history)
+            self._trades = TradeHistory(trade_dtype(party_format), max_trades=max_trades)
+
+        self.events = EventDispatcher()
+        self._order_event_dtype = order_event_dtype(party_format)
+        self._top = self._book_top()
+        if self._has_trade_hook:
+            self.subscribe("trade", self._call_trade_hook)
+
+    @classmethod
+    def _with_formats(cls, **formats):
+        "Copy of _dtype_mapping with the formats of the given fields changed"
+        return {
+            order_type: {
+                'names': dtype['names'],
+                'formats': tuple(formats.get(name, fmt) for name, fmt in zip(dtype['names'], dtype['formats']))
+            }
+            for order_type, dtype in cls._dtype_mapping.items()
+        }
 
     def _setup_books(self):
         "Setup the books for __init__"
 
-        def make_array(dtype):
-            return np.empty(shape=(0,), dtype=dtype)
-
         for order_type, dtype in self._dtype_mapping.items():
+            # Only limit orders are matched by price level,
+            # stop orders are kept sorted by the trigger price 
+            # and others are queued as they come
+            if order_type == "limit":
+                book_cls = self.backend
+            elif order_type == "stop":
+                book_cls = LadderBook
+            else:
+                book_cls = ArrayBook
             self.order_book[order_type] = {
-                "bid": make_array(dtype=dtype), "ask": make_array(dtype=dtype)
+                "bid": book_cls(dtype, "bid"), "ask": book_cls(dtype, "ask")
             }
 
     @abstractmethod
     def clear(self):
         self._settle_limit_orders()
     
-    def _clear_orders(self, bid_order, ask_order, bid_origin="limit", ask_origin="limit"):
+    def _clear_orders(self, bid_slot, ask_slot, bid_origin="limit", ask_origin="limit"):
         """Remove orders from order book and pass them to trade
         Parameters
         ----------
-            bid_order: array-like
-                bid order to clear (partially or completely)
-            ask_order: array-like
-                ask order to clear (partially or completely)
+            bid_slot: int
+                slot of the bid order to clear (partially or completely)
+            ask_slot: int
+                slot of the ask order to clear (partially or completely)
             bid_origin: {"limit", "market", "stop"}
-                type of book the bid_order originates from
+                type of book the bid order originates from
             ask_origin: {"limit", "market", "stop"}
-                type of book the ask_order originates from
+                type of book the ask order originates from
 
         Book must have:
             bid
@@ -80,12 +136,12 @@ class MarketMatcher(ABC):
                 quantity
         
         """
-        # TODO: Remove unused bits (bids, asks)
-
-        # For convenience
         bids = self.order_book[bid_origin]["bid"]
         asks = self.order_book[ask_origin]["ask"]
 
+        bid_order = bids.order(bid_slot)
+        ask_order = asks.order(ask_slot)
+
         disclosed_quantity = self._get_disclosed_trade_quantity(bid_order, ask_order)
         disclosed_ticks = self._get_disclosed_trade_ticks(bid_order, ask_order)
 
@@ -96,14 +152,10 @@ class MarketMatcher(ABC):
         bid_order_fulfilled["quantity"] = disclosed_quantity
         ask_order_fulfilled["quantity"] = disclosed_quantity
 
-        # set new quantities
-        bid_order["quantity"] -= disclosed_quantity
-        ask_order["quantity"] -= disclosed_quantity
-
-
-        # Put back modified the order books
-        self.order_book[bid_origin]["bid"] = bids
-        self.order_book[ask_origin]["ask"] = asks
+        # Set new quantities
+        # (the books remove completely fulfilled orders)
+        self._fill_orders(bid_origin, "bid", bid_slot, disclosed_quantity)
+        self._fill_orders(ask_origin, "ask", ask_slot, disclosed_quantity)
 
         # Turn fulfilled orders to dicts
         self._fulfill_orders(
@@ -112,71 +164,353 @@ class MarketMatcher(ABC):
             ticks=disclosed_ticks, quantity=disclosed_quantity
         )
 
-        # Delete completely fulfilled orders (if any)
-        self._delete_fulfilled_orders()
+    def _fill_orders(self, book_type, position, slots, quantity):
+        "Reduce the quantities of the orders (in slots) of a book by the filled quantity"
+        book = self.order_book[book_type][position]
+        if not self.events.has_listeners("order_filled"):
+            book.fill(slots, quantity)
+            return
+
+        orders = book.order(np.atleast_1d(slots))
+        book.fill(slots, quantity)
+
+        payload = self._order_events(book_type, position, orders)
+        payload["filled"] = quantity
+        payload["quantity"] -= payload["filled"]
+        self.events.emit("order_filled", payload)
 
     def _fulfill_orders(self, bid_order, ask_order, 
                         ticks, quantity, 
                         bid_origin=None, ask_origin=None):
+        "Record a trade of (partially) fulfilled orders"
 
-        # Turn orders (np.void) to dict
-        bid_order = {
-            column: bid_order[i] 
-            for i, column in enumerate(self._dtype_mapping[bid_origin]["names"])
-        }
-        ask_order = {
-            column: ask_order[i] 
-            for i, column in enumerate(self._dtype_mapping[ask_origin]["names"])
-        }
-        bid_order["order"] = bid_origin
-        ask_order["order"] = ask_origin
+        self._last_trade_ticks = ticks
+        self.last_quantity = quantity
 
-        trade_kwds = dict(
-            bid=bid_order, ask=ask_order, 
+        fields = dict(
+            bid_id=bid_order["id"], ask_id=ask_order["id"],
+            bid_party=bid_order["party"], ask_party=ask_order["party"],
+            bid_order=self._order_types.index(bid_origin), 
+            ask_order=self._order_types.index(ask_origin),
             ticks=ticks, quantity=quantity,
         )
-        self.trade_orders(asset=self.asset, **trade_kwds)
+        if self.events.has_listeners("trade"):
+            payload = np.zeros(shape=(1,), dtype=self._trades.dtype)
+            payload["trade"] = self._trades.n_trades
+            for name, value in fields.items():
+                payload[name] = value
+            self.events.emit("trade", payload)
 
-        self._last_trade_ticks = ticks
-        self.last_quantity = quantity
+        self._trades.append(**fields)
+        self._after_trades(ticks)
+
+    def _fulfill_many(self, bid_orders, ask_orders, 
+                      ticks, quantity, 
+                      bid_origin, ask_origin):
+        """Record trades of (partially) fulfilled orders at once
+
+        Arguments:
+            bid_orders {np.ndarray, dict} -- ids and parties of the bids per trade
+            ask_orders {np.ndarray, dict} -- ids and parties of the asks per trade
+            ticks {np.ndarray} -- prices of the trades in ticks
+            quantity {np.ndarray} -- quantities of the trades
+            bid_origin {str, np.ndarray} -- type of the bid orders or 
+                their indexes in self._dtype_mapping per trade
+            ask_origin {str, np.ndarray} -- as bid_origin but for asks
+        """
+        if not len(ticks):
+            return
 
-        self._historical_trades.append(trade_kwds)
+        if isinstance(bid_origin, str):
+            bid_origin = self._order_types.index(bid_origin)
+        if isinstance(ask_origin, str):
+            ask_origin = self._order_types.index(ask_origin)
 
-    def _delete_fulfilled_orders(self):
-        "Delete orders with quantity of zero"
+        self._last_trade_ticks = int(ticks[-1])
+        self.last_quantity = int(quantity[-1])
 
-        for book_type in self._dtype_mapping:
-            bids = self.order_book[book_type]["bid"]
-            asks = self.order_book[book_type]["ask"]
+        columns = dict(
+            bid_id=bid_orders["id"], ask_id=ask_orders["id"],
+            bid_party=bid_orders["party"], ask_party=ask_orders["party"],
+            bid_order=bid_origin, ask_order=ask_origin,
+            ticks=ticks, quantity=quantity,
+        )
+        if self.events.has_listeners("trade"):
+            payload = np.empty(shape=(len(ticks),), dtype=self._trades.dtype)
+            payload["trade"] = np.arange(self._trades.n_trades, self._trades.n_trades + len(ticks))
+            for name, values in columns.items():
+                payload[name] = values
+            self.events.emit("trade", payload)
+
+        self._trades.extend(**columns)
+        self._after_trades(ticks)
+
+    def _after_trades(self, ticks):
+        """Called after trades are recorded with the prices 
+        of them in the order of the trades (hook for subclasses)"""
+
+    def _order_events(self, book_type, position, orders):
+        "Payload of order events from orders (structured array) of a book"
+        payload = np.zeros(shape=orders.shape, dtype=self._order_event_dtype)
+        payload["id"] = orders["id"]
+        payload["order"] = self._order_types.index(book_type)
+        payload["side"] = POSITIONS.index(position)
+        payload["party"] = orders["party"]
+        payload["ticks"] = orders["ticks"] if "ticks" in orders.dtype.names else NO_TICKS
+        payload["quantity"] = orders["quantity"]
+        return payload
+
+    def _book_top(self):
+        "Best prices (in ticks) and their total quantities of the limit orders"
+        top = np.full(shape=(1,), fill_value=NO_TICKS, dtype=TOP_DTYPE)
+        for position in POSITIONS:
+            ticks, quantity = self.order_book["limit"][position].depth(1)
+            if ticks.size:
+                top[f"{position}_ticks"] = ticks[0]
+                top[f"{position}_quantity"] = quantity[0]
+            else:
+                top[f"{position}_quantity"] = 0
+        return top
+
+    def _check_book_top(self):
+        "Emit book_top_changed if the best prices or their quantities changed"
+        if not self.events.has_listeners("book_top_changed"):
+            return
+        top = self._book_top()
+        if (top != self._top).any():
+            self._top = top
+            self.events.emit("book_top_changed", top)
+
+    def subscribe(self, event, callback, batched=False):
+        """Call callback(payload) on event (see events.EVENTS)
 
-            bids = np.delete(bids, np.where(bids["quantity"] == 0), axis=0)
-            asks = np.delete(asks, np.where(asks["quantity"] == 0), axis=0)
+        Arguments:
+            event {str} -- "trade", "order_accepted", "order_filled" 
+                or "book_top_changed"
+            callback {callable} -- called with the payload (structured array)
 
-            self.order_book[book_type]["bid"] = bids
-            self.order_book[book_type]["ask"] = asks
+        Keyword Arguments:
+            batched {bool} -- call once per clear() with the payloads 
+                of the clearing concatenated (default: {False})
+        """
+        if event == "book_top_changed":
+            self._top = self._book_top()
+        self.events.subscribe(event, callback, batched=batched)
+
+    def unsubscribe(self, event, callback):
+        "Stop calling callback on event"
+        self.events.unsubscribe(event, callback)
+
+    @property
+    def _has_trade_hook(self):
+        "Whether trade_orders is overridden (and thus should be called)"
+        return type(self).trade_orders is not MarketMatcher.trade_orders
+
+    def _call_trade_hook(self, trades):
+        "Pass trades to trade_orders one by one"
+        for trade in trades:
+            self.trade_orders(
+                bid={"id": int(trade["bid_id"]), "party": self.party_names(trade["bid_party"]), "order": self._order_types[trade["bid_order"]]}, 
+                ask={"id": int(trade["ask_id"]), "party": self.party_names(trade["ask_party"]), "order": self._order_types[trade["ask_order"]]},
+                ticks=int(trade["ticks"]), quantity=int(trade["quantity"]), asset=self.asset
+            )
+
+    @property
+    def trades(self):
+        """Retained trades as structured array (view to the history)
+        The order types (bid_order, ask_order) are indexes 
+        of self._dtype_mapping. If the trades are streamed to 
+        disk, only the ones not yet written."""
+        return self._trades.trades
+
+    def party_names(self, parties):
+        "Names of the parties (as stored in the books and trades)"
+        if self.parties is None:
+            return parties
+        return self.parties.names(parties)
+
+    @property
+    def n_trades(self):
+        "Number of trades made (including the ones not retained)"
+        return self._trades.n_trades
+
+    def flush_trades(self):
+        "Write the buffered trades to the trade log (if any)"
+        self._trades.flush()
+
+    def close(self):
+        "Write the buffered trades to the trade log and close it (if any)"
+        self._trades.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     def place_order(self, book_type, position, **params):
-        """Put an order to order book
+        """Put an order (or orders) to order book
         
         Arguments:
-            book_type {str} -- [description]
-            position {str} -- [description]
-        
+            book_type {str} -- type of the order ("limit", "market", "stop")
+            position {str} -- side of the order ("bid" or "ask")
+            **params -- fields of the order (see self._dtype_mapping). 
+                Arrays place an order per element in the given order.
+                Ids and sequence numbers are given if not passed.
+
+        Returns:
+            np.ndarray -- ids of the orders
         """
 
         book = self.order_book[book_type][position]
         dtype = self._dtype_mapping[book_type]
 
-        def form_order(dtype, **params):
-            row_values = tuple(params[column] for column in dtype["names"])
-            return np.array([row_values], dtype=dtype)
+        if "id" not in params:
+            n_orders = max(np.size(value) for value in params.values())
+            params["id"] = self._new_order_ids(n_orders)
+
+        def form_orders(dtype, **params):
+            n_orders = max(np.size(params[column]) for column in dtype["names"])
+            orders = np.empty(shape=(n_orders,), dtype=dtype)
+            for column in dtype["names"]:
+                orders[column] = params[column]
+            return orders
+
+        if "seq" in dtype["names"] and "seq" not in params:
+            params["seq"] = self._new_seqs(max(np.size(value) for value in params.values()))
+
+        if self.parties is not None and "party" in params:
+            params["party"] = self.parties.intern(params["party"])
+
+        self._check_bounds(dtype, params)
+        new_orders = form_orders(dtype, **params)
+        book.append(new_orders)
+
+        if self.events.has_listeners("order_accepted"):
+            self.events.emit("order_accepted", self._order_events(book_type, position, new_orders))
+        self._check_book_top()
+        return new_orders["id"]
+
+    @staticmethod
+    def _check_bounds(dtype, params):
+        """Raise OverflowError if values of the integer fields do not fit
+        to the dtype and ValueError if quantities are not positive 
+        whole numbers (the whole arrays are checked at once)"""
+        quantity = np.asarray(params.get("quantity", 1))
+        if quantity.size and not (quantity > 0).all():
+            raise ValueError("Quantity of an order must be positive")
+        if quantity.dtype.kind == "f" and (quantity != np.floor(quantity)).any():
+            raise ValueError("Quantity of an order must be a whole number")
+        for name, fmt in zip(dtype["names"], dtype["formats"]):
+            fmt = np.dtype(fmt)
+            values = np.asarray(params.get(name, 0))
+            if fmt.kind not in "iu" or values.dtype.kind not in "iufO" or not values.size:
+                continue
+            if not MarketMatcher._in_bounds(values, fmt).all():
+                info = np.iinfo(fmt)
+                raise OverflowError(f"Field {name!r} out of bounds of {fmt} ({info.min} to {info.max})")
+
+    @staticmethod
+    def _in_bounds(values, fmt):
+        "Mask of the values that fit to the integer format"
+        info = np.iinfo(fmt)
+        if values.dtype.kind == "f":
+            # As floats info.max + 1 is exact (power of two) 
+            # but info.max may round up to it
+            return (values >= float(info.min)) & (values < float(info.max) + 1)
+        return np.asarray((values >= info.min) & (values <= info.max), dtype=bool)
+
+    def _new_order_ids(self, n_orders):
+        "Reserve ids for n_orders"
+        start = self._next_order_id
+        self._next_order_id += n_orders
+        return np.arange(start, start + n_orders, dtype=np.uint64)
+
+    def _new_seqs(self, n_orders):
+        "Sequence numbers for n_orders arriving to the books now"
+        start = self._next_seq
+        self._next_seq += n_orders
+        return np.arange(start, start + n_orders, dtype=np.uint64)
+
+    def _locate_order(self, order_id):
+        """Book type, position and slot of the order 
+        (None if not in the books)"""
+        for book_type, books in self.order_book.items():
+            for position, book in books.items():
+                slot = book.locate(order_id)
+                if slot is not None:
+                    return book_type, position, slot
+        return None
+
+    def cancel(self, order_id):
+        """Remove an order from the books
+
+        Arguments:
+            order_id {int} -- id of the order (as returned when placed)
+
+        Returns:
+            bool -- whether the order was in the books
+                (False if already filled or cancelled)
+        """
+        location = self._locate_order(order_id)
+        if location is None:
+            return False
+        book_type, position, slot = location
+        self.order_book[book_type][position].remove(slot)
+        self._check_book_top()
+        return True
+
+    def amend_order(self, order_id, **params):
+        """Modify an order in the books
+
+        Reducing the quantity keeps the priority of the order
+        (quantity of zero removes it). Otherwise the order is moved 
+        to the end of the queue (keeping its id but getting a new 
+        sequence number).
+
+        Arguments:
+            order_id {int} -- id of the order (as returned when placed)
+            **params -- new values of the fields of the order
+
+        Returns:
+            bool -- whether the order was in the books
+                (False if already filled or cancelled)
+        """
+        location = self._locate_order(order_id)
+        if location is None:
+            return False
+        book_type, position, slot = location
+        book = self.order_book[book_type][position]
+        order = book.order(slot).copy()
+
+        unknown = set(params) - set(order.dtype.names)
+        if unknown:
+            raise ValueError(f"Cannot amend fields {sorted(unknown)} of {book_type} order")
 
-        new_order = form_order(dtype, **params)
-        self.order_book[book_type][position] = np.append(book, new_order)
+        quantity = params.get("quantity", order["quantity"])
+        if quantity < 0 or quantity != np.floor(quantity):
+            raise ValueError("Quantity of an order must be a non-negative whole number")
+        keeps_priority = quantity == 0 or quantity <= order["quantity"] and all(
+            params[field] == order[field] for field in params if field != "quantity"
+        )
+        if keeps_priority:
+            # Reduce in place (quantity of zero removes)
+            book.fill(slot, order["quantity"] - quantity)
+            self._check_book_top()
+        else:
+            fields = {field: order[field] for field in order.dtype.names if field != "seq"}
+            fields.update(params)
+            # Checked before removing thus a failed amend leaves the order
+            self._check_bounds(self._dtype_mapping[book_type], fields)
+            book.remove(slot)
+            self.place_order(book_type, position, **fields)
+        return True
 
     @staticmethod
     def trade_orders(bid, ask, ticks, quantity, asset):
         """All the fulfilled trades go here!
+        Called (trade by trade) only if overridden by a subclass.
+        Prefer subscribing to "trade" events (see subscribe).
         This method should (in future):
             - Signal asker's account to remove {asset} by amount of {quantity} 
               and add {quantity * price} amount of cash
@@ -0,0 +1,441 @@
+"""
+Order book backends
+
+A book holds one side (bid or ask) of one order type.
+Matchers do not access the orders directly but through
+the interface of OrderBook:
+
+    - append: put new orders to the book
+    - best: slot of the order that should be filled next
+    - fill: reduce quantities (and remove filled orders)
+    - remove: take orders out of the book
+
+Orders are referred with slots (rows in the storage of the book).
+A slot is valid till the book is modified again.
+
+Priority is price-time: better price first and, within a price,
+lower sequence number (field 'seq') first. The position of an order
+in the storage does not matter if the orders have sequence numbers.
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+import numpy as np
+
+
+class OrderBook(ABC):
+    """Abstract side of an order book
+
+    The orders are kept in a storage array that grows by doubling
+    thus appending N orders costs O(N). Filled and removed orders
+    are left in the storage as tombstones (quantity of zero).
+    The storage is compacted once the tombstones make up more than
+    compact_ratio of it (and there are more than min_compact of them)
+    or when the storage is full and at least half of it are tombstones.
+
+    If the orders have ids (field 'id'), the book keeps an index
+    from the ids of the orders in the book to their slots.
+
+    Orders may be appended out of the order of their sequence 
+    numbers (field 'seq'). Compaction puts the storage back
+    to the order of the sequence numbers.
+
+    Books of priced orders keep the total quantity and the number
+    of orders per price level up to date as the orders are appended
+    and filled thus the best price and the depth of the book are
+    read without going through the orders.
+
+    Arguments:
+        dtype {dict, np.dtype} -- dtype of the orders (see MarketMatcher._dtype_mapping)
+        position {str} -- side of the book ("bid" or "ask")
+
+    Attributes:
+        priced {bool} -- whether the orders have ticks (price)
+        sequenced {bool} -- whether the orders have sequence numbers
+    """
+
+    initial_capacity = 16
+    compact_ratio = 0.5
+    min_compact = 64
+
+    def __init__(self, dtype, position):
+        self.dtype = np.dtype(dtype)
+        self.position = position
+        self.priced = "ticks" in self.dtype.names
+        self.sequenced = "seq" in self.dtype.names
+
+        self._data = np.empty(shape=(self.initial_capacity,), dtype=self.dtype)
+        self._end = 0
+        self._live = 0
+
+        # Order id -> slot
+        self._index = {} if "id" in self.dtype.names else None
+
+        # Whether the storage is in the order of the sequence numbers
+        self._in_sequence = True
+        self._last_seq = -1
+
+        # Price levels. Keys of the levels are sorted ascending, 
+        # the best level is the last. Key is ticks for bids and 
+        # negative ticks for asks
+        self._keys = []
+        self._totals = {}
+        self._counts = {}
+        self._sign = 1 if position == "bid" else -1
+
+    def append(self, orders):
+        """Put orders to the end of the queue
+
+        Arguments:
+            orders {np.ndarray} -- structured array of the orders
+
+        Returns:
+            np.ndarray -- slots of the appended orders
+        """
+        orders = self._as_orders(orders)
+        n_orders = len(orders)
+        self._reserve(n_orders)
+
+        start = self._end
+        self._data[start:start + n_orders] = orders
+        self._end += n_orders
+
+        slots = np.arange(start, start + n_orders)
+        self._insert(slots, orders)
+        return slots
+
+    @abstractmethod
+    def best(self):
+        "Slot of the order with the highest priority (None if empty)"
+
+    def fill(self, slots, quantity):
+        """Reduce the quantities of the orders in slots.
+        Orders that have nothing left are removed from the book"""
+        slots = np.atleast_1d(slots)
+        quantities = self._data["quantity"]
+        quantities[slots] = quantities[slots] - quantity
+        filled = quantities[slots] == 0
+        if self.priced:
+            quantity = np.broadcast_to(np.asarray(quantity, dtype=np.int64), slots.shape)
+            self._update_levels(self._data["ticks"][slots], -quantity, -filled.astype(np.int64))
+        self._discard(slots[filled])
+        self._maybe_compact()
+
+    def remove(self, slots):
+        "Remove the orders in slots from the book"
+        slots = np.atleast_1d(slots)
+        slots = slots[self._data["quantity"][slots] > 0]
+        if self.priced:
+            quantity = self._data["quantity"][slots].astype(np.int64)
+            self._update_levels(self._data["ticks"][slots], -quantity, -np.ones_like(quantity))
+        self._data["quantity"][slots] = 0
+        self._discard(slots)
+        self._maybe_compact()
+
+    def _insert(self, slots, orders):
+        "Register appended orders (slots) to the bookkeeping of the book"
+        quantities = orders["quantity"]
+        self._live += int(np.count_nonzero(quantities))
+        if self.priced:
+            self._update_levels(orders["ticks"], quantities, quantities > 0)
+        if self._index is not None:
+            live = quantities > 0
+            self._index.update(zip(orders["id"][live].tolist(), slots[live].tolist()))
+        if self.sequenced and len(orders):
+            seq = orders["seq"]
+            if int(seq[0]) <= self._last_seq or (seq[1:] <= seq[:-1]).any():
+                self._in_sequence = False
+            self._last_seq = max(self._last_seq, int(seq.max()))
+
+    def _update_levels(self, ticks, quantity, count):
+        """Add quantity and number of orders (count) to the price 
+        levels of ticks. Levels that are left empty are removed"""
+        keys = (ticks.astype(np.int64) * self._sign).tolist()
+        quantity = np.asarray(quantity, dtype=np.int64).tolist()
+        count = np.asarray(count, dtype=np.int64).tolist()
+        for key, level_quantity, level_count in zip(keys, quantity, count):
+            if key not in self._counts:
+                if not level_count:
+                    continue
+                self._keys.insert(bisect_left(self._keys, key), key)
+                self._totals[key] = 0
+                self._counts[key] = 0
+            self._totals[key] += level_quantity
+            self._counts[key] += level_count
+            if not self._counts[key]:
+                del self._totals[key]
+                del self._counts[key]
+                del self._keys[bisect_left(self._keys, key)]
+
+    def _discard(self, slots):
+        "Unregister orders (slots) that were turned to tombstones"
+        self._live -= len(slots)
+        if self._index is not None:
+            for order_id in self._data["id"][slots].tolist():
+                del self._index[order_id]
+
+    def _remap(self, alive, new_slots):
+        "Update the bookkeeping after compaction moved the orders"
+
+    def _compact(self):
+        """Remove tombstones from the storage (keeping the order of arrival
+        or sorting by the sequence numbers if the arrival was out of order)"""
+        alive = self._data["quantity"][:self._end] > 0
+        alive_slots = np.flatnonzero(alive)
+        if not self._in_sequence:
+            alive_slots = alive_slots[np.argsort(self._data["seq"][alive_slots], kind="stable")]
+            self._in_sequence = True
+        new_slots = np.empty(self._end, dtype=np.intp)
+        new_slots[alive_slots] = np.arange(len(alive_slots))
+        self._data[:self._live] = self._data[alive_slots]
+        self._end = self._live
+        if self._index is not None:
+            self._index = dict(zip(self._data["id"][:self._end].tolist(), range(self._end)))
+        self._remap(alive, new_slots)
+
+    def locate(self, order_id):
+        "Slot of the order with the id (None if not in the book)"
+        if self._index is None:
+            return None
+        return self._index.get(int(order_id))
+
+    def _reserve(self, n_orders):
+        "Make room for n_orders by compacting or growing the storage"
+        capacity = len(self._data)
+        if self._end + n_orders <= capacity:
+            return
+        if self._end - self._live >= capacity // 2:
+            self._compact()
+        if self._end + n_orders > len(self._data):
+            new_capacity = max(2 * capacity, self._end + n_orders)
+            data = np.empty(shape=(new_capacity,), dtype=self.dtype)
+            data[:self._end] = self._data[:self._end]
+            self._data = data
+
+    def _maybe_compact(self):
+        "Compact the storage if it is fragmented"
+        n_tombstones = self._end - self._live
+        if n_tombstones > self.min_compact and n_tombstones > self.compact_ratio * self._end:
+            self._compact()
+
+    def order(self, slot):
+        "Order (np.void) in the slot"
+        return self._data[slot]
+
+    @property
+    def slots(self):
+        "Slots of the orders in the book in the order of storage"
+        return np.flatnonzero(self._data["quantity"][:self._end] > 0)
+
+    def priority_order(self, slots=None):
+        """Slots of the orders in the book in the order they 
+        should be filled (price-time priority)
+
+        Keyword Arguments:
+            slots {np.ndarray} -- only these orders (default: {None}, all)
+        """
+        slots = self.slots if slots is None else np.asarray(slots)
+        keys = []
+        if self.sequenced and not self._in_sequence:
+            keys.append(self._data["seq"][slots])
+        if self.priced:
+            ticks = self._data["ticks"][slots].astype(np.int64)
+            keys.append(-ticks if self.position == "bid" else ticks)
+        if not keys:
+            return slots
+        # Last key is the primary, ties keep the order of storage
+        return slots[np.lexsort(keys)]
+
+    def better_than(self, ticks, inclusive=False):
+        """Slots of the orders priced better than ticks 
+        (higher bids or lower asks) in the order of arrival
+
+        Keyword Arguments:
+            inclusive {bool} -- include the orders priced at ticks (default: {False})
+        """
+        slots = self.slots
+        keys = self._data["ticks"][slots].astype(np.int64) * self._sign
+        better = keys >= ticks * self._sign if inclusive else keys > ticks * self._sign
+        return self._in_arrival_order(slots[better])
+
+    def _in_arrival_order(self, slots):
+        "Sort slots by the sequence numbers (if any)"
+        if not self.sequenced:
+            return slots
+        return slots[np.argsort(self._data["seq"][slots], kind="stable")]
+
+    def to_array(self):
+        "Orders in the book as structured array in the order of storage"
+        return self._data[self.slots]
+
+    def best_ticks(self):
+        "Ticks of the best order (None if empty or not priced)"
+        if not self._keys:
+            return None
+        return self._keys[-1] * self._sign
+
+    def depth(self, levels=None):
+        """Total quantities of the best price levels
+
+        Keyword Arguments:
+            levels {int} -- number of levels (default: {None}, all)
+
+        Returns:
+            Tuple[np.ndarray] -- ticks and quantities of the levels, best first
+        """
+        keys = self._keys[::-1] if levels is None else self._keys[:-levels - 1:-1]
+        ticks = np.array(keys, dtype=np.int64) * self._sign
+        quantity = np.array([self._totals[key] for key in keys], dtype=np.int64)
+        return ticks, quantity
+
+    @property
+    def size(self):
+        return self._live
+
+    def __len__(self):
+        return self._live
+
+    def __getitem__(self, field):
+        return self._data[field][self.slots]
+
+    def __array__(self, dtype=None, copy=None):
+        orders = self.to_array()
+        return orders if dtype is None else orders.astype(dtype)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.position}, size={len(self)})"
+
+    def _as_orders(self, orders):
+        "Turn orders to structured array of the book's dtype (copying field by field)"
+        orders = np.atleast_1d(orders)
+        if orders.dtype == self.dtype:
+            return orders
+        converted = np.empty(orders.shape, dtype=self.dtype)
+        for name in self.dtype.names:
+            converted[name] = orders[name]
+        return converted
+
+
+class ArrayBook(OrderBook):
+    """Orders in a structured array in the order of arrival
+
+    The best order is searched from the whole array
+    (first of the highest bids/lowest asks) or, if the orders 
+    are not priced, it is the oldest order in the book.
+    """
+
+    def __init__(self, dtype, position):
+        super().__init__(dtype, position)
+        # Oldest slot that might not be a tombstone
+        self._head = 0
+
+    def best(self):
+        if not self._live:
+            return None
+        if not self._in_sequence:
+            # Storage order is not the time priority
+            slots = self.slots
+            if self.priced:
+                slots = slots[self._data["ticks"][slots] == self.best_ticks()]
+            return int(slots[np.argmin(self._data["seq"][slots])])
+        if not self.priced:
+            quantities = self._data["quantity"]
+            while not quantities[self._head]:
+                self._head += 1
+            return self._head
+        slots = self.slots
+        ticks = self._data["ticks"][slots]
+        return int(slots[np.argmax(ticks) if self.position == "bid" else np.argmin(ticks)])
+
+    def _remap(self, alive, new_slots):
+        self._head = 0
+
+
+class LadderBook(OrderBook):
+    """Orders grouped to price levels
+
+    The price levels are kept sorted and each level holds
+    a queue of slots (sorted by the sequence numbers) thus 
+    the best order is found in O(1) and inserting to an existing 
+    level is amortized O(1) (new levels and orders arriving out 
+    of sequence cost a binary search). Tombstones are skipped
+    when met at the head of a queue (queues of emptied levels
+    may hold tombstones till the next compaction).
+    """
+
+    def __init__(self, dtype, position):
+        super().__init__(dtype, position)
+        if not self.priced:
+            raise ValueError(f"{type(self).__name__} requires priced orders (field 'ticks')")
+
+        # Queue of slots per price level (key)
+        self._levels = {}
+
+    def _insert(self, slots, orders):
+        super()._insert(slots, orders)
+        keys = (orders["ticks"].astype(np.int64) * self._sign).tolist()
+        quantities = orders["quantity"].tolist()
+        seqs = self._data["seq"] if self.sequenced else None
+        for slot, key, quantity in zip(slots.tolist(), keys, quantities):
+            if not quantity:
+                # Nothing to trade, left as tombstone
+                continue
+            if key not in self._levels:
+                self._levels[key] = deque()
+            level = self._levels[key]
+            if seqs is not None and level and seqs[level[-1]] > seqs[slot]:
+                # Arrived out of sequence
+                queued_seqs = [seqs[queued] for queued in level]
+                level.insert(bisect_left(queued_seqs, seqs[slot]), slot)
+            else:
+                level.append(slot)
+
+    def _remap(self, alive, new_slots):
+        # Queues of emptied levels are dropped
+        self._levels = {
+            key: deque(int(new_slots[slot]) for slot in level if alive[slot])
+            for key, level in self._levels.items()
+            if key in self._counts
+        }
+
+    def better_than(self, ticks, inclusive=False):
+        # Binary search of the levels, only the orders returned are visited
+        quantities = self._data["quantity"]
+        search = bisect_left if inclusive else bisect_right
+        start = search(self._keys, int(ticks) * self._sign)
+        slots = np.array([
+            slot 
+            for key in self._keys[start:] 
+            for slot in self._levels[key] if quantities[slot]
+        ], dtype=np.intp)
+        return self._in_arrival_order(slots)
+
+    def best(self):
+        if not self._keys:
+            return None
+        level = self._levels[self._keys[-1]]
+        quantities = self._data["quantity"]
+        while not quantities[level[0]]:
+            # Tombstone at the head
+            level.popleft()
+        return level[0]
+
+
+
+BOOK_BACKENDS = {
+    "array": ArrayBook,
+    "ladder": LadderBook,
+}
+
+
+def get_book_backend(backend):
+    """Get book class by name (see BOOK_BACKENDS)
+    or pass through a subclass of OrderBook"""
+    if isinstance(backend, str):
+        try:
+            return BOOK_BACKENDS[backend]
+        except KeyError:
+            raise ValueError(f"Unknown book backend {backend!r}. Options: {list(BOOK_BACKENDS)}")
+    return backend
@@ -0,0 +1,124 @@
+"""
+Events of the matchers
+
+Listeners subscribe to events and are called with a structured
+array (payload) describing what happened:
+
+    trade -- trades (see history.trade_dtype)
+    order_accepted -- orders put to the books (see order_event_dtype)
+    order_filled -- orders (partially) filled (see order_event_dtype)
+    book_top_changed -- best prices and their quantities (see TOP_DTYPE)
+
+Batched listeners are called once per clearing with all
+the events of the clearing concatenated instead of as they occur.
+"""
+
+from contextlib import contextmanager
+
+import numpy as np
+
+EVENTS = ("trade", "order_accepted", "order_filled", "book_top_changed")
+
+# Sides are stored in the payloads as their index
+POSITIONS = ("bid", "ask")
+
+# Ticks of missing prices (unpriced orders, empty book)
+NO_TICKS = -1
+
+TOP_DTYPE = np.dtype([
+    ("bid_ticks", np.int64),
+    ("bid_quantity", np.int64),
+    ("ask_ticks", np.int64),
+    ("ask_quantity", np.int64),
+])
+
+
+def order_event_dtype(party_format):
+    """Structured dtype of order events
+
+    Fields:
+        id -- id of the order
+        order -- order type (index of MarketMatcher._dtype_mapping)
+        side -- index of POSITIONS
+        party -- party of the order
+        ticks -- price in ticks (NO_TICKS if not priced)
+        quantity -- quantity left in the book
+        filled -- quantity filled by the event
+    """
+    return np.dtype([
+        ("id", np.uint64),
+        ("order", np.uint8),
+        ("side", np.uint8),
+        ("party", party_format),
+        ("ticks", np.int64),
+        ("quantity", np.int64),
+        ("filled", np.int64),
+    ])
+
+
+class EventDispatcher:
+    "Listeners of the events of a matcher"
+
+    def __init__(self):
+        self._listeners = {event: [] for event in EVENTS}
+        self._pending = {event: [] for event in EVENTS}
+        self._depth = 0
+
+    def subscribe(self, event, callback, batched=False):
+        """Call callback(payload) on event
+
+        Arguments:
+            event {str} -- see EVENTS
+            callback {callable} -- called with the payload (structured array)
+
+        Keyword Arguments:
+            batched {bool} -- deliver the payloads of a clearing
+                at once when it ends (default: {False})
+        """
+        if event not in EVENTS:
+            raise ValueError(f"Unknown event {event!r}. Options: {list(EVENTS)}")
+        self._listeners[event].append((callback, batched))
+
+    def unsubscribe(self, event, callback):
+        "Stop calling callback on event"
+        self._listeners[event] = [
+            (listener, batched) for listener, batched in self._listeners[event]
+            if listener != callback
+        ]
+
+    def has_listeners(self, event):
+        "Whether anyone listens the event (payloads need not be formed if not)"
+        return bool(self._listeners[event])
+
+    def emit(self, event, payload):
+        "Pass the payload to the listeners of the event"
+        batching = self._depth > 0
+        has_batched = False
+        for callback, batched in self._listeners[event]:
+            if batched and batching:
+                has_batched = True
+            else:
+                callback(payload)
+        if has_batched:
+            self._pending[event].append(payload)
+
+    @contextmanager
+    def batch(self):
+        "Hold the payloads for batched listeners till the end of the block"
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self._deliver()
+
+    def _deliver(self):
+        for event, payloads in self._pending.items():
+            if not payloads:
+                continue
+            payload = np.concatenate(payloads)
+            payloads.clear()
+            for callback, batched in self._listeners[event]:
+                if batched:
+                    callback(payload)
@@ -0,0 +1,251 @@
+"""
+Exchange of many assets
+
+An exchange holds a matcher per symbol and routes orders to them.
+Only the matchers that have changed since the previous clearing
+are cleared thus a clearing costs in proportion to the activity
+rather than to the number of listed symbols.
+"""
+
+import numpy as np
+
+from .history import TradeLog
+from .parties import PartyRegistry
+from .stockmarket import StockMatcher
+
+
+class Exchange:
+    """Matchers of many assets
+
+    A matcher is dirty (needs clearing) once an order is accepted
+    to its books. Stop orders triggered by the trades of a clearing
+    are settled in the same clearing in continuous clearing but wait
+    for the next auction in auction clearing thus a matcher whose
+    triggered stops are left in the books stays dirty.
+
+    Orders can be placed via the exchange or directly to the
+    matchers (exchange[symbol]), both are tracked. The matchers
+    share the party registry (self.parties).
+
+    A trade log (history=TradeLog("trades.bin")) is not shared
+    but split to a log per symbol ("trades_<symbol>.bin", see
+    log_of).
+
+    Keyword Arguments:
+        symbols {Iterable[str]} -- symbols to list (default: {()})
+        matcher {type} -- class of the matchers (default: {StockMatcher})
+        **kwargs -- passed to the matchers (backend, crossing etc.)
+
+    Example:
+        exchange = Exchange(["AAPL", "MSFT"], backend="ladder")
+        exchange.place_bid("AAPL", price=5.0, quantity=100, party="Me")
+        exchange.clear()
+        exchange.stats()
+    """
+
+    def __init__(self, symbols=(), matcher=StockMatcher, **kwargs):
+        self.matcher = matcher
+        self.kwargs = kwargs
+        self.matchers = {}
+        self._dirty = set()
+        self._volume = {}
+        # Order of listing (symbols are cleared in it)
+        self._listing = {}
+        self._n_listed = 0
+        self.parties = PartyRegistry()
+        self._shared_parties = False
+        for symbol in symbols:
+            self.list(symbol)
+
+    def list(self, symbol):
+        "Add a matcher for the symbol (returned)"
+        if symbol in self.matchers:
+            raise KeyError(f"Symbol {symbol!r} already listed")
+        kwargs = self.kwargs
+        if isinstance(kwargs.get("history"), TradeLog):
+            kwargs = {**kwargs, "history": self.log_of(symbol)}
+        matcher = self.matcher(asset=symbol, parties=self.parties, **kwargs)
+        matcher.subscribe("order_accepted", lambda orders: self._dirty.add(symbol))
+        matcher.subscribe("trade", lambda trades: self._add_volume(symbol, trades), batched=True)
+        self.matchers[symbol] = matcher
+        self._volume[symbol] = 0
+        self._listing[symbol] = self._n_listed
+        self._n_listed += 1
+        # Same kwargs thus all or none of the matchers share it
+        self._shared_parties = matcher.parties is self.parties
+        return matcher
+
+    def log_of(self, symbol):
+        """Trade log of the symbol (if history=TradeLog(...))
+
+        Arguments:
+            symbol {str} -- listed or not
+
+        Returns:
+            TradeLog -- log next to the given one with 
+                the symbol appended to its name
+        """
+        log = self.kwargs["history"]
+        path = log.path.with_name(f"{log.path.stem}_{symbol}{log.path.suffix}")
+        return TradeLog(path, chunk_size=log.chunk_size)
+
+    def delist(self, symbol):
+        "Remove the matcher of the symbol (returned)"
+        self._dirty.discard(symbol)
+        del self._volume[symbol]
+        del self._listing[symbol]
+        return self.matchers.pop(symbol)
+
+    def close(self):
+        "Close the trade logs of the matchers (see MarketMatcher.close)"
+        for matcher in self.matchers.values():
+            matcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _add_volume(self, symbol, trades):
+        self._volume[symbol] += int(trades["quantity"].sum())
+
+    @property
+    def symbols(self):
+        return list(self.matchers)
+
+    @property
+    def dirty(self):
+        "Symbols that are cleared on the next clear()"
+        return set(self._dirty)
+
+    def __getitem__(self, symbol):
+        return self.matchers[symbol]
+
+    def __contains__(self, symbol):
+        return symbol in self.matchers
+
+    def __iter__(self):
+        return iter(self.matchers)
+
+    def __len__(self):
+        return len(self.matchers)
+
+# Set orders
+    def place_bid(self, symbol, order_type="limit", **params):
+        "Place bid to the matcher of the symbol (see StockMatcher.place_bid)"
+        return self.matchers[symbol].place_bid(order_type=order_type, **params)
+
+    def place_ask(self, symbol, order_type="limit", **params):
+        "Place ask to the matcher of the symbol (see StockMatcher.place_ask)"
+        return self.matchers[symbol].place_ask(order_type=order_type, **params)
+
+    def place_orders(self, orders=None, **columns):
+        """Place orders of many symbols at once
+        (column "symbol", see StockMatcher.place_orders)
+
+        Returns:
+            np.ndarray -- ids of the orders (unique per symbol)
+        """
+        if orders is not None:
+            columns = {**{column: orders[column] for column in orders}, **columns}
+        columns = {column: np.asarray(values) for column, values in columns.items()}
+        n_orders = max(values.size for values in columns.values())
+        symbol = np.broadcast_to(columns.pop("symbol"), (n_orders,))
+        # Only the symbols of the orders are looked up
+        symbols, inverse = np.unique(symbol, return_inverse=True)
+        unlisted = [name for name in symbols.tolist() if name not in self.matchers]
+        if unlisted:
+            raise KeyError(f"Symbol {unlisted[0]!r} not listed")
+        if "party" in columns and self._shared_parties:
+            # Interned in the given order
+            columns["party"] = np.asarray(self.parties.intern(columns["party"]))
+
+        ids = np.empty(n_orders, dtype=np.uint64)
+        for i, name in enumerate(symbols.tolist()):
+            mask = inverse == i
+            ids[mask] = self.matchers[name].place_orders(**{
+                column: values[mask] if values.ndim else values
+                for column, values in columns.items()
+            })
+        return ids
+
+    def cancel(self, symbol, order_id):
+        "Cancel an order of the symbol (see MarketMatcher.cancel)"
+        return self.matchers[symbol].cancel(order_id)
+
+    def clear(self):
+        """Clear the matchers that changed since the previous clearing
+
+        Returns:
+            List[str] -- the cleared symbols
+        """
+        cleared = sorted(self._dirty, key=self._listing.__getitem__)
+        self._dirty.clear()
+        for symbol in cleared:
+            matcher = self.matchers[symbol]
+            n_stops = self._n_orders(matcher, "stop")
+            matcher.clear()
+            if self._n_orders(matcher, "stop") < n_stops and self._n_orders(matcher, "market"):
+                # Triggered stops are market orders waiting
+                # for the next clearing (auction)
+                self._dirty.add(symbol)
+        return cleared
+
+    @staticmethod
+    def _n_orders(matcher, book_type):
+        return sum(book.size for book in matcher.order_book[book_type].values())
+
+# Analytical
+    def stats(self, symbol_format=None):
+        """Statistics of the listed symbols
+
+        Keyword Arguments:
+            symbol_format {str} -- numpy format of the symbols 
+                (default: {None}, fits the listed symbols)
+
+        Returns:
+            np.ndarray -- structured array with a row per symbol:
+                symbol, last_price, bid, ask (best prices, NaN if none),
+                bid_quantity, ask_quantity (in the books),
+                n_trades and volume (traded quantity)
+        """
+        symbol_format = symbol_format or self._symbol_format(self.matchers)
+        stats = np.empty(len(self.matchers), dtype=[
+            ("symbol", symbol_format),
+            ("last_price", np.float64),
+            ("bid", np.float64),
+            ("ask", np.float64),
+            ("bid_quantity", np.int64),
+            ("ask_quantity", np.int64),
+            ("n_trades", np.int64),
+            ("volume", np.int64),
+        ])
+        for row, (symbol, matcher) in zip(stats, self.matchers.items()):
+            quantities = matcher.total_quantities
+            row["symbol"] = symbol
+            row["last_price"] = np.nan if matcher.last_price is None else matcher.last_price
+            row["bid"] = np.nan if matcher.highest_bid_price is None else matcher.highest_bid_price
+            row["ask"] = np.nan if matcher.lowest_ask_price is None else matcher.lowest_ask_price
+            row["bid_quantity"] = quantities["bid"]
+            row["ask_quantity"] = quantities["ask"]
+            row["n_trades"] = matcher.n_trades
+            row["volume"] = self._volume[symbol]
+        return stats
+
+    @staticmethod
+    def _symbol_format(symbols):
+        return f"U{max([len(str(symbol)) for symbol in symbols] + [1])}"
+
+    @property
+    def n_trades(self):
+        "Number of trades made in all the symbols"
+        return sum(matcher.n_trades for matcher in self.matchers.values())
+
+    @property
+    def volume(self):
+        "Traded quantity of all the symbols"
+        return sum(self._volume.values())
+
+    def __repr__(self):
+        return f"Exchange(symbols={len(self)}, dirty={len(self._dirty)})"
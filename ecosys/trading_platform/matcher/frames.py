@@ -0,0 +1,41 @@
+"""
+DataFrame export of the matchers
+
+Imported on demand thus using the matchers does not require pandas.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def orders_frame(market):
+    "Orders in the books of the market as DataFrame"
+    # Columns ("limit", "market", "stop")
+    dfs = []
+    for book_type in ("limit", "market", "stop"):
+        dfs_book = []
+        for position in ("bid", "ask"):
+            orders = pd.DataFrame(market.order_book[book_type][position].to_array())
+            orders["party"] = market.party_names(orders["party"].to_numpy())
+            dfs_book.append(orders)
+        dfs.append(pd.concat(dfs_book, axis=0, keys=("bid", "ask"), sort=False))
+    df = pd.concat(dfs, axis=0, keys=("limit", "market", "stop"), sort=False)
+    df["price"] = df["ticks"].apply(market._ticks_to_price)
+    df = df.drop(["ticks"], axis=1)
+    return df
+
+
+def trades_frame(market):
+    "Retained trades of the market as DataFrame"
+    trades = market.trades
+    order_types = np.array(market._order_types)
+    return pd.DataFrame(
+        {
+            "bid_party": market.party_names(trades["bid_party"]), 
+            "ask_party": market.party_names(trades["ask_party"]),
+            "bid_order": order_types[trades["bid_order"]], "ask_order": order_types[trades["ask_order"]],
+            "price": market._ticks_to_price(trades["ticks"]), "quantity": trades["quantity"],
+        },
+        index=pd.Index(trades["trade"], name="trade")
+    )
+
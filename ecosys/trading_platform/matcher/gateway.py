@@ -0,0 +1,248 @@
+"""
+Asynchronous order entry
+
+The gateway takes orders from many coroutines, places them to
+the market in micro-batches (one place_orders per batch) and
+clears the market after each batch. A batch is closed once it
+has batch_size orders or interval has passed since its first order.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+
+from .events import POSITIONS
+
+
+class OrderGateway:
+    """Asyncio front of a matcher
+
+    Submitting an order waits till the order is in the books and
+    returns its id (acknowledgement). The trades are published
+    to the subscribed queues after each clearing.
+
+    Backpressure: at most max_pending orders wait for a batch
+    (submit waits for room) and publishing waits for room in
+    the queues of the subscribers.
+
+    Arguments:
+        market {StockMatcher} -- market the orders are placed to
+
+    Keyword Arguments:
+        interval {float} -- seconds a batch is held open (default: {0.01})
+        batch_size {int} -- orders that close a batch (default: {1024})
+        max_pending {int} -- orders waiting for a batch (default: {8192})
+        max_latencies {int} -- latencies kept for statistics (default: {100000})
+
+    Example:
+        async with OrderGateway(market) as gateway:
+            fills = gateway.subscribe(party="Agent")
+            order_id = await gateway.bid(price=5.0, quantity=10, party="Agent")
+            trades = await fills.get()
+    """
+
+    def __init__(self, market, interval=0.01, batch_size=1024, max_pending=8192, max_latencies=100000):
+        self.market = market
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+
+        self._queue = None
+        self._task = None
+        self._subscribers = []
+        self._trades = []
+        self._latencies = deque(maxlen=max_latencies)
+        market.subscribe("trade", self._trades.append, batched=True)
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    def start(self):
+        "Start batching in the running event loop"
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.get_event_loop().create_task(self._run())
+
+    async def stop(self):
+        "Process the submitted orders and stop"
+        await self._queue.put(None)
+        await self._task
+
+    async def submit(self, side, order_type="limit", **params):
+        """Place an order in the next batch
+
+        Arguments:
+            side {str} -- "bid" or "ask"
+
+        Keyword Arguments:
+            order_type {str} -- type of the order (default: {"limit"})
+            **params -- party, quantity and price (if priced order)
+
+        Returns:
+            int -- id of the order once it is in the books
+        """
+        if side not in POSITIONS or order_type not in self.market._dtype_mapping:
+            raise ValueError(f"Invalid order (side: {side!r}, type: {order_type!r})")
+        missing = self._fields(order_type) - set(params)
+        if missing:
+            raise ValueError(f"Missing fields {sorted(missing)} of {order_type} order")
+        if self._task is None or self._task.done():
+            raise RuntimeError("Gateway is not running")
+        accepted = asyncio.get_event_loop().create_future()
+        await self._queue.put((time.perf_counter(), side, order_type, params, accepted))
+        return await accepted
+
+    def _fields(self, order_type):
+        "Parameters required by the order type"
+        names = set(self.market._dtype_mapping[order_type]["names"]) - {"id", "seq"}
+        if "ticks" in names:
+            names = names - {"ticks"} | {"price"}
+        return names
+
+    async def bid(self, order_type="limit", **params):
+        return await self.submit("bid", order_type=order_type, **params)
+
+    async def ask(self, order_type="limit", **params):
+        return await self.submit("ask", order_type=order_type, **params)
+
+    def subscribe(self, party=None, maxsize=1024):
+        """Queue of the trades (structured arrays, one per clearing)
+
+        Keyword Arguments:
+            party {str} -- only trades the party is in (default: {None}, all)
+            maxsize {int} -- clearings held before publishing waits (default: {1024})
+        """
+        queue = asyncio.Queue(maxsize=maxsize)
+        self._subscribers.append((queue, party))
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers = [(other, party) for other, party in self._subscribers if other is not queue]
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = await self._collect()
+            if batch:
+                self._process(batch)
+                await self._publish()
+
+    async def _collect(self):
+        "Wait for a batch (orders, whether stopped)"
+        batch = []
+        item = await self._queue.get()
+        deadline = asyncio.get_event_loop().time() + self.interval
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch, False
+            if not self._queue.empty():
+                item = self._queue.get_nowait()
+                continue
+            timeout = deadline - asyncio.get_event_loop().time()
+            if timeout <= 0:
+                return batch, False
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return batch, False
+        return batch, True
+
+    def _process(self, batch):
+        "Place the orders of the batch, acknowledge and clear"
+        submitted, sides, order_types, params, accepted = zip(*batch)
+        try:
+            columns = {
+                "side": np.array(sides), "type": np.array(order_types),
+                "party": np.array([order["party"] for order in params]),
+                "price": np.array([order.get("price", np.nan) for order in params], dtype=np.float64),
+                "quantity": np.array([order["quantity"] for order in params]),
+            }
+            # Invalid orders are rejected alone, the rest are placed
+            valid = self._valid(columns)
+            for i in np.flatnonzero(~valid).tolist():
+                if not accepted[i].done():
+                    accepted[i].set_exception(self._rejection(order_types[i], params[i]))
+            accepted = [accepted[i] for i in np.flatnonzero(valid).tolist()]
+            if not accepted:
+                return
+            ids = self.market.place_orders(**{name: values[valid] for name, values in columns.items()})
+        except Exception as exc:
+            for future in accepted:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        acknowledged = time.perf_counter()
+        for future, order_id in zip(accepted, ids.tolist()):
+            if not future.done():
+                future.set_result(order_id)
+        self._latencies.extend(acknowledged - np.array(submitted)[valid])
+        self.market.clear()
+
+    def _valid(self, columns):
+        "Mask of the orders that fit to the books of the market (all at once)"
+        market = self.market
+        quantity = columns["quantity"]
+        valid = np.asarray((quantity > 0) & (quantity % 1 == 0), dtype=bool)
+        ticks = np.rint(columns["price"] * 10 ** market.n_ticks)
+        party = columns["party"]
+        for order_type, dtype in market._dtype_mapping.items():
+            formats = dict(zip(dtype["names"], dtype["formats"]))
+            fits = market._in_bounds(quantity, formats["quantity"])
+            if "ticks" in formats:
+                # NaN and infinite prices are out of bounds
+                fits &= market._in_bounds(ticks, formats["ticks"])
+            if market.parties is None and party.dtype.kind in "iuf" and np.dtype(formats["party"]).kind in "iu":
+                fits &= market._in_bounds(party, formats["party"])
+            valid &= (columns["type"] != order_type) | fits
+        return valid
+
+    def _rejection(self, order_type, params):
+        "Exception of an order the batch left out"
+        dtype = self.market._dtype_mapping[order_type]
+        values = {name: params[name] for name in ("party", "quantity")}
+        try:
+            if "ticks" in dtype["names"]:
+                values["ticks"] = self.market._price_to_ticks(params["price"])
+            self.market._check_bounds(dtype, values)
+        except Exception as exc:
+            return exc
+        return ValueError(f"Invalid {order_type} order {params}")
+
+    async def _publish(self):
+        "Put the trades of the latest clearing to the queues of the subscribers"
+        if not self._trades:
+            return
+        trades = np.concatenate(self._trades)
+        self._trades.clear()
+        registry = self.market.parties
+        for queue, party in self._subscribers:
+            if party is None:
+                await queue.put(trades)
+                continue
+            if registry is not None:
+                # Parties are stored as ids
+                party = registry.get(party)
+            party_trades = trades[(trades["bid_party"] == party) | (trades["ask_party"] == party)]
+            if len(party_trades):
+                await queue.put(party_trades)
+
+    def latency(self, percentiles=(50, 90, 99)):
+        """Percentiles of the seconds from submitting to acknowledgement
+
+        Keyword Arguments:
+            percentiles {Iterable[float]} -- (default: {(50, 90, 99)})
+
+        Returns:
+            Dict[float, float] -- seconds by percentile (NaN if no orders)
+        """
+        latencies = np.array(self._latencies)
+        if not len(latencies):
+            return {q: np.nan for q in percentiles}
+        return dict(zip(percentiles, np.percentile(latencies, percentiles).tolist()))
@@ -0,0 +1,224 @@
+"""
+Trade history of the matchers
+
+Trades are stored in a structured array that grows by doubling
+(columnar access by field, no Python objects per trade).
+For long runs the trades can be streamed to disk in chunks
+(see TradeLog) and read back without loading them all.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+
+def trade_dtype(party_format):
+    """Structured dtype of the trades
+
+    Arguments:
+        party_format -- numpy format of the parties (as in the books)
+    """
+    return np.dtype([
+        ("trade", np.uint64),
+        ("bid_id", np.uint64),
+        ("ask_id", np.uint64),
+        ("bid_party", party_format),
+        ("ask_party", party_format),
+        ("bid_order", np.uint8),
+        ("ask_order", np.uint8),
+        ("ticks", np.int64),
+        ("quantity", np.int64),
+    ])
+
+
+class TradeHistory:
+    """Buffer of trades
+
+    Arguments:
+        dtype {np.dtype} -- dtype of the trades (see trade_dtype)
+
+    Keyword Arguments:
+        max_trades {int} -- number of latest trades to retain,
+            None retains all and 0 none (default: {None})
+        log {TradeLog} -- log the trades are flushed to once there
+            are log.chunk_size of them in the buffer (default: {None})
+
+    Attributes:
+        n_trades {int} -- number of trades recorded
+            (including the ones no more retained)
+    """
+
+    initial_capacity = 16
+
+    def __init__(self, dtype, max_trades=None, log=None):
+        self.dtype = np.dtype(dtype)
+        self.max_trades = max_trades
+        self.n_trades = 0
+
+        self.log = log
+        if log is not None:
+            log.open(self.dtype)
+
+        capacity = self.initial_capacity if max_trades is None else min(self.initial_capacity, max_trades)
+        self._data = np.empty(shape=(capacity,), dtype=self.dtype)
+        self._start = 0
+        self._end = 0
+
+    def append(self, **fields):
+        "Record a trade (trade number is set automatically)"
+        if self.max_trades == 0:
+            self.n_trades += 1
+            return
+        self._reserve(1)
+        row = self._data[self._end]
+        row["trade"] = self.n_trades
+        for name, value in fields.items():
+            row[name] = value
+        self._end += 1
+        self.n_trades += 1
+        if self.log is not None and len(self) >= self.log.chunk_size:
+            self.flush()
+
+    def extend(self, **columns):
+        "Record trades from columns (trade numbers are set automatically)"
+        n = max(np.size(values) for values in columns.values())
+        if self.max_trades is not None and n > self.max_trades:
+            # Only the latest fit
+            skip = n - self.max_trades
+            self.n_trades += skip
+            n -= skip
+            columns = {
+                name: values[skip:] if np.ndim(values) else values
+                for name, values in columns.items()
+            }
+        if not n:
+            return
+        self._reserve(n)
+        rows = self._data[self._end:self._end + n]
+        rows["trade"] = np.arange(self.n_trades, self.n_trades + n)
+        for name, values in columns.items():
+            rows[name] = values
+        self._end += n
+        self.n_trades += n
+        if self.log is not None and len(self) >= self.log.chunk_size:
+            self.flush()
+
+    def flush(self):
+        "Write the trades in the buffer to the log and empty the buffer"
+        if self.log is None:
+            return
+        self.log.write(self.trades)
+        self._start = self._end = 0
+
+    def close(self):
+        "Flush the buffer and close the log (if any)"
+        if self.log is None:
+            return
+        self.flush()
+        self.log.close()
+
+    def _reserve(self, n):
+        "Make room for n trades by dropping the oldest (if capped) or growing"
+        if self.max_trades is not None and self._end - self._start + n > self.max_trades:
+            self._start = self._end + n - self.max_trades
+        if self._end + n <= len(self._data):
+            return
+        n_retained = self._end - self._start
+        if self.max_trades is not None and 2 * (n_retained + n) <= len(self._data):
+            # Plenty of room when the oldest are dropped
+            capacity = len(self._data)
+        else:
+            capacity = max(2 * len(self._data), n_retained + n)
+            if self.max_trades is not None:
+                capacity = min(capacity, 2 * self.max_trades)
+        data = np.empty(shape=(capacity,), dtype=self.dtype)
+        data[:n_retained] = self._data[self._start:self._end]
+        self._data = data
+        self._start, self._end = 0, n_retained
+
+    @property
+    def trades(self):
+        "Retained trades (view to the buffer)"
+        return self._data[self._start:self._end]
+
+    def __len__(self):
+        return self._end - self._start
+
+
+class TradeLog:
+    """Trades on disk
+
+    The trades are appended as raw records to a binary file and
+    the dtype is kept in a JSON file next to it (<path>.json).
+    The log can be read back as memory-map or in chunks.
+
+    Arguments:
+        path {str, Path} -- path of the binary file
+
+    Keyword Arguments:
+        chunk_size {int} -- number of trades buffered in memory
+            before writing them to the file (default: {65536})
+
+    Example:
+        with StockMatcher(history=TradeLog("trades.bin")) as market:
+            ...
+        trades = TradeLog("trades.bin").memmap()
+    """
+
+    def __init__(self, path, chunk_size=65536):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self._file = None
+        self._dtype = None
+
+    @property
+    def header_path(self):
+        return self.path.with_name(self.path.name + ".json")
+
+    @property
+    def dtype(self):
+        "dtype of the trades (read from the header)"
+        if self._dtype is None:
+            descr = json.loads(self.header_path.read_text())["descr"]
+            self._dtype = np.dtype([tuple(field) for field in descr])
+        return self._dtype
+
+    def open(self, dtype):
+        "Start a new log for trades of dtype (existing is overwritten)"
+        self.close()
+        self._dtype = np.dtype(dtype)
+        self.header_path.write_text(json.dumps({"descr": self._dtype.descr}))
+        self._file = open(self.path, "wb")
+
+    def write(self, trades):
+        "Append trades to the end of the log"
+        self._file.write(np.ascontiguousarray(trades, dtype=self.dtype).tobytes())
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def memmap(self):
+        "All the written trades as read-only memory-map"
+        n_trades = len(self)
+        if not n_trades:
+            return np.empty(shape=(0,), dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode="r", shape=(n_trades,))
+
+    def iter_chunks(self, chunk_size=None):
+        "Iterate the written trades in chunks (structured arrays)"
+        chunk_size = chunk_size or self.chunk_size
+        with open(self.path, "rb") as file:
+            while True:
+                chunk = np.fromfile(file, dtype=self.dtype, count=chunk_size)
+                if not chunk.size:
+                    return
+                yield chunk
+
+    def __len__(self):
+        if not self.path.exists():
+            return 0
+        return self.path.stat().st_size // self.dtype.itemsize
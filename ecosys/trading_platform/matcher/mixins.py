@@ -1,66 +1,137 @@
 
 from abc import ABC, abstractmethod
-#TODO: streamline "_settle_market_orders"
 import numpy as np
 
+def match_quantities(bid_quantity, ask_quantity):
+    """Pair two queues of orders filling them in order
+    (each fill exhausts the head of either or both queues)
+
+    Arguments:
+        bid_quantity {np.ndarray} -- quantities of the bids in priority order
+        ask_quantity {np.ndarray} -- quantities of the asks in priority order
+
+    Returns:
+        Tuple[np.ndarray] -- indexes of the bids, indexes of the asks 
+            and quantities of the fills in the order of occurrence
+    """
+    cum_bid = np.cumsum(bid_quantity, dtype=np.int64)
+    cum_ask = np.cumsum(ask_quantity, dtype=np.int64)
+    if not cum_bid.size or not cum_ask.size:
+        empty = np.empty(shape=(0,), dtype=np.int64)
+        return empty, empty, empty
+
+    # Fills end where either of the cumulative quantities ends
+    total = min(cum_bid[-1], cum_ask[-1])
+    ends = np.union1d(cum_bid, cum_ask)
+    ends = ends[(ends > 0) & (ends <= total)]
+    quantity = np.diff(ends, prepend=0)
+
+    bid_index = np.searchsorted(cum_bid, ends, side="left")
+    ask_index = np.searchsorted(cum_ask, ends, side="left")
+    return bid_index, ask_index, quantity
+
+
 class LimitOrderMixin(ABC):
+    """Matching of limit orders
+
+    Attributes:
+        n_ticks {int} -- number of decimals in prices
+        crossing {str} -- how crossed limit orders are settled:
+            "continuous": matched pair by pair
+            "batch": all the fills computed at once (same trades)
+    """
     n_ticks = 2
+    crossing = "continuous"
+
     def _settle_limit_orders(self):
+        if self.crossing == "batch":
+            self._settle_limit_orders_batch()
+            return
         # 1. Get orders that are in the spread (between ask and bid prices)
         # 2. Fulfill the orders from lowest to highest
+        bids = self.order_book["limit"]["bid"]
+        asks = self.order_book["limit"]["ask"]
 
-
-        def has_limit_orders(state):
-            bids = state.order_book["limit"]["bid"]
-            asks = state.order_book["limit"]["ask"]
-            return bids.size > 0 and asks.size > 0
-
-        while has_limit_orders(state=self) and self._highest_bid_ticks >= self._lowest_ask_ticks:
+        while bids.size > 0 and asks.size > 0 and self._highest_bid_ticks >= self._lowest_ask_ticks:
             # Fulfilling till the spread exists
-
-            highest_bid_order = self.highest_bid_order
-            lowest_ask_order = self.lowest_ask_order
-
             self._clear_orders(
-                bid_order=highest_bid_order, 
-                ask_order=lowest_ask_order, 
+                bid_slot=bids.best(), 
+                ask_slot=asks.best(), 
                 bid_origin="limit", ask_origin="limit"
             )
 
+    def _settle_limit_orders_batch(self):
+        """Settle crossed limit orders at once
+        
+        Both sides are sorted once by priority and the fills
+        are computed from the cumulative quantities. Yields 
+        the same trades as the continuous crossing."""
+        bids = self.order_book["limit"]["bid"]
+        asks = self.order_book["limit"]["ask"]
+        if not bids.size or not asks.size or self._highest_bid_ticks < self._lowest_ask_ticks:
+            return
+
+        # Only orders in the spread can trade
+        # (the orders are sorted thus these are the heads)
+        bid_slots = bids.priority_order()
+        ask_slots = asks.priority_order()
+        n_bids = np.count_nonzero(bids.order(bid_slots)["ticks"] >= self._lowest_ask_ticks)
+        n_asks = np.count_nonzero(asks.order(ask_slots)["ticks"] <= self._highest_bid_ticks)
+        bid_slots = bid_slots[:n_bids]
+        ask_slots = ask_slots[:n_asks]
+        bid_orders = bids.order(bid_slots)
+        ask_orders = asks.order(ask_slots)
+
+        bid_index, ask_index, quantity = match_quantities(
+            bid_orders["quantity"], ask_orders["quantity"]
+        )
+        bid_ticks = bid_orders["ticks"][bid_index].astype(np.int64)
+        ask_ticks = ask_orders["ticks"][ask_index].astype(np.int64)
+
+        # Trading stops when the spread is no more crossed
+        n_fills = np.count_nonzero(bid_ticks >= ask_ticks)
+        bid_index = bid_index[:n_fills]
+        ask_index = ask_index[:n_fills]
+        quantity = quantity[:n_fills]
+        ticks = np.rint((bid_ticks[:n_fills] + ask_ticks[:n_fills]) / 2).astype(np.int64)
+
+        # Set new quantities
+        bid_traded = np.unique(bid_index)
+        ask_traded = np.unique(ask_index)
+        bid_filled = np.bincount(bid_index, weights=quantity)[bid_traded].astype(np.int64)
+        ask_filled = np.bincount(ask_index, weights=quantity)[ask_traded].astype(np.int64)
+        self._fill_orders("limit", "bid", bid_slots[bid_traded], bid_filled)
+        self._fill_orders("limit", "ask", ask_slots[ask_traded], ask_filled)
+
+        self._fulfill_many(
+            bid_orders[bid_index], ask_orders[ask_index],
+            ticks=ticks, quantity=quantity,
+            bid_origin="limit", ask_origin="limit"
+        )
+
     @property
     def highest_bid_order(self):
         "Order with maximum ticks the market is willing to buy"
         bids = self.order_book["limit"]["bid"]
-        return bids[np.argmax(bids["ticks"], axis=0)]
+        slot = bids.best()
+        return bids.order(slot) if slot is not None else None
 
     @property
     def lowest_ask_order(self):
         "Order with minimum ticks the market is willing to sell"
         asks = self.order_book["limit"]["ask"]
-        try:
-            return asks[np.argmin(asks["ticks"], axis=0)]
-        except ValueError:
-            return None
+        slot = asks.best()
+        return asks.order(slot) if slot is not None else None
 
     @property
     def _highest_bid_ticks(self):
         "Maximum price the market is willing to buy in ticks"
-        bids = self.order_book["limit"]["bid"]
-        try:
-            ticks = bids["ticks"].max()
-            return ticks
-        except ValueError:
-            return None
+        return self.order_book["limit"]["bid"].best_ticks()
 
     @property
     def _lowest_ask_ticks(self):
         "Minimum price the market is willing to sell in ticks"
-        asks = self.order_book["limit"]["ask"]
-        try:
-            ticks = asks["ticks"].min()
-            return ticks
-        except ValueError:
-            return None
+        return self.order_book["limit"]["ask"].best_ticks()
 
     @property
     def highest_bid_price(self):
@@ -75,12 +146,18 @@ class LimitOrderMixin(ABC):
         return self._ticks_to_price(ticks)
 
     def _price_to_ticks(self, price):
+        "Turn price (or array of prices) to ticks"
         if price is None:
             return None
-        price = round(price, self.n_ticks)
+        price = np.asarray(price, dtype=np.float64)
+        if not np.isfinite(price).all():
+            raise ValueError("Price of an order must be finite")
         multiplier = 10 ** self.n_ticks
-        ticks = int(price * multiplier)
-        return ticks
+        ticks = np.rint(price * multiplier)
+        if (np.abs(ticks) >= 2 ** 63).any():
+            raise OverflowError("Price out of bounds of int64 ticks")
+        ticks = ticks.astype(np.int64)
+        return int(ticks) if ticks.ndim == 0 else ticks
     
     def _ticks_to_price(self, ticks):
         if ticks is None:
@@ -94,102 +171,327 @@ class MarketOrderMixin(ABC):
 
     def _settle_market_orders(self):
         """Settle market orders with limit orders
-        1. Fetch bid market orders (if any)
-        2. Match it with limit order
-            - If None found, match with market order
-                - Price is the last price
-                    - If no last price, continue
-            - If None market orders found, continue
+        1. Sweep bid market orders through the ask limit orders
+            - Fills of all the orders are computed at once
+            - Price is the price of the limit order
+        2. If the limit orders ran out, match the rest with 
+           ask market orders
+            - Price is the last price
+                - If no last price, continue
         3. Repeat with Asks
-
         """
-        # TODO: Streamline
-
-        market_as_bid = ("bid", "oldest_bid_market_order", "ask", "lowest_ask_order")
-        market_as_ask = ("ask", "oldest_ask_market_order", "bid", "highest_bid_order")
-        for market_position, market_attr, counter_position, counter_attr in (market_as_bid, market_as_ask):
-
-            while self.order_book["market"][market_position].size > 0:
-                # There are market bids
-
-                market_order = getattr(self, market_attr)
-                if self.order_book["limit"][counter_position].size > 0:
-                    # Limit order exists
-                    counter_order = getattr(self, counter_attr)
-                    counter_origin = "limit"
-                elif self.order_book["market"][counter_position].size > 0:
-                    # No limit orders
-                    # --> take market
-                    counter_order = getattr(self, f'oldest_{counter_position}_market_order')
-                    counter_origin = "market"
-                else:
-                    # No limit & market orders
-                    # --> end
-                    break
-                
-                bid_order = market_order if market_position == "bid" else counter_order
-                ask_order = market_order if market_position == "ask" else counter_order
-                bid_origin = "market" if market_position == "bid" else counter_origin
-                ask_origin = "market" if market_position == "ask" else counter_origin
-
-                if bid_origin == ask_origin == "market" and self.last_price is None:
-                    # Cannot clear orders,
-                    # need a price level
-                    return 
-                self._clear_orders(
-                    bid_order=bid_order, 
-                    ask_order=ask_order, 
-                    bid_origin=bid_origin, ask_origin=ask_origin
-                )
+        for market_position, counter_position in (("bid", "ask"), ("ask", "bid")):
+            self._sweep_market_orders(market_position, counter_position, "limit")
+            if self._last_trade_ticks is not None:
+                # Only if no limit orders left
+                self._sweep_market_orders(market_position, counter_position, "market")
+
+    def _sweep_market_orders(self, market_position, counter_position, counter_origin):
+        """Fill the market orders of a side with the counter orders 
+        (of counter_origin) in priority order. Only the counter orders
+        needed are sorted and the books are filled once."""
+        market_book = self.order_book["market"][market_position]
+        counter_book = self.order_book[counter_origin][counter_position]
+        if not market_book.size or not counter_book.size:
+            return
+
+        market_slots = market_book.priority_order()
+        market_orders = market_book.order(market_slots)
+        counter_slots = self._sweep_slots(counter_book, market_orders["quantity"].sum(dtype=np.int64))
+        counter_orders = counter_book.order(counter_slots)
+
+        market_index, counter_index, quantity = match_quantities(
+            market_orders["quantity"], counter_orders["quantity"]
+        )
+        if counter_book.priced:
+            ticks = counter_orders["ticks"][counter_index].astype(np.int64)
+        else:
+            ticks = np.full(len(quantity), self._last_trade_ticks, dtype=np.int64)
+
+        # Set new quantities
+        for book_type, position, slots, index in (
+            ("market", market_position, market_slots, market_index), 
+            (counter_origin, counter_position, counter_slots, counter_index),
+        ):
+            traded = np.unique(index)
+            filled = np.bincount(index, weights=quantity)[traded].astype(np.int64)
+            self._fill_orders(book_type, position, slots[traded], filled)
+
+        fills = {
+            market_position: (market_orders[market_index], "market"), 
+            counter_position: (counter_orders[counter_index], counter_origin),
+        }
+        self._fulfill_many(
+            fills["bid"][0], fills["ask"][0],
+            ticks=ticks, quantity=quantity,
+            bid_origin=fills["bid"][1], ask_origin=fills["ask"][1]
+        )
+
+    @staticmethod
+    def _sweep_slots(book, quantity):
+        "Slots of the first orders (in priority) that cover quantity"
+        if book.priced:
+            # Price levels needed (from the aggregates)
+            ticks, totals = book.depth()
+            n_levels = np.searchsorted(np.cumsum(totals), quantity) + 1
+            worst_ticks = ticks[min(n_levels, len(ticks)) - 1]
+            slots = book.priority_order(book.better_than(worst_ticks, inclusive=True))
+        else:
+            slots = book.priority_order()
+        n_orders = np.searchsorted(np.cumsum(book.order(slots)["quantity"], dtype=np.int64), quantity) + 1
+        return slots[:n_orders]
 
     @property
     def oldest_bid_market_order(self):
         market_bids = self.order_book["market"]["bid"]
-        return market_bids[0]
+        return market_bids.order(market_bids.best())
 
     @property
     def oldest_ask_market_order(self):
         market_asks = self.order_book["market"]["ask"]
-        return market_asks[0]
+        return market_asks.order(market_asks.best())
 
 
 class StopOrderMixin(ABC):
 
-    def _trigger_stop_orders(self):
+    def _trigger_stop_orders(self, ticks=None):
         """Activate stop orders that are triggered
-        --> Turn these stop orders to market orders"""
-        stop_bids = self.order_book["stop"]["bid"]
-        stop_asks = self.order_book["stop"]["ask"]
-
-        if self._last_trade_ticks is None:
-            # Cannot trigger any stop orders,
-            # no price level
+        --> Turn these stop orders to market orders
+
+        A bid stop is triggered by a trade below its price and
+        an ask stop by a trade above its price. The stops queue
+        in the order they were triggered (as if the trades were
+        made one by one): by the trade that triggered them, bids
+        before asks and then by their seq. The stop books are
+        sorted by the trigger price thus only the triggered stops
+        are visited.
+
+        Keyword Arguments:
+            ticks {int, np.ndarray} -- prices of the trades since the
+                previous triggering in the order of the trades
+                (default: {None}, last price)
+        """
+        if ticks is None:
+            if self._last_trade_ticks is None:
+                # Cannot trigger any stop orders,
+                # no price level
+                return
+            ticks = self._last_trade_ticks
+        ticks = np.atleast_1d(np.asarray(ticks, dtype=np.int64))
+
+        triggered = []
+        for position in ("bid", "ask"):
+            stops = self.order_book["stop"][position]
+            best_ticks = stops.best_ticks()
+            extreme = ticks.min() if position == "bid" else ticks.max()
+            if best_ticks is None or (best_ticks <= extreme if position == "bid" else best_ticks >= extreme):
+                continue
+            slots = stops.better_than(extreme)
+            orders = stops.order(slots)
+
+            # Index of the trade that triggers each stop (the first
+            # trade whose running low/high passes the stop)
+            if position == "bid":
+                trade = np.searchsorted(-np.minimum.accumulate(ticks), -orders["ticks"].astype(np.int64), side="right")
+            else:
+                trade = np.searchsorted(np.maximum.accumulate(ticks), orders["ticks"].astype(np.int64), side="right")
+            triggered.append((position, slots, orders, trade))
+        if not triggered:
             return
 
-        mask_bids = stop_bids["ticks"] > self._last_trade_ticks
-        mask_asks = stop_asks["ticks"] < self._last_trade_ticks
+        # Seqs in the order of triggering
+        seq, side, trade = (np.concatenate(values) for values in zip(*[
+            (orders["seq"], np.full(len(slots), side), trade) 
+            for side, (_, slots, orders, trade) in enumerate(triggered)
+        ]))
+        rank = np.empty(len(trade), dtype=np.int64)
+        rank[np.lexsort((seq, side, trade))] = np.arange(len(trade))
+        seqs = self._new_seqs(len(trade))[rank]
 
-        actived_stop_bids = stop_bids[mask_bids]
-        actived_stop_asks = stop_asks[mask_asks]
-
-        # Set as market orders and remove from stop
         fields_market_order = list(self._dtype_mapping["market"]["names"])
-        if actived_stop_bids.size > 0:
-            # Correct columns (remove price)
-            actived_stop_bids = actived_stop_bids[fields_market_order]
-            
-            # Dump to market orders
-            self.order_book["market"]["bid"] = np.append(self.order_book["market"]["bid"], actived_stop_bids.copy())
-            
-            # Remove from stop orders
-            self.order_book["stop"]["bid"] = np.delete(stop_bids, np.where(mask_bids), axis=0)
-
-        if actived_stop_asks.size > 0:
-            # Correct columns (remove price)
-            actived_stop_asks = actived_stop_asks[fields_market_order]
-            
-            # Dump to market orders
-            self.order_book["market"]["ask"] = np.append(self.order_book["market"]["ask"], actived_stop_asks.copy())
-            
-            # Remove from stop orders
-            self.order_book["stop"]["ask"] = np.delete(stop_asks, np.where(mask_asks), axis=0)
+        start = 0
+        for position, slots, orders, _ in triggered:
+            # Set as market orders (remove price) and remove from stop.
+            # The market orders queue from the moment of triggering
+            actived_stops = orders[fields_market_order]
+            actived_stops["seq"] = seqs[start:start + len(slots)]
+            start += len(slots)
+
+            self.order_book["market"][position].append(actived_stops[np.argsort(actived_stops["seq"])])
+            self.order_book["stop"][position].remove(slots)
+
+
+def allocate_time(quantity, volume):
+    """Allocate volume to orders in priority order (price-time)
+
+    Arguments:
+        quantity {np.ndarray} -- quantities of the orders in priority order
+        volume {int} -- volume to allocate
+
+    Returns:
+        np.ndarray -- allocated quantities
+    """
+    quantity = np.asarray(quantity, dtype=np.int64)
+    before = np.cumsum(quantity) - quantity
+    return np.clip(volume - before, 0, quantity)
+
+
+def allocate_pro_rata(quantity, level, volume):
+    """Allocate volume to price levels in priority order and
+    the marginal level in proportion to the quantities
+    (leftover lots are given one by one in time priority)
+
+    Arguments:
+        quantity {np.ndarray} -- quantities of the orders in priority order
+        level {np.ndarray} -- non-decreasing price level number of the orders
+        volume {int} -- volume to allocate
+
+    Returns:
+        np.ndarray -- allocated quantities
+    """
+    quantity = np.asarray(quantity, dtype=np.int64)
+    level_total = np.bincount(level, weights=quantity).astype(np.int64)
+    cum_level = np.cumsum(level_total)
+
+    marginal = np.searchsorted(cum_level, volume, side="left")
+    fills = np.where(level < marginal, quantity, 0)
+    if marginal < len(level_total):
+        remaining = volume - (cum_level[marginal] - level_total[marginal])
+        in_level = level == marginal
+        share = quantity[in_level] * remaining // level_total[marginal]
+        leftover = remaining - share.sum()
+        share[:leftover] += 1
+        fills[in_level] = share
+    return fills
+
+
+class AuctionMixin(ABC):
+    """Call auction clearing
+
+    All crossed orders (limit and market) trade at a single price:
+    the price that maximizes the executed volume. Ties are broken
+    by the smallest imbalance of supply and demand, then by the 
+    closeness to the last trade price and last by taking the 
+    lower middle of the remaining candidates.
+
+    Attributes:
+        clearing {str} -- "continuous" or "auction" clearing
+        allocation {str} -- how the fills are allocated in the auction:
+            "time": price-time priority
+            "pro-rata": price priority, the marginal price level 
+                is allocated in proportion to the quantities
+    """
+    clearing = "continuous"
+    allocation = "time"
+
+    def _auction_ticks(self):
+        """Clearing price (in ticks) and executed volume of the auction
+        (None, 0) if nothing would trade"""
+        bids = self.order_book["limit"]["bid"]
+        asks = self.order_book["limit"]["ask"]
+        market_demand = int(self.order_book["market"]["bid"]["quantity"].sum())
+        market_supply = int(self.order_book["market"]["ask"]["quantity"].sum())
+
+        bid_ticks = bids["ticks"].astype(np.int64)
+        ask_ticks = asks["ticks"].astype(np.int64)
+        candidates = np.union1d(bid_ticks, ask_ticks)
+        if not candidates.size:
+            return None, 0
+
+        # Demand at a candidate: bids with ticks >= candidate
+        order = np.argsort(bid_ticks, kind="stable")
+        cum_bid = np.concatenate([[0], np.cumsum(bids["quantity"][order], dtype=np.int64)])
+        n_below = np.searchsorted(bid_ticks[order], candidates, side="left")
+        demand = market_demand + cum_bid[-1] - cum_bid[n_below]
+
+        # Supply at a candidate: asks with ticks <= candidate
+        order = np.argsort(ask_ticks, kind="stable")
+        cum_ask = np.concatenate([[0], np.cumsum(asks["quantity"][order], dtype=np.int64)])
+        n_at_or_below = np.searchsorted(ask_ticks[order], candidates, side="right")
+        supply = market_supply + cum_ask[n_at_or_below]
+
+        volume = np.minimum(demand, supply)
+        max_volume = int(volume.max())
+        if not max_volume:
+            return None, 0
+
+        best = volume == max_volume
+        imbalance = np.abs(demand - supply)
+        best &= imbalance == imbalance[best].min()
+        if self._last_trade_ticks is not None:
+            distance = np.abs(candidates - self._last_trade_ticks)
+            best &= distance == distance[best].min()
+        candidates = candidates[best]
+        return int(candidates[(len(candidates) - 1) // 2]), max_volume
+
+    @property
+    def auction_price(self):
+        "Price the call auction would clear at (None if nothing would trade)"
+        ticks, _ = self._auction_ticks()
+        return self._ticks_to_price(ticks)
+
+    def _allocate_auction(self, position, ticks, volume):
+        """Allocate the volume of the auction to the orders of a side
+
+        Returns:
+            Dict[str, Tuple[np.ndarray]] -- slots, orders and fills per
+                order type (market first as it has the priority)
+        """
+        market = self.order_book["market"][position]
+        limit = self.order_book["limit"][position]
+
+        market_slots = market.priority_order()
+        limit_slots = limit.priority_order()
+        limit_ticks = limit.order(limit_slots)["ticks"]
+        eligible = limit_ticks >= ticks if position == "bid" else limit_ticks <= ticks
+        limit_slots = limit_slots[eligible]
+
+        market_orders = market.order(market_slots)
+        limit_orders = limit.order(limit_slots)
+        quantity = np.concatenate([market_orders["quantity"], limit_orders["quantity"]])
+
+        if self.allocation == "pro-rata":
+            # Market orders form the best level
+            limit_ticks = limit_orders["ticks"].astype(np.int64)
+            limit_level = 1 + np.cumsum(np.diff(limit_ticks, prepend=limit_ticks[:1]) != 0)
+            level = np.concatenate([np.zeros(len(market_orders), dtype=np.int64), limit_level])
+            fills = allocate_pro_rata(quantity, level, volume)
+        else:
+            fills = allocate_time(quantity, volume)
+
+        n_market = len(market_orders)
+        return {
+            "market": (market_slots, market_orders, fills[:n_market]),
+            "limit": (limit_slots, limit_orders, fills[n_market:]),
+        }
+
+    def _settle_auction(self):
+        "Clear the crossed orders in a call auction"
+        ticks, volume = self._auction_ticks()
+        if ticks is None:
+            return
+
+        # Orders with fills in priority order (market first)
+        sides = {}
+        for position in ("bid", "ask"):
+            allocation = self._allocate_auction(position, ticks, volume)
+            origins, ids, parties, fills = [], [], [], []
+            for origin, (slots, orders, origin_fills) in allocation.items():
+                filled = origin_fills > 0
+                self._fill_orders(origin, position, slots[filled], origin_fills[filled])
+                origins.append(np.full(np.count_nonzero(filled), self._order_types.index(origin)))
+                ids.append(orders["id"][filled])
+                parties.append(orders["party"][filled])
+                fills.append(origin_fills[filled])
+            sides[position] = tuple(np.concatenate(values) for values in (origins, ids, parties, fills))
+
+        bid_origins, bid_ids, bid_parties, bid_fills = sides["bid"]
+        ask_origins, ask_ids, ask_parties, ask_fills = sides["ask"]
+        bid_index, ask_index, quantity = match_quantities(bid_fills, ask_fills)
+
+        self._fulfill_many(
+            {"id": bid_ids[bid_index], "party": bid_parties[bid_index]}, 
+            {"id": ask_ids[ask_index], "party": ask_parties[ask_index]},
+            ticks=np.full(len(quantity), ticks), quantity=quantity,
+            bid_origin=bid_origins[bid_index], ask_origin=ask_origins[ask_index]
+        )
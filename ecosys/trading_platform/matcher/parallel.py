@@ -0,0 +1,315 @@
+"""
+Parallel clearing of many assets
+
+The symbols are partitioned to worker processes, each holding an
+Exchange of its symbols. Orders and trades move between the processes
+through shared-memory structured arrays (a buffer per worker and
+direction); only short commands and counts go through the pipes.
+Flows larger than the buffers are passed in chunks.
+"""
+
+import multiprocessing as mp
+import os
+
+import numpy as np
+
+from .events import POSITIONS
+from .exchange import Exchange
+from .history import trade_dtype
+from .parties import PartyRegistry
+from .stockmarket import StockMatcher
+
+
+def _shared_array(dtype, capacity):
+    "Structured array in shared memory (buffer, view)"
+    buffer = mp.RawArray("b", np.dtype(dtype).itemsize * capacity)
+    return buffer, np.frombuffer(buffer, dtype=dtype)
+
+
+def _work(conn, symbols, indexes, matcher, kwargs, order_types, symbol_format,
+          order_buffer, order_dtype, fill_buffer, fill_dtype):
+    "Loop of a worker process (serves commands from conn)"
+    exchange = Exchange(symbols, matcher=matcher, **kwargs)
+    orders = np.frombuffer(order_buffer, dtype=order_dtype)
+    fills = np.frombuffer(fill_buffer, dtype=fill_dtype)
+    names = dict(zip(indexes, symbols))
+    order_types = np.array(order_types)
+    positions = np.array(POSITIONS)
+
+    pending = []
+    def collect(trades, index):
+        rows = np.empty(len(trades), dtype=fill_dtype)
+        rows["symbol"] = index
+        for name in trades.dtype.names:
+            rows[name] = trades[name]
+        pending.append(rows)
+    for symbol, index in zip(symbols, indexes):
+        exchange[symbol].subscribe("trade", lambda trades, index=index: collect(trades, index), batched=True)
+    outgoing = np.empty(0, dtype=fill_dtype)
+
+    while True:
+        command, *args = conn.recv()
+        try:
+            if command == "place":
+                n_orders, new_parties = args
+                if new_parties:
+                    # Same ids as in the registry of the parent
+                    exchange.parties.intern(new_parties)
+                chunk = orders[:n_orders]
+                chunk["id"] = exchange.place_orders(
+                    symbol=[names[index] for index in chunk["symbol"].tolist()],
+                    side=positions[chunk["side"]], type=order_types[chunk["type"]],
+                    party=chunk["party"], price=chunk["price"], quantity=chunk["quantity"],
+                )
+                conn.send(len(chunk))
+            elif command == "clear":
+                exchange.clear()
+                outgoing = np.concatenate([outgoing] + pending)
+                pending.clear()
+                conn.send(len(outgoing))
+            elif command == "fetch":
+                n_fills = min(len(outgoing), len(fills))
+                fills[:n_fills] = outgoing[:n_fills]
+                outgoing = outgoing[n_fills:]
+                conn.send(n_fills)
+            elif command == "stats":
+                conn.send(exchange.stats(symbol_format=symbol_format))
+            elif command == "close":
+                break
+        except Exception as exc:
+            conn.send(exc)
+
+    # Stopped even if closing the trade logs fails
+    try:
+        exchange.close()
+        conn.send(None)
+    except Exception as exc:
+        conn.send(exc)
+
+
+class ParallelExchange:
+    """Exchange of many assets cleared in parallel processes
+
+    The symbols are distributed to the workers round-robin.
+    The matchers live in the workers thus they are accessed
+    only through the methods of this class. The parties are 
+    interned here (self.parties) and passed to the workers as ids.
+
+    Keyword Arguments:
+        symbols {Iterable[str]} -- symbols to list (default: {()})
+        n_workers {int} -- number of processes (default: {None},
+            number of CPUs but at most the number of symbols)
+        capacity {int} -- number of orders and trades per worker that
+            fit to the shared buffers at once (default: {65536})
+        matcher {type} -- class of the matchers (default: {StockMatcher})
+        start_method {str} -- see multiprocessing.get_context (default: {None})
+        **kwargs -- passed to the matchers (backend, crossing etc.)
+
+    Example:
+        with ParallelExchange(symbols, n_workers=4) as exchange:
+            exchange.place_orders(symbol=..., side=..., price=..., quantity=..., party=...)
+            trades = exchange.clear()
+    """
+
+    def __init__(self, symbols=(), n_workers=None, capacity=65536,
+                 matcher=StockMatcher, start_method=None, **kwargs):
+        self.symbols = list(symbols)
+        self.capacity = capacity
+        self.parties = PartyRegistry()
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        # Dtypes of the orders as configured by kwargs
+        # (the prototype checks the orders before sending)
+        self._prototype = matcher(**kwargs)
+        dtype_mapping = self._prototype._dtype_mapping
+        self._order_types = list(dtype_mapping)
+
+        n_workers = n_workers or os.cpu_count() or 1
+        n_workers = max(min(n_workers, len(self.symbols)), 1)
+        # Worker of each symbol
+        self._owner = np.arange(len(self.symbols)) % n_workers
+
+        party_format = np.dtype(dtype_mapping[self._order_types[0]])["party"]
+        self.order_dtype = np.dtype([
+            ("symbol", np.uint32),
+            ("side", np.uint8),
+            ("type", np.uint8),
+            ("party", party_format),
+            ("price", np.float64),
+            ("quantity", np.int64),
+            ("id", np.uint64),
+        ])
+        self.fill_dtype = np.dtype([("symbol", np.uint32)] + trade_dtype(party_format).descr)
+
+        # Same for all the workers thus their stats concatenate
+        symbol_format = Exchange._symbol_format(self.symbols)
+
+        context = mp.get_context(start_method)
+        self._conns, self._processes, self._orders, self._fills = [], [], [], []
+        for worker in range(n_workers):
+            indexes = np.flatnonzero(self._owner == worker).tolist()
+            order_buffer, orders = _shared_array(self.order_dtype, capacity)
+            fill_buffer, fills = _shared_array(self.fill_dtype, capacity)
+            conn, worker_conn = context.Pipe()
+            process = context.Process(
+                target=_work, daemon=True,
+                args=(worker_conn, [self.symbols[i] for i in indexes], indexes,
+                      matcher, kwargs, self._order_types, symbol_format,
+                      order_buffer, self.order_dtype, fill_buffer, self.fill_dtype),
+            )
+            process.start()
+            self._conns.append(conn)
+            self._processes.append(process)
+            self._orders.append(orders)
+            self._fills.append(fills)
+        # Parties already registered in each worker
+        self._n_synced = [0] * n_workers
+
+    @property
+    def n_workers(self):
+        return len(self._processes)
+
+    def _new_parties(self, worker):
+        "Names of the parties registered since the previous orders to the worker"
+        start = self._n_synced[worker]
+        self._n_synced[worker] = len(self.parties)
+        return self.parties.names(np.arange(start, len(self.parties))).tolist()
+
+    def _recv_all(self, workers):
+        """Replies of the workers (in the order of workers)
+
+        All the replies are read before raising the first 
+        exception thus the pipes stay in sync."""
+        replies = [self._conns[worker].recv() for worker in workers]
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+        return replies
+
+    def _check_bounds(self, rows, quantity):
+        """Raise OverflowError or ValueError if some of the orders 
+        do not fit to the matchers (quantity as given, before the 
+        cast to the rows)"""
+        for code, order_type in enumerate(self._order_types):
+            dtype = self._prototype._dtype_mapping[order_type]
+            mask = rows["type"] == code
+            orders = rows[mask]
+            if not len(orders):
+                continue
+            params = {"quantity": quantity[mask]}
+            if "ticks" in dtype["names"]:
+                params["ticks"] = self._prototype._price_to_ticks(orders["price"])
+            self._prototype._check_bounds(dtype, params)
+
+    def _codes(self, values, options, name):
+        "Indexes of values in options (ValueError if some are not)"
+        uniques, inverse = np.unique(values, return_inverse=True)
+        unknown = [value for value in uniques.tolist() if value not in options]
+        if unknown:
+            raise ValueError(f"Unknown {name} {unknown[0]!r}. Options: {list(options)}")
+        return np.array([options.index(value) for value in uniques.tolist()], dtype=np.int64)[inverse]
+
+    def place_orders(self, orders=None, **columns):
+        """Place orders of many symbols (see Exchange.place_orders)
+
+        Returns:
+            np.ndarray -- ids of the orders (unique per symbol)
+        """
+        if orders is not None:
+            columns = {**{column: orders[column] for column in orders}, **columns}
+        columns = {column: np.asarray(values) for column, values in columns.items()}
+        n_orders = max(values.size for values in columns.values())
+
+        rows = np.zeros(n_orders, dtype=self.order_dtype)
+        rows["symbol"] = self._codes(np.broadcast_to(columns["symbol"], (n_orders,)), self.symbols, "symbol")
+        rows["side"] = self._codes(np.broadcast_to(columns["side"], (n_orders,)), list(POSITIONS), "side")
+        rows["type"] = self._codes(np.broadcast_to(columns.get("type", "limit"), (n_orders,)), self._order_types, "order type")
+        party = columns["party"]
+        rows["party"] = self.parties.intern(party) if self.order_dtype["party"].kind in "iu" else party
+        rows["price"] = columns.get("price", np.nan)
+        quantity = np.broadcast_to(columns["quantity"], (n_orders,))
+        # All the orders are checked before placing any
+        self._check_bounds(rows, quantity)
+        rows["quantity"] = quantity
+
+        # Orders of each worker in the given order
+        owners = self._owner[rows["symbol"]]
+        positions = [np.flatnonzero(owners == worker) for worker in range(self.n_workers)]
+        ids = np.empty(n_orders, dtype=np.uint64)
+        start = 0
+        while any(start < len(worker_positions) for worker_positions in positions):
+            sent = []
+            for worker, worker_positions in enumerate(positions):
+                chunk = worker_positions[start:start + self.capacity]
+                if len(chunk):
+                    self._orders[worker][:len(chunk)] = rows[chunk]
+                    self._conns[worker].send(("place", len(chunk), self._new_parties(worker)))
+                    sent.append((worker, chunk))
+            self._recv_all([worker for worker, _ in sent])
+            for worker, chunk in sent:
+                ids[chunk] = self._orders[worker]["id"][:len(chunk)]
+            start += self.capacity
+        return ids
+
+    def place_bid(self, symbol, **params):
+        "Place a bid order (see StockMatcher.place_bid)"
+        return int(self.place_orders(symbol=symbol, side="bid", **params)[0])
+
+    def place_ask(self, symbol, **params):
+        "Place an ask order (see StockMatcher.place_ask)"
+        return int(self.place_orders(symbol=symbol, side="ask", **params)[0])
+
+    def clear(self):
+        """Clear the changed books in all the workers at once
+
+        Returns:
+            np.ndarray -- trades of the clearing (see history.trade_dtype)
+                with the index of the symbol (field symbol, see self.symbols)
+                in the order of the symbols
+        """
+        for conn in self._conns:
+            conn.send(("clear",))
+        remaining = self._recv_all(range(self.n_workers))
+
+        trades = []
+        while any(remaining):
+            fetching = [worker for worker, n_fills in enumerate(remaining) if n_fills]
+            for worker in fetching:
+                self._conns[worker].send(("fetch",))
+            for worker, n_fills in zip(fetching, self._recv_all(fetching)):
+                trades.append(self._fills[worker][:n_fills].copy())
+                remaining[worker] -= n_fills
+        if not trades:
+            return np.empty(0, dtype=self.fill_dtype)
+        trades = np.concatenate(trades)
+        return trades[np.argsort(trades["symbol"], kind="stable")]
+
+    def stats(self):
+        "Statistics of the symbols (see Exchange.stats)"
+        for conn in self._conns:
+            conn.send(("stats",))
+        stats = np.concatenate(self._recv_all(range(self.n_workers)))
+        return stats[np.argsort([self._index[symbol] for symbol in stats["symbol"].tolist()])]
+
+    def close(self):
+        "Close the trade logs and stop the workers"
+        replies = []
+        for conn, process in zip(self._conns, self._processes):
+            if process.is_alive():
+                conn.send(("close",))
+                replies.append(conn.recv())
+            process.join()
+            conn.close()
+        self._processes = []
+        self._conns = []
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"ParallelExchange(symbols={len(self.symbols)}, n_workers={self.n_workers})"
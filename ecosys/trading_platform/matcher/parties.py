@@ -0,0 +1,96 @@
+"""
+Party registry
+
+Parties are stored in the books and in the trades as integer ids
+(uint32) instead of strings. The registry interns the names to
+the ids and looks the names back up on demand.
+"""
+
+import numpy as np
+
+
+class PartyRegistry:
+    """Names of the parties by id
+
+    Ids are given in the order the names are first seen.
+    Integers are taken as already interned ids (passed through,
+    ValueError if not registered).
+
+    Example:
+        parties = PartyRegistry()
+        parties.intern(["Alice", "Bob", "Alice"]) # array([0, 1, 0])
+        parties.names([1, 0]) # array(['Bob', 'Alice'])
+    """
+
+    dtype = np.dtype(np.uint32)
+
+    def __init__(self):
+        self._ids = {}
+        self._names = []
+        # Names as array for vectorized lookups (built on demand)
+        self._lookup = np.empty(0, dtype=object)
+
+    def intern(self, names):
+        """Ids of the names (registered if new)
+
+        Arguments:
+            names {str, Iterable[str]} -- name(s) of the parties
+
+        Returns:
+            int, np.ndarray -- id(s) of the parties
+        """
+        names = np.asarray(names)
+        if names.dtype.kind in "iu":
+            if names.size and (names.min() < 0 or names.max() >= len(self)):
+                raise ValueError(f"Unknown party ids (registered: 0 to {len(self) - 1})")
+            return names.astype(self.dtype) if names.ndim else int(names)
+        if names.ndim == 0:
+            return self._intern_one(names.item())
+        # Only the distinct names go through the dict
+        # (in the order of appearance)
+        uniques, first, inverse = np.unique(names, return_index=True, return_inverse=True)
+        uniques = uniques.tolist()
+        ids = np.empty(len(uniques), dtype=self.dtype)
+        for i in np.argsort(first).tolist():
+            ids[i] = self._intern_one(uniques[i])
+        return ids[inverse.reshape(names.shape)]
+
+    def _intern_one(self, name):
+        party_id = self._ids.get(name)
+        if party_id is None:
+            if len(self._names) > np.iinfo(self.dtype).max:
+                raise OverflowError(f"Too many parties for {self.dtype}")
+            party_id = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return party_id
+
+    def get(self, name):
+        "Id of the name (None if not registered)"
+        return self._ids.get(name)
+
+    def names(self, ids):
+        """Names of the ids
+
+        Arguments:
+            ids {int, np.ndarray} -- id(s) of the parties
+
+        Returns:
+            str, np.ndarray -- name(s) of the parties (object array)
+        """
+        if len(self._lookup) != len(self._names):
+            self._lookup = np.empty(len(self._names), dtype=object)
+            self._lookup[:] = self._names
+        ids = np.asarray(ids)
+        return self._lookup[ids] if ids.ndim else self._names[int(ids)]
+
+    def __getitem__(self, party_id):
+        return self._names[party_id]
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def __len__(self):
+        return len(self._names)
+
+    def __repr__(self):
+        return f"PartyRegistry(size={len(self)})"
@@ -0,0 +1,124 @@
+"""
+Plots of the matchers
+
+Imported on demand thus using the matchers does not require
+matplotlib or seaborn.
+"""
+
+import numpy as np
+import pandas as pd
+
+import matplotlib.pyplot as plt
+import matplotlib.ticker as ticker
+import seaborn as sns
+
+
+def plot_orders(market, fig=None):
+    """Plot cumulative histogram of the orders
+
+    Keyword Arguments:
+        fig {[type]} -- [description] (default: {None})
+
+    Returns:
+        [type] -- [description]
+    """
+    # x: price
+    # y: quantity (cumulative)
+    n_bins =50
+    bids = market.order_book["limit"]["bid"]
+    asks = market.order_book["limit"]["ask"]
+    trade_prices = market._ticks_to_price(market.trades["ticks"])
+
+
+    ask_kwds = dict(histtype='step', density=False, cumulative=1, weights=asks["quantity"])
+    bid_kwds = dict(histtype='step', density=False, cumulative=-1, weights=bids["quantity"])
+
+    fig, (ax_box, ax_hist) = plt.subplots(2, sharex=True, gridspec_kw={"height_ratios": (.15, .85)})
+
+    sns.distplot(market._ticks_to_price(asks["ticks"]), n_bins, rug=True, rug_kws={"height":0.05}, hist_kws=ask_kwds, kde=False, norm_hist=False, ax=ax_hist, color="r", label="Asks")
+    sns.distplot(market._ticks_to_price(bids["ticks"]), n_bins, rug=True, rug_kws={"height":0.05}, hist_kws=bid_kwds, kde=False, norm_hist=False, ax=ax_hist, color="g", label="Bids")
+    ax_hist.axvline(market.last_price, 0, 0.25, color="k", linestyle="--", label="Last price")
+
+    sns.boxplot(trade_prices, ax=ax_box)
+    ax_box.set(yticks=[])
+
+    sns.despine(ax=ax_box, left=True)
+    sns.despine(ax=ax_hist)
+    ax_hist.legend()
+    return fig
+
+
+def plot_order_animate(market):
+    """Plot animated orders in cumulative histogram
+
+    Inspiration: https://en.wikipedia.org/wiki/Order_book_(trading)#/media/File:Order_book_depth_chart.gif
+    """
+    plt.ion()
+    n_bins =50
+    bids = market.order_book["limit"]["bid"]
+    asks = market.order_book["limit"]["ask"]
+
+    if hasattr(market, "_plot_state"):
+        # To optimize time spent on graphing
+        hist_ask, hist_bid, fig, ax = market._plot_state
+        ax.cla()
+
+        hist_ask = ax.hist(market._ticks_to_price(asks["ticks"]), weights=asks["quantity"], cumulative=True, label='Ask cumulative')
+        hist_bid = ax.hist(market._ticks_to_price(bids["ticks"]), weights=bids["quantity"], cumulative=-1, label='Bid cumulative')
+        fig.canvas.draw()
+        fig.canvas.flush_events()
+    else:
+
+        fig, ax = plt.subplots(figsize=(8, 4))
+        hist_ask = ax.hist(market._ticks_to_price(asks["ticks"]), weights=asks["quantity"], cumulative=True, label='Ask cumulative')
+        hist_bid = ax.hist(market._ticks_to_price(bids["ticks"]), weights=bids["quantity"], cumulative=-1, label='Bid cumulative')
+    market._plot_state = (hist_ask, hist_bid, fig, ax)
+
+
+def plot_order_book(market, tick_frequency=5):
+    """Plot the orders in barh plot
+    x axis: sum of quantity of orders per price (negative indicate asks)
+    y axis: price (integers of cents under the hood)
+
+    Keyword Arguments:
+        tick_frequency {int} -- Tick label frequency (default: {5})
+    """
+    bid_ticks, bid_quantity = market.order_book["limit"]["bid"].depth()
+    ask_ticks, ask_quantity = market.order_book["limit"]["ask"].depth()
+
+    price_ticks = np.concatenate([bid_ticks, ask_ticks])
+    quantity = np.concatenate([bid_quantity, -ask_quantity])
+
+    lowest_ticks = price_ticks.min()
+    ser_plot = pd.Series(
+        np.bincount(price_ticks - lowest_ticks, weights=quantity).astype("int"),
+        index=np.arange(lowest_ticks, price_ticks.max() + 1)
+    )
+
+    colors = ser_plot.apply(lambda row: "orangered" if row <0 else "green")
+
+    ax = plt.axes()
+    plt.barh(ser_plot.index, ser_plot.values, align="center", height=1, 
+            color=colors,
+            edgecolor="k"
+            )
+    ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda x, pos: f"{x/100:.2f}"))
+    ax.yaxis.set_major_locator(ticker.MultipleLocator(tick_frequency))
+
+    ax.axvline(0, color="k")
+    if market.last_price:
+        ax.axhline(market.last_price*100, color="b", linestyle='--', label="Last Price")
+
+    prop = dict(boxstyle='round', facecolor='lightgrey', alpha=0.5)
+    ax.text(0.05, 0.95, "Asks", fontsize=14,
+            horizontalalignment='left', transform = ax.transAxes,
+            verticalalignment='top', color="orangered",
+            bbox=prop)
+    ax.text(0.95, 0.05, "Bids", fontsize=14,
+            horizontalalignment='right', transform = ax.transAxes,
+            verticalalignment='bottom', color="green",
+            bbox=prop)
+
+    plt.title(f"Order book: {market.asset}" if market.asset else "Order book")
+    plt.ylabel("Price")
+    plt.xlabel("Quantity")
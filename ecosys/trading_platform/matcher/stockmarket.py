@@ -5,24 +5,69 @@ Master class for stock order matcher
 """
 
 import numpy as np
-import pandas as pd
-
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-import seaborn as sns
 
 from .base import MarketMatcher
-from .mixins import LimitOrderMixin, MarketOrderMixin, StopOrderMixin
-
-
-class StockMatcher(MarketMatcher, LimitOrderMixin, MarketOrderMixin, StopOrderMixin):
+from .mixins import LimitOrderMixin, MarketOrderMixin, StopOrderMixin, AuctionMixin
+
+
+class StockMatcher(MarketMatcher, LimitOrderMixin, MarketOrderMixin, StopOrderMixin, AuctionMixin):
+    """Order matcher for a stock
+
+    Keyword Arguments:
+        asset {str} -- traded asset (default: {None})
+        backend {str, OrderBook} -- book backend of the limit orders,
+            see books.BOOK_BACKENDS (default: {"array"})
+        crossing {str} -- "continuous" or "batch" crossing of 
+            limit orders, see LimitOrderMixin (default: {"continuous"})
+        clearing {str} -- "continuous" matching or call "auction",
+            see AuctionMixin (default: {"continuous"})
+        allocation {str} -- "time" or "pro-rata" allocation of 
+            the fills in auctions (default: {"time"})
+        history {bool, int, TradeLog} -- retain all trades (True), none (False),
+            the given number of latest trades or stream them to 
+            disk (TradeLog) (default: {True})
+        ticks_format {np.dtype} -- integer type of the prices (in ticks)
+            in the books (default: {np.int64})
+        quantity_format {np.dtype} -- integer type of the quantities
+            in the books (default: {np.int64})
+        party_format {np.dtype} -- type of the parties. Integer stores the 
+            parties as ids (see PartyRegistry, self.parties), string 
+            (ie. "U10") stores the names truncated (default: {np.uint32})
+        parties {PartyRegistry} -- registry to share with other matchers
+            (default: {None}, new registry)
+
+    Orders that do not fit to the types raise OverflowError.
+    """
 
     _dtype_mapping = {
-        "limit": {'names':('party', 'ticks', 'quantity'), 'formats':('U10', np.uint16, np.uint16)},
-        "market": {'names':('party', 'quantity'), 'formats':('U10', np.uint16)},
-        "stop": {'names':('party', 'ticks', 'quantity'), 'formats':('U10', np.uint16, np.uint16)}
+        "limit": {'names':('id', 'seq', 'party', 'ticks', 'quantity'), 'formats':(np.uint64, np.uint64, np.uint32, np.int64, np.int64)},
+        "market": {'names':('id', 'seq', 'party', 'quantity'), 'formats':(np.uint64, np.uint64, np.uint32, np.int64)},
+        "stop": {'names':('id', 'seq', 'party', 'ticks', 'quantity'), 'formats':(np.uint64, np.uint64, np.uint32, np.int64, np.int64)}
     }
 
+    def __init__(self, asset=None, backend="array", crossing="continuous", 
+                 clearing="continuous", allocation="time", history=True,
+                 ticks_format=np.int64, quantity_format=np.int64, party_format=np.uint32,
+                 parties=None):
+        for name, value in (("ticks_format", ticks_format), ("quantity_format", quantity_format)):
+            if np.dtype(value).kind not in "iu":
+                raise ValueError(f"{name} must be an integer type, not {np.dtype(value)}")
+        if np.dtype(party_format).kind not in "USiu":
+            raise ValueError(f"party_format must be an integer or string type, not {np.dtype(party_format)}")
+        self._dtype_mapping = self._with_formats(ticks=ticks_format, quantity=quantity_format, party=party_format)
+
+        super().__init__(asset=asset, backend=backend, history=history, parties=parties)
+        for name, value, options in (
+            ("crossing", crossing, ("continuous", "batch")),
+            ("clearing", clearing, ("continuous", "auction")),
+            ("allocation", allocation, ("time", "pro-rata")),
+        ):
+            if value not in options:
+                raise ValueError(f"Unknown {name} {value!r}. Options: {list(options)}")
+        self.crossing = crossing
+        self.clearing = clearing
+        self.allocation = allocation
+
 # Set orders
     def place_ask(self, order_type="limit", **params):
         """Place ask (sell) order to market
@@ -30,12 +75,15 @@ class StockMatcher(MarketMatcher, LimitOrderMixin, MarketOrderMixin, StopOrderMi
         Keyword Arguments:
             order_type {str} -- type of the order (default: {"limit"})
             **params -- obligatory information for the order type. See self._dtype_mapping
+
+        Returns:
+            int -- id of the order (see cancel and amend)
         """
         if "price" in params:
             params["ticks"] = self._price_to_ticks(params["price"])
             params.pop("price")
 
-        self.place_order(book_type=order_type, position="ask", **params)
+        return int(self.place_order(book_type=order_type, position="ask", **params)[0])
 
     def place_bid(self, order_type="limit", **params):
         """Place bid (buy) order to market
@@ -43,17 +91,124 @@ class StockMatcher(MarketMatcher, LimitOrderMixin, MarketOrderMixin, StopOrderMi
         Keyword Arguments:
             order_type {str} -- [description] (default: {"limit"})
             **params -- obligatory information for the order type. See self._dtype_mapping
+
+        Returns:
+            int -- id of the order (see cancel and amend)
         """
         if "price" in params:
             params["ticks"] = self._price_to_ticks(params["price"])
             params.pop("price")
 
-        self.place_order(book_type=order_type, position="bid", **params)
+        return int(self.place_order(book_type=order_type, position="bid", **params)[0])
+
+    def place_orders(self, orders=None, **columns):
+        """Place many orders to market at once
+
+        The prices are turned to ticks in one go and each book 
+        is appended once. The books end up the same as if the 
+        orders were placed one by one using place_bid/place_ask.
+
+        Keyword Arguments:
+            orders {pd.DataFrame, dict} -- columns of the orders (default: {None}):
+                side: "bid" or "ask"
+                type: order type (default: "limit")
+                party, price, quantity: see place_bid/place_ask
+            **columns -- columns of the orders as keyword arguments
+
+        Returns:
+            np.ndarray -- ids of the orders (in the given order)
+        """
+        if orders is not None:
+            columns = {**{column: orders[column] for column in orders}, **columns}
+
+        columns = {column: np.asarray(values) for column, values in columns.items()}
+        if "side" not in columns:
+            raise ValueError("Missing field 'side' of the orders")
+        n_orders = max(values.size for values in columns.values())
+        side = np.broadcast_to(columns.pop("side"), (n_orders,))
+        order_type = np.broadcast_to(columns.pop("type", "limit"), (n_orders,))
+
+        unknown = ~np.isin(side, ("bid", "ask")) | ~np.isin(order_type, list(self._dtype_mapping))
+        if unknown.any():
+            i = np.flatnonzero(unknown)[0]
+            raise ValueError(f"Invalid order (side: {side[i]!r}, type: {order_type[i]!r})")
+
+        ids = self._new_order_ids(n_orders)
+        seqs = self._new_seqs(n_orders)
+        if self.parties is not None and "party" in columns:
+            # Interned in the given order
+            columns["party"] = np.asarray(self.parties.intern(columns["party"]))
+        # All the orders are checked before placing any
+        batches = []
+        for book_type, dtype in self._dtype_mapping.items():
+            for position in ("bid", "ask"):
+                mask = (order_type == book_type) & (side == position)
+                if not mask.any():
+                    continue
+                missing = self._required_fields(dtype) - set(columns)
+                if missing:
+                    raise ValueError(f"Missing fields {sorted(missing)} of {book_type} orders")
+                params = {
+                    column: values[mask] if values.ndim else values 
+                    for column, values in columns.items()
+                }
+                if "ticks" in dtype["names"] and "price" in params:
+                    params["ticks"] = self._price_to_ticks(params.pop("price"))
+                self._check_bounds(dtype, params)
+                batches.append((book_type, position, mask, params))
+
+        for book_type, position, mask, params in batches:
+            self.place_order(book_type=book_type, position=position, id=ids[mask], seq=seqs[mask], **params)
+        return ids
+
+    @staticmethod
+    def _required_fields(dtype):
+        "Columns place_orders needs for orders of the dtype"
+        names = set(dtype["names"]) - {"id", "seq"}
+        if "ticks" in names:
+            names = names - {"ticks"} | {"price"}
+        return names
+
+    def amend(self, order_id, quantity=None, price=None):
+        """Modify quantity and/or price of an order in the books
+
+        Reducing the quantity keeps the time priority of the order,
+        other changes move it to the end of the queue.
+
+        Arguments:
+            order_id {int} -- id of the order
+
+        Keyword Arguments:
+            quantity {int} -- new quantity (default: {None}, unchanged)
+            price {float} -- new price (default: {None}, unchanged)
+
+        Returns:
+            bool -- whether the order was in the books
+        """
+        params = {}
+        if quantity is not None:
+            params["quantity"] = quantity
+        if price is not None:
+            params["ticks"] = self._price_to_ticks(price)
+        return self.amend_order(order_id, **params)
 
     def clear(self):
-        self._trigger_stop_orders()
-        self._settle_market_orders()
-        self._settle_limit_orders()
+        with self.events.batch():
+            self._trigger_stop_orders()
+            if self.clearing == "auction":
+                self._settle_auction()
+            else:
+                # Trades trigger stops (as they are made) 
+                # and the stops may trade in turn
+                n_trades = None
+                while n_trades != self.n_trades:
+                    n_trades = self.n_trades
+                    self._settle_market_orders()
+                    self._settle_limit_orders()
+            self._check_book_top()
+
+    def _after_trades(self, ticks):
+        self._trigger_stop_orders(ticks)
 
     def _get_disclosed_trade_ticks(self, bid_order, ask_order):
         ticks = [
@@ -100,134 +255,51 @@ class StockMatcher(MarketMatcher, LimitOrderMixin, MarketOrderMixin, StopOrderMi
             ask_quantities += self.order_book[book_type]["ask"]["quantity"].sum()
         return {"bid":bid_quantities, "ask":ask_quantities}
 
-    def to_frame(self):
-        # Columns ("limit", "market", "stop")
-        dfs = []
-        for book_type in ("limit", "market", "stop"):
-            dfs_book = []
-            for position in ("bid", "ask"):
-                dfs_book.append(pd.DataFrame(self.order_book[book_type][position]))
-            dfs.append(pd.concat(dfs_book, axis=0, keys=("bid", "ask"), sort=False))
-        df = pd.concat(dfs, axis=0, keys=("limit", "market", "stop"), sort=False)
-        df["price"] = df["ticks"].apply(self._ticks_to_price)
-        df = df.drop(["ticks"], axis=1)
-        return df
-
-# Plots
-    def plot_orders(self, fig=None):
-        """Plot cumulative histogram of the orders
-        
+    def depth(self, levels=5):
+        """Total quantities of the best price levels of the limit orders
+
+        Kept up to date by the books thus reading it costs
+        only the number of levels.
+
         Keyword Arguments:
-            fig {[type]} -- [description] (default: {None})
-        
+            levels {int} -- number of price levels per side (default: {5}, None for all)
+
         Returns:
-            [type] -- [description]
+            Dict[str, np.ndarray] -- structured arrays (price, quantity) 
+                of the bids and the asks, best level first
         """
-        # x: price
-        # y: quantity (cumulative)
-        n_bins =50
-        bids = self.order_book["limit"]["bid"]
-        asks = self.order_book["limit"]["ask"]
-        trade_prices = [trade["price"] for trade in self._historical_trades]
-
+        depth = {}
+        for position in ("bid", "ask"):
+            ticks, quantity = self.order_book["limit"][position].depth(levels)
+            book_depth = np.empty(shape=ticks.shape, dtype=[("price", np.float64), ("quantity", np.int64)])
+            book_depth["price"] = self._ticks_to_price(ticks)
+            book_depth["quantity"] = quantity
+            depth[position] = book_depth
+        return depth
 
-        ask_kwds = dict(histtype='step', density=False, cumulative=1, weights=asks["quantity"])
-        bid_kwds = dict(histtype='step', density=False, cumulative=-1, weights=bids["quantity"])
+    def to_frame(self):
+        "Orders in the books as DataFrame (requires pandas)"
+        from .frames import orders_frame
+        return orders_frame(self)
 
-        fig, (ax_box, ax_hist) = plt.subplots(2, sharex=True, gridspec_kw={"height_ratios": (.15, .85)})
+# Plots (matplotlib and seaborn are imported on demand)
+    def plot_orders(self, fig=None):
+        "Plot cumulative histogram of the orders (see plotting.plot_orders)"
+        from .plotting import plot_orders
+        return plot_orders(self, fig=fig)
 
-        sns.distplot(asks["price"], n_bins, rug=True, rug_kws={"height":0.05}, hist_kws=ask_kwds, kde=False, norm_hist=False, ax=ax_hist, color="r", label="Asks")
-        sns.distplot(bids["price"], n_bins, rug=True, rug_kws={"height":0.05}, hist_kws=bid_kwds, kde=False, norm_hist=False, ax=ax_hist, color="g", label="Bids")
-        ax_hist.axvline(self.last_price, 0, 0.25, color="k", linestyle="--", label="Last price")
-        
-        sns.boxplot(trade_prices, ax=ax_box)
-        ax_box.set(yticks=[])
-        
-        sns.despine(ax=ax_box, left=True)
-        sns.despine(ax=ax_hist)
-        ax_hist.legend()
-        return fig
-    
     def plot_order_animate(self):
-        """Plot animated orders in cumulative histogram
-
-        Inspiration: https://en.wikipedia.org/wiki/Order_book_(trading)#/media/File:Order_book_depth_chart.gif
-        """
-        plt.ion()
-        n_bins =50
-        bids = self.order_book["limit"]["bid"]
-        asks = self.order_book["limit"]["ask"]
-
-        if hasattr(self, "_plot_state"):
-            # To optimize time spent on graphing
-            hist_ask, hist_bid, fig, ax = self._plot_state
-            ax.cla()
-
-            hist_ask = ax.hist(asks["price"], weights=asks["quantity"], cumulative=True, label='Ask cumulative')
-            hist_bid = ax.hist(bids["price"], weights=bids["quantity"], cumulative=-1, label='Bid cumulative')
-            fig.canvas.draw()
-            fig.canvas.flush_events()
-        else:
-
-            fig, ax = plt.subplots(figsize=(8, 4))
-            hist_ask = ax.hist(asks["price"], weights=asks["quantity"], cumulative=True, label='Ask cumulative')
-            hist_bid = ax.hist(bids["price"], weights=bids["quantity"], cumulative=-1, label='Bid cumulative')
-        self._plot_state = (hist_ask, hist_bid, fig, ax)
+        "Plot animated orders in cumulative histogram (see plotting.plot_order_animate)"
+        from .plotting import plot_order_animate
+        return plot_order_animate(self)
 
     def plot_order_book(self, tick_frequency=5):
-        """Plot the orders in barh plot
-        x axis: sum of quantity of orders per price (negative indicate asks)
-        y axis: price (integers of cents under the hood)
-        
-        Keyword Arguments:
-            tick_frequency {int} -- Tick label frequency (default: {5})
-        """
-        bids = self.order_book["limit"]["bid"].copy()
-        asks = self.order_book["limit"]["ask"].copy()
-
-        bids["quantity"] = bids["quantity"]
-        asks["quantity"] = - asks["quantity"]
+        "Plot the orders in barh plot (see plotting.plot_order_book)"
+        from .plotting import plot_order_book
+        return plot_order_book(self, tick_frequency=tick_frequency)
 
-        orders = np.append(bids, asks)
-
-        price_ticks = (orders["price"] * 100).round(0).astype("int")
-        quantity = orders["quantity"].astype("int")
-
-        ser_plot = (
-            pd.Series(quantity, index=price_ticks)
-            .groupby(price_ticks).sum()
-            .reindex(range(price_ticks.min(), price_ticks.max() + 1))
-        )
-
-        colors = ser_plot.apply(lambda row: "orangered" if row <0 else "green")
-
-        ax = plt.axes()
-        plt.barh(ser_plot.index, ser_plot.values, align="center", height=1, 
-                color=colors,
-                edgecolor="k"
-                )
-        ax.yaxis.set_major_formatter(ticker.FuncFormatter(lambda x, pos: f"{x/100:.2f}"))
-        ax.yaxis.set_major_locator(ticker.MultipleLocator(tick_frequency))
-
-        ax.axvline(0, color="k")
-        if self.last_price:
-            ax.axhline(self.last_price*100, color="b", linestyle='--', label="Last Price")
-
-        prop = dict(boxstyle='round', facecolor='lightgrey', alpha=0.5)
-        ax.text(0.05, 0.95, "Asks", fontsize=14,
-                horizontalalignment='left', transform = ax.transAxes,
-                verticalalignment='top', color="orangered",
-                bbox=prop)
-        ax.text(0.95, 0.05, "Bids", fontsize=14,
-                horizontalalignment='right', transform = ax.transAxes,
-                verticalalignment='bottom', color="green",
-                bbox=prop)
-
-        plt.title(f"Order book: {self.asset}" if self.asset else "Order book")
-        plt.ylabel("Price")
-        plt.xlabel("Quantity")
-        
     @property
     def historical(self):
-        return pd.DataFrame(self._historical_trades)
-
+        "Retained trades as DataFrame (requires pandas)"
+        from .frames import trades_frame
+        return trades_frame(self)
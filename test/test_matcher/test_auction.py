@@ -0,0 +1,86 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+
+
+def filled(market, party):
+    trades = market.trades
+    bid_party = market.party_names(trades["bid_party"])
+    ask_party = market.party_names(trades["ask_party"])
+    return trades["quantity"][(bid_party == party) | (ask_party == party)].sum()
+
+
+def test_uniform_price():
+    market = StockMatcher(clearing="auction")
+
+    market.place_bid(price=6.0, quantity=100, party="Bidder")
+    market.place_bid(price=5.0, quantity=100, party="Bidder")
+    market.place_ask(price=4.0, quantity=100, party="Asker")
+    market.place_ask(price=5.0, quantity=100, party="Asker")
+    assert 5.0 == market.auction_price
+    market.clear()
+
+    assert set(market.trades["ticks"]) == {500}
+    assert (5.0 == market.last_price) and (0 == market.total_quantities["bid"]) and (0 == market.total_quantities["ask"])
+
+
+@pytest.mark.parametrize("allocation,expected", [("time", (100, 100)), ("pro-rata", (50, 150))])
+def test_allocation(allocation, expected):
+    market = StockMatcher(clearing="auction", allocation=allocation)
+
+    market.place_bid(price=5.0, quantity=100, party="First")
+    market.place_bid(price=5.0, quantity=300, party="Second")
+    market.place_bid(price=4.0, quantity=300, party="Too low")
+    market.place_ask(price=5.0, quantity=200, party="Asker")
+    market.clear()
+
+    assert (filled(market, "First"), filled(market, "Second"), filled(market, "Too low")) == expected + (0,)
+    assert 500 == market.total_quantities["bid"]
+
+
+def test_market_orders_participate():
+    market = StockMatcher(clearing="auction")
+
+    market.place_bid(quantity=100, order_type="market", party="Market")
+    market.place_ask(price=4.0, quantity=100, party="Asker")
+    market.place_ask(price=6.0, quantity=100, party="Expensive")
+    market.clear()
+
+    assert (4.0 == market.last_price) and (100 == filled(market, "Market"))
+    assert 100 == market.order_book["limit"]["ask"]["quantity"].sum()
+
+
+def test_no_cross():
+    market = StockMatcher(clearing="auction")
+
+    market.place_bid(price=4.0, quantity=200, party="Bidder")
+    market.place_ask(price=6.0, quantity=200, party="Asker")
+    market.clear()
+
+    assert (market.last_price is None) and (market.auction_price is None)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_maximizes_volume(seed):
+    rng = np.random.RandomState(seed)
+    n = 500
+    bid_price = rng.randint(480, 520, size=n) / 100
+    ask_price = rng.randint(480, 520, size=n) / 100
+    bid_quantity = rng.randint(1, 100, size=n)
+    ask_quantity = rng.randint(1, 100, size=n)
+
+    market = StockMatcher(clearing="auction", allocation="pro-rata")
+    market.place_orders(side="bid", price=bid_price, quantity=bid_quantity, party="Bidder")
+    market.place_orders(side="ask", price=ask_price, quantity=ask_quantity, party="Asker")
+    market.clear()
+
+    max_volume = max(
+        min(bid_quantity[bid_price >= price].sum(), ask_quantity[ask_price <= price].sum())
+        for price in np.union1d(bid_price, ask_price)
+    )
+    assert max_volume == market.trades["quantity"].sum()
+    assert len(set(market.trades["ticks"])) == 1
+    # Nothing left crossed
+    assert market.highest_bid_price < market.lowest_ask_price
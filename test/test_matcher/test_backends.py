@@ -0,0 +1,85 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+
+
+def place_random_orders(market, n, seed=0):
+    rng = np.random.RandomState(seed)
+    for i in range(n):
+        side = market.place_bid if rng.rand() < 0.5 else market.place_ask
+        if rng.rand() < 0.1:
+            side(order_type="market", quantity=int(rng.randint(1, 50)), party=f"M{i}")
+        else:
+            price = round(5.0 + rng.randint(-20, 21) / 100, 2)
+            side(price=price, quantity=int(rng.randint(1, 50)), party=f"L{i}")
+        if rng.rand() < 0.2:
+            market.clear()
+    market.clear()
+
+
+def trades(market):
+    return market.trades.tolist()
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_ladder_equals_array(seed):
+    array_market = StockMatcher(backend="array")
+    ladder_market = StockMatcher(backend="ladder")
+
+    place_random_orders(array_market, 500, seed=seed)
+    place_random_orders(ladder_market, 500, seed=seed)
+
+    assert trades(array_market) == trades(ladder_market)
+    for position in ("bid", "ask"):
+        array_book = array_market.order_book["limit"][position].to_array()
+        ladder_book = ladder_market.order_book["limit"][position].to_array()
+        assert (array_book == ladder_book).all()
+
+
+def test_ladder_time_priority():
+    market = StockMatcher(backend="ladder")
+
+    market.place_bid(price=5.0, quantity=100, party="First")
+    market.place_bid(price=6.0, quantity=100, party="Best")
+    market.place_bid(price=5.0, quantity=100, party="Second")
+    market.place_ask(price=4.0, quantity=250, party="Asker")
+    market.clear()
+
+    assert list(market.party_names(market.trades["bid_party"])) == ["Best", "First", "Second"]
+    assert 50 == market.order_book["limit"]["bid"]["quantity"].sum()
+    assert market.party_names(market.highest_bid_order["party"]) == "Second"
+
+
+def test_ladder_grows_and_compacts():
+    market = StockMatcher(backend="ladder")
+    for i in range(200):
+        market.place_bid(price=5.0, quantity=1, party="Bidder")
+        market.place_ask(price=5.0, quantity=1, party="Asker")
+        market.clear()
+    bids = market.order_book["limit"]["bid"]
+    assert bids.size == 0 and bids.best() is None and market.highest_bid_price is None
+    assert len(bids._data) <= 32
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        StockMatcher(backend="nonexistent")
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+def test_tombstones_compacted(backend):
+    market = StockMatcher(backend=backend)
+    for i in range(300):
+        market.place_bid(price=5.0, quantity=10, party="Bidder")
+    for i in range(290):
+        market.place_ask(price=5.0, quantity=10, party="Asker")
+        market.clear()
+
+    bids = market.order_book["limit"]["bid"]
+    asks = market.order_book["limit"]["ask"]
+    assert bids.size == 10 and asks.size == 0
+    # Fragmentation triggered compaction (not every trade)
+    assert bids._end - bids._live <= max(bids.min_compact, bids._end // 2)
+    assert (bids["quantity"] == 10).all() and 100 == market.total_quantities["bid"]
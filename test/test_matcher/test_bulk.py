@@ -0,0 +1,91 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+import pandas as pd
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+
+
+def random_orders(n, seed=0):
+    rng = np.random.RandomState(seed)
+    order_type = rng.choice(["limit", "limit", "limit", "market", "stop"], size=n)
+    return pd.DataFrame({
+        "side": rng.choice(["bid", "ask"], size=n),
+        "type": order_type,
+        "party": [f"P{i}" for i in range(n)],
+        "price": np.where(order_type == "market", np.nan, rng.randint(400, 600, size=n) / 100),
+        "quantity": rng.randint(1, 100, size=n),
+    })
+
+
+def place_one_by_one(market, orders):
+    for row in orders.itertuples():
+        place = market.place_bid if row.side == "bid" else market.place_ask
+        if row.type == "market":
+            place(order_type=row.type, party=row.party, quantity=row.quantity)
+        else:
+            place(order_type=row.type, party=row.party, price=row.price, quantity=row.quantity)
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+def test_same_as_one_by_one(backend):
+    orders = random_orders(1000)
+
+    market_bulk = StockMatcher(backend=backend)
+    market_bulk.place_orders(orders)
+
+    market_single = StockMatcher(backend=backend)
+    place_one_by_one(market_single, orders)
+
+    for book_type in ("limit", "market", "stop"):
+        for position in ("bid", "ask"):
+            bulk = market_bulk.order_book[book_type][position].to_array()
+            single = market_single.order_book[book_type][position].to_array()
+            assert len(bulk) > 0 and (bulk == single).all()
+
+    market_bulk.clear()
+    market_single.clear()
+    assert market_bulk.last_price == market_single.last_price
+    assert market_bulk.total_quantities == market_single.total_quantities
+
+
+def test_arrays_as_keywords():
+    market = StockMatcher()
+    market.place_orders(
+        side=np.array(["bid", "ask", "ask"]),
+        price=np.array([5.0, 4.0, 4.5]),
+        quantity=np.array([200, 100, 100]),
+        party="Agent"
+    )
+    market.clear()
+
+    assert 4.75 == market.last_price
+    assert 0 == market.total_quantities["bid"] and 0 == market.total_quantities["ask"]
+
+
+def test_price_to_ticks_rounding():
+    market = StockMatcher()
+    market.place_orders(side=["bid", "bid"], price=[0.29, 5.556], quantity=[1, 1], party="Agent")
+    market.place_bid(price=0.29, quantity=1, party="Agent")
+
+    assert list(market.order_book["limit"]["bid"]["ticks"]) == [29, 556, 29]
+
+
+def test_invalid_side():
+    market = StockMatcher()
+    with pytest.raises(ValueError):
+        market.place_orders(side=["bid", "buy"], price=[5.0, 5.0], quantity=[1, 1], party="Agent")
+
+
+def test_missing_fields():
+    market = StockMatcher()
+    with pytest.raises(ValueError, match="price"):
+        market.place_orders(side=["bid", "ask"], quantity=[1, 1], party="Agent")
+    with pytest.raises(ValueError, match="party"):
+        market.place_orders(side="bid", type="market", quantity=1)
+    with pytest.raises(ValueError, match="side"):
+        market.place_orders(price=5.0, quantity=1, party="Agent")
+
+    # Market orders need no price
+    market.place_orders(side="bid", type="market", quantity=1, party="Agent")
+    assert 1 == market.total_quantities["bid"]
@@ -0,0 +1,101 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+
+
+def trades(market):
+    return market.trades.tolist()
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_batch_equals_continuous(backend, seed):
+    rng = np.random.RandomState(seed)
+    n = 2000
+    columns = dict(
+        side=rng.choice(["bid", "ask"], size=n),
+        party=[f"P{i}" for i in range(n)],
+        price=rng.randint(450, 550, size=n) / 100,
+        quantity=rng.randint(1, 100, size=n),
+    )
+    continuous = StockMatcher(backend=backend, crossing="continuous")
+    batch = StockMatcher(backend=backend, crossing="batch")
+    for market in (continuous, batch):
+        # Build up a large crossed book
+        market.place_orders(**columns)
+        market.clear()
+
+    assert len(trades(batch)) > 100
+    assert trades(continuous) == trades(batch)
+    assert continuous.last_price == batch.last_price
+    for position in ("bid", "ask"):
+        assert (
+            continuous.order_book["limit"][position].to_array() 
+            == batch.order_book["limit"][position].to_array()
+        ).all()
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_batch_equals_continuous_with_stops(backend, seed):
+    rng = np.random.RandomState(seed)
+    n_stops, n = 40, 400
+    stops = dict(
+        side=rng.choice(["bid", "ask"], size=n_stops), type="stop", party="Stopper",
+        price=rng.randint(480, 520, size=n_stops) / 100, quantity=rng.randint(1, 100, size=n_stops)
+    )
+    limits = dict(
+        side=rng.choice(["bid", "ask"], size=n), party="Trader",
+        price=rng.randint(450, 550, size=n) / 100, quantity=rng.randint(1, 100, size=n)
+    )
+    continuous = StockMatcher(backend=backend, crossing="continuous")
+    batch = StockMatcher(backend=backend, crossing="batch")
+    for market in (continuous, batch):
+        # The crossing triggers the stops at many trades
+        market.place_orders(**stops)
+        market.place_orders(**limits)
+        market.clear()
+
+    assert trades(continuous) == trades(batch)
+
+
+@pytest.mark.parametrize("crossing", ["continuous", "batch"])
+def test_stops_queue_in_trigger_order(crossing):
+    market = StockMatcher(crossing=crossing)
+    market.place_bid(order_type="stop", price=10.25, quantity=1, party="Stop0")
+    market.place_bid(order_type="stop", price=10.50, quantity=1, party="Stop1")
+    market.place_bid(price=11.0, quantity=1, party="Bidder")
+    market.place_ask(price=9.8, quantity=1, party="Asker")
+    market.place_bid(price=10.6, quantity=1, party="Bidder")
+    market.place_ask(price=9.6, quantity=1, party="Asker")
+    market.place_ask(price=12.0, quantity=1, party="Asker")
+    market.clear()
+
+    # Stop1 is triggered by the first trade (10.30), Stop0 by the second (10.20)
+    assert list(market.trades["ticks"]) == [1030, 1020, 1200]
+    assert market.party_names(market.trades["bid_party"][-1]) == "Stop1"
+
+
+def test_batch_partial_fill():
+    market = StockMatcher(crossing="batch")
+
+    market.place_ask(price=2.0, quantity=300, party="Asker")
+
+    market.place_bid(price=5.0, quantity=100, party="Bidder")
+    market.place_bid(price=6.0, quantity=100, party="Bidder")
+    market.place_bid(price=3.0, quantity=100, party="Last Bidder")
+    market.place_bid(price=1.0, quantity=100, party="Unfilled Bidder")
+    
+    market.clear()
+
+    bid_quantity = market.order_book["limit"]["bid"]["quantity"].sum()
+    ask_quantity = market.order_book["limit"]["ask"]["quantity"].sum()
+
+    assert (2.5 == market.last_price) and (100 == bid_quantity) and (0 == ask_quantity)
+
+
+def test_unknown_crossing():
+    with pytest.raises(ValueError):
+        StockMatcher(crossing="nonexistent")
@@ -0,0 +1,64 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+
+
+def test_depth():
+    market = StockMatcher()
+
+    market.place_bid(price=4.0, quantity=100, party="Bidder")
+    market.place_bid(price=4.5, quantity=100, party="Bidder")
+    market.place_bid(price=4.0, quantity=50, party="Bidder")
+    market.place_ask(price=5.0, quantity=70, party="Asker")
+    market.place_ask(price=6.0, quantity=30, party="Asker")
+    market.place_ask(price=4.5, quantity=40, party="Asker")
+    market.clear()
+
+    depth = market.depth(levels=5)
+    assert list(depth["bid"]["price"]) == [4.5, 4.0]
+    assert list(depth["bid"]["quantity"]) == [60, 150]
+    assert list(depth["ask"]["price"]) == [5.0, 6.0]
+    assert list(depth["ask"]["quantity"]) == [70, 30]
+
+    depth = market.depth(levels=1)
+    assert list(depth["bid"]["price"]) == [4.5] and list(depth["ask"]["price"]) == [5.0]
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+@pytest.mark.parametrize("crossing", ["continuous", "batch"])
+def test_depth_matches_orders(backend, crossing):
+    rng = np.random.RandomState(0)
+    market = StockMatcher(backend=backend, crossing=crossing)
+    for _ in range(20):
+        n = 200
+        market.place_orders(
+            side=rng.choice(["bid", "ask"], size=n),
+            price=rng.randint(480, 520, size=n) / 100,
+            quantity=rng.randint(1, 100, size=n),
+            party="Agent",
+        )
+        market.clear()
+
+        for position in ("bid", "ask"):
+            orders = market.order_book["limit"][position].to_array()
+            ticks, quantity = market.order_book["limit"][position].depth()
+            expected_ticks = np.unique(orders["ticks"])
+            if position == "bid":
+                expected_ticks = expected_ticks[::-1]
+            expected_quantity = [orders["quantity"][orders["ticks"] == t].sum() for t in expected_ticks]
+            assert list(ticks) == list(expected_ticks)
+            assert list(quantity) == expected_quantity
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+def test_depth_after_remove(backend):
+    market = StockMatcher(backend=backend)
+    market.place_bid(price=4.0, quantity=100, party="Bidder")
+    market.place_bid(price=4.0, quantity=30, party="Bidder")
+    bids = market.order_book["limit"]["bid"]
+    bids.remove(bids.best())
+
+    ticks, quantity = bids.depth()
+    assert list(ticks) == [400] and list(quantity) == [30]
@@ -0,0 +1,87 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+
+
+def place_crossed(market):
+    market.place_bid(price=6.0, quantity=100, party="Bidder")
+    market.place_bid(price=5.0, quantity=100, party="Bidder")
+    market.place_ask(price=4.0, quantity=150, party="Asker")
+
+
+@pytest.mark.parametrize("crossing", ["continuous", "batch"])
+def test_trade_events(crossing):
+    market = StockMatcher(crossing=crossing)
+    calls, batched_calls = [], []
+    market.subscribe("trade", calls.append)
+    market.subscribe("trade", batched_calls.append, batched=True)
+
+    place_crossed(market)
+    market.clear()
+
+    assert 1 == len(batched_calls)
+    assert batched_calls[0].tolist() == market.trades.tolist()
+    assert np.concatenate(calls).tolist() == market.trades.tolist()
+
+
+def test_trade_events_without_history():
+    market = StockMatcher(history=False)
+    trades = []
+    market.subscribe("trade", trades.append, batched=True)
+
+    place_crossed(market)
+    market.clear()
+    assert [100, 50] == list(trades[0]["quantity"])
+
+
+def test_order_events():
+    market = StockMatcher()
+    accepted, filled = [], []
+    market.subscribe("order_accepted", accepted.append)
+    market.subscribe("order_filled", filled.append, batched=True)
+
+    place_crossed(market)
+    market.clear()
+
+    accepted = np.concatenate(accepted)
+    assert list(market.party_names(accepted["party"])) == ["Bidder", "Bidder", "Asker"]
+    assert list(accepted["ticks"]) == [600, 500, 400]
+
+    filled = filled[0]
+    assert list(filled["filled"]) == [100, 100, 50, 50]
+    assert list(filled["quantity"]) == [0, 50, 50, 0]
+    assert list(filled["side"]) == [0, 1, 0, 1]
+
+
+def test_book_top_changed():
+    market = StockMatcher()
+    tops = []
+    market.subscribe("book_top_changed", tops.append)
+
+    market.place_bid(price=5.0, quantity=100, party="Bidder")
+    market.place_bid(price=4.0, quantity=100, party="Bidder")
+    market.place_ask(price=5.0, quantity=60, party="Asker")
+    market.clear()
+
+    tops = np.concatenate(tops)
+    assert list(tops["bid_ticks"]) == [500, 500, 500]
+    assert list(tops["bid_quantity"]) == [100, 100, 40]
+    assert list(tops["ask_ticks"]) == [-1, 500, -1]
+
+
+def test_unsubscribe():
+    market = StockMatcher()
+    calls = []
+    market.subscribe("trade", calls.append)
+    market.unsubscribe("trade", calls.append)
+
+    place_crossed(market)
+    market.clear()
+    assert not calls
+
+
+def test_unknown_event():
+    with pytest.raises(ValueError):
+        StockMatcher().subscribe("nonexistent", print)
@@ -0,0 +1,124 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.exchange import Exchange
+from ecosys.trading_platform.matcher.history import TradeLog
+
+
+def test_routes_by_symbol():
+    exchange = Exchange(["AAA", "BBB"])
+    exchange.place_bid("AAA", price=5.0, quantity=100, party="Bidder")
+    exchange.place_ask("AAA", price=5.0, quantity=60, party="Asker")
+    exchange.place_ask("BBB", price=7.0, quantity=10, party="Asker")
+
+    assert exchange.dirty == {"AAA", "BBB"}
+    assert exchange.clear() == ["AAA", "BBB"]
+    assert exchange.dirty == set()
+
+    assert 5.0 == exchange["AAA"].last_price
+    assert exchange["BBB"].last_price is None
+    assert 60 == exchange.volume and 1 == exchange.n_trades
+
+
+def test_clears_only_dirty():
+    exchange = Exchange([f"S{i}" for i in range(100)])
+    exchange["S42"].place_bid(price=5.0, quantity=10, party="Bidder")
+    exchange.place_ask("S42", price=5.0, quantity=10, party="Asker")
+
+    assert exchange.clear() == ["S42"]
+    assert exchange.clear() == []
+
+    # In the order of listing
+    for symbol in ("S99", "S7", "S42"):
+        exchange.place_bid(symbol, price=5.0, quantity=10, party="Bidder")
+    assert exchange.clear() == ["S7", "S42", "S99"]
+
+
+def test_stop_orders_cascade_in_one_clear():
+    exchange = Exchange(["AAA"])
+    exchange.place_bid("AAA", order_type="stop", price=5.5, quantity=10, party="Stopper")
+    exchange.place_bid("AAA", price=5.0, quantity=10, party="Bidder")
+    exchange.place_ask("AAA", price=5.0, quantity=20, party="Asker")
+
+    exchange.clear()
+    assert exchange.dirty == set()
+    assert 20 == exchange.volume
+
+
+def test_auction_stays_dirty_after_triggering():
+    exchange = Exchange(["AAA"], clearing="auction")
+    exchange.place_bid("AAA", price=5.0, quantity=10, party="Bidder")
+    exchange.place_ask("AAA", price=5.0, quantity=10, party="Asker")
+    exchange.clear()
+
+    exchange.place_bid("AAA", order_type="stop", price=4.95, quantity=5, party="Stopper")
+    exchange.place_bid("AAA", price=4.9, quantity=10, party="Bidder")
+    exchange.place_ask("AAA", price=4.9, quantity=10, party="Asker")
+    exchange.place_ask("AAA", price=5.2, quantity=5, party="Asker")
+    exchange.clear()
+
+    # The stop was triggered by the auction and waits for the next one
+    assert exchange.dirty == {"AAA"}
+    assert exchange.clear() == ["AAA"]
+    assert exchange.dirty == set()
+    assert 0 == exchange["AAA"].order_book["market"]["bid"].size
+    assert 25 == exchange.volume
+
+
+def test_bulk_orders():
+    exchange = Exchange(["AAA", "BBB"], backend="ladder")
+    ids = exchange.place_orders(
+        symbol=["BBB", "AAA", "BBB", "AAA"],
+        side=["bid", "bid", "ask", "ask"],
+        price=[5.0, 6.0, 5.0, 6.5],
+        quantity=[10, 20, 5, 20],
+        party="Agent",
+    )
+    assert list(ids) == [0, 0, 1, 1]
+    with pytest.raises(KeyError):
+        exchange.place_orders(symbol="CCC", side="bid", price=5.0, quantity=1, party="Agent")
+
+    exchange.clear()
+    stats = exchange.stats()
+    assert list(stats["symbol"]) == ["AAA", "BBB"]
+    assert np.isnan(stats["last_price"][0]) and stats["last_price"][1] == 5.0
+    assert list(stats["bid"]) == [6.0, 5.0]
+    assert list(stats["volume"]) == [0, 5]
+    assert list(stats["bid_quantity"]) == [20, 5]
+
+
+def test_list_delist():
+    exchange = Exchange()
+    exchange.list("AAA")
+    with pytest.raises(KeyError):
+        exchange.list("AAA")
+    exchange.place_bid("AAA", price=5.0, quantity=1, party="Bidder")
+    exchange.delist("AAA")
+    assert "AAA" not in exchange and exchange.clear() == []
+
+
+def test_log_per_symbol(tmp_path):
+    exchange = Exchange(["AAA", "BBB"], history=TradeLog(tmp_path / "trades.bin", chunk_size=1))
+    for symbol, quantity in (("AAA", 10), ("BBB", 20)):
+        exchange.place_bid(symbol, price=5.0, quantity=quantity, party="Bidder")
+        exchange.place_ask(symbol, price=5.0, quantity=quantity, party="Asker")
+    exchange.clear()
+
+    assert not (tmp_path / "trades.bin").exists()
+    for symbol, quantity in (("AAA", 10), ("BBB", 20)):
+        trades = TradeLog(tmp_path / f"trades_{symbol}.bin").memmap()
+        assert list(trades["quantity"]) == [quantity]
+        assert list(exchange.log_of(symbol).memmap()["quantity"]) == [quantity]
+
+
+def test_logs_closed(tmp_path):
+    with Exchange(["AAA", "BBB"], history=TradeLog(tmp_path / "trades.bin")) as exchange:
+        exchange.place_bid("AAA", price=5.0, quantity=10, party="Bidder")
+        exchange.place_ask("AAA", price=5.0, quantity=10, party="Asker")
+        exchange.clear()
+        # Buffered (chunk_size not reached)
+        assert 0 == len(exchange.log_of("AAA"))
+
+    assert list(exchange.log_of("AAA").memmap()["quantity"]) == [10]
+    assert 0 == len(exchange.log_of("BBB"))
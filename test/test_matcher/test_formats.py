@@ -0,0 +1,93 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+
+
+def test_large_prices_and_quantities():
+    market = StockMatcher()
+    market.place_bid(price=12345.67, quantity=10 ** 9, party="Bidder")
+    market.place_ask(price=12345.67, quantity=3 * 10 ** 8, party="Asker")
+    market.clear()
+
+    assert 12345.67 == market.last_price
+    assert [3 * 10 ** 8] == list(market.trades["quantity"])
+    assert 7 * 10 ** 8 == market.total_quantities["bid"]
+
+
+def test_configured_formats():
+    market = StockMatcher(ticks_format=np.uint32, quantity_format=np.int32, party_format="S4")
+    dtype = market.order_book["limit"]["bid"].dtype
+    assert dtype["ticks"] == np.uint32 and dtype["quantity"] == np.int32 and dtype["party"] == np.dtype("S4")
+    assert market.trades.dtype["bid_party"] == np.dtype("S4")
+
+    market.place_bid(price=5.0, quantity=10, party=b"Me")
+    market.place_ask(price=5.0, quantity=10, party=b"You")
+    market.clear()
+    assert [b"Me"] == list(market.trades["bid_party"])
+
+
+def test_overflow_checked_in_bulk():
+    market = StockMatcher(ticks_format=np.uint16, quantity_format=np.uint16)
+    with pytest.raises(OverflowError):
+        market.place_bid(price=655.36, quantity=1, party="Bidder")
+    with pytest.raises(OverflowError):
+        market.place_orders(side=["bid", "ask"], price=[5.0, 5.0], quantity=[1, 70000], party="Agent")
+    with pytest.raises(OverflowError):
+        market.place_orders(side="bid", price=[5.0, -1.0], quantity=1, party="Agent")
+    with pytest.raises(OverflowError):
+        StockMatcher().place_bid(price=1e20, quantity=1, party="Bidder")
+
+    assert 0 == market.order_book["limit"]["bid"].size
+    market.place_bid(price=655.35, quantity=65535, party="Bidder")
+    assert 655.35 == market.highest_bid_price
+
+
+def test_non_positive_quantity():
+    market = StockMatcher()
+    for quantity in (-4, 0):
+        with pytest.raises(ValueError):
+            market.place_bid(price=5.0, quantity=quantity, party="Bidder")
+    with pytest.raises(ValueError):
+        market.place_orders(side=["bid", "ask"], price=5.0, quantity=[10, -1], party="Agent")
+
+    assert 0 == market.total_quantities["bid"] == market.total_quantities["ask"]
+    market.place_ask(price=5.0, quantity=10, party="Asker")
+    market.clear()
+    assert 0 == market.n_trades
+
+
+@pytest.mark.parametrize("price", [np.nan, np.inf, -np.inf])
+def test_non_finite_price(price):
+    market = StockMatcher()
+    with pytest.raises(ValueError):
+        market.place_bid(price=price, quantity=10, party="Bidder")
+    with pytest.raises(ValueError):
+        market.place_ask(order_type="stop", price=price, quantity=10, party="Asker")
+    with pytest.raises(ValueError):
+        market.place_orders(side=["bid", "ask"], price=[5.0, price], quantity=10, party="Agent")
+    assert 0 == market.total_quantities["bid"] == market.total_quantities["ask"]
+
+    # Market orders have no price
+    market.place_orders(side="bid", type="market", price=price, quantity=10, party="Agent")
+    assert 10 == market.total_quantities["bid"]
+
+
+def test_fractional_quantity():
+    market = StockMatcher()
+    with pytest.raises(ValueError):
+        market.place_bid(price=5.0, quantity=2.7, party="Bidder")
+    with pytest.raises(ValueError):
+        market.place_orders(side=["bid", "ask"], price=5.0, quantity=[10, 0.5], party="Agent")
+    order_id = market.place_bid(price=5.0, quantity=10.0, party="Bidder")
+    with pytest.raises(ValueError):
+        market.amend(order_id, quantity=2.5)
+    assert 10 == market.total_quantities["bid"] and 0 == market.total_quantities["ask"]
+
+
+def test_invalid_formats():
+    with pytest.raises(ValueError):
+        StockMatcher(quantity_format=np.float64)
+    with pytest.raises(ValueError):
+        StockMatcher(party_format=np.float64)
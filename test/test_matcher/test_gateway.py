@@ -0,0 +1,98 @@
+import pytest
+import sys
+sys.path.append('..')
+import asyncio
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+from ecosys.trading_platform.matcher.gateway import OrderGateway
+
+
+def run(coroutine):
+    "asyncio.run of Python 3.7+"
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_many_agents():
+    market = StockMatcher()
+
+    async def agent(gateway, i):
+        side = gateway.bid if i % 2 else gateway.ask
+        return await side(price=5.0, quantity=10, party=f"A{i}")
+
+    async def main():
+        async with OrderGateway(market, interval=0.001, batch_size=16) as gateway:
+            fills = gateway.subscribe()
+            ids = await asyncio.gather(*(agent(gateway, i) for i in range(100)))
+        trades = []
+        while not fills.empty():
+            trades.append(fills.get_nowait())
+        return ids, gateway, np.concatenate(trades)
+
+    ids, gateway, trades = run(main())
+    assert sorted(ids) == list(range(100))
+    assert 50 == len(trades) and 500 == trades["quantity"].sum()
+    assert 0 == market.total_quantities["bid"] == market.total_quantities["ask"]
+
+    latency = gateway.latency()
+    assert list(latency) == [50, 90, 99]
+    assert 0 <= latency[50] <= latency[99]
+
+
+def test_party_fills_and_batching():
+    market = StockMatcher()
+
+    async def main():
+        async with OrderGateway(market, interval=10, batch_size=2) as gateway:
+            fills = gateway.subscribe(party="Bidder")
+            others = gateway.subscribe(party="Other")
+            bid = asyncio.ensure_future(gateway.bid(price=5.0, quantity=10, party="Bidder"))
+            ask = asyncio.ensure_future(gateway.ask(price=5.0, quantity=4, party="Asker"))
+            # Batch closes at two orders, not after the interval
+            ids = await asyncio.wait_for(asyncio.gather(bid, ask), timeout=5)
+            trades = await asyncio.wait_for(fills.get(), timeout=5)
+        return ids, trades, others
+
+    ids, trades, others = run(main())
+    assert ids == [0, 1]
+    assert list(trades["bid_id"]) == [0] and list(trades["quantity"]) == [4]
+    assert others.empty()
+
+
+def test_invalid_orders():
+    market = StockMatcher()
+
+    async def main():
+        async with OrderGateway(market) as gateway:
+            with pytest.raises(ValueError):
+                await gateway.submit("buy", price=5.0, quantity=1, party="Agent")
+            with pytest.raises(ValueError):
+                await gateway.bid(quantity=1, party="Agent")
+            return await gateway.bid(order_type="market", quantity=1, party="Agent")
+
+    assert 0 == run(main())
+    assert 1 == market.total_quantities["bid"]
+
+
+def test_invalid_orders_in_batch():
+    market = StockMatcher()
+
+    async def main():
+        async with OrderGateway(market, interval=10, batch_size=6) as gateway:
+            orders = [
+                gateway.bid(price=5.0, quantity=10, party="Bidder"),
+                gateway.ask(price=5.0, quantity=2 ** 63, party="Asker"),
+                gateway.ask(price=5.0, quantity=2 ** 64, party="Asker"),
+                gateway.ask(price=np.nan, quantity=1, party="Asker"),
+                gateway.ask(price=5.0, quantity=2.7, party="Asker"),
+                gateway.ask(price=6.0, quantity=4, party="Asker"),
+            ]
+            return await asyncio.wait_for(asyncio.gather(*orders, return_exceptions=True), timeout=5)
+
+    bid, *invalid, ask = run(main())
+    assert (bid, ask) == (0, 1)
+    assert [type(exc) for exc in invalid] == [OverflowError, OverflowError, ValueError, ValueError]
+    assert 10 == market.total_quantities["bid"] and 4 == market.total_quantities["ask"]
@@ -0,0 +1,102 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+from ecosys.trading_platform.matcher.history import TradeHistory, TradeLog, trade_dtype
+
+
+def trade_a_lot(market, n):
+    for i in range(n):
+        market.place_bid(price=5.0, quantity=10, party="Bidder")
+        market.place_ask(price=5.0, quantity=10, party=f"A{i}")
+        market.clear()
+
+
+def test_historical():
+    market = StockMatcher()
+    market.place_bid(price=6.0, quantity=200, party="Bidder")
+    market.place_ask(price=4.0, quantity=150, party="Asker")
+    market.place_ask(quantity=50, order_type="market", party="Market")
+    market.clear()
+
+    df = market.historical
+    assert list(df["ask_party"]) == ["Market", "Asker"]
+    assert list(df["ask_order"]) == ["market", "limit"]
+    assert list(df["price"]) == [6.0, 5.0]
+    assert list(df["quantity"]) == [50, 150]
+    assert list(df.index) == [0, 1]
+
+
+def test_retention_cap():
+    market = StockMatcher(history=5)
+    trade_a_lot(market, 100)
+
+    assert list(market.party_names(market.trades["ask_party"])) == [f"A{i}" for i in range(95, 100)]
+    assert list(market.trades["trade"]) == list(range(95, 100))
+    assert 5.0 == market.last_price
+
+
+def test_history_disabled():
+    market = StockMatcher(history=False)
+    trade_a_lot(market, 10)
+
+    assert 0 == len(market.trades) and 5.0 == market.last_price
+    assert 10 == market._trades.n_trades
+
+
+@pytest.mark.parametrize("max_trades", [None, 0, 3, 64])
+def test_extend(max_trades):
+    history = TradeHistory(trade_dtype("U10"), max_trades=max_trades)
+    expected = []
+    for n in (1, 2, 50, 7, 200, 1):
+        quantity = np.arange(len(expected), len(expected) + n)
+        history.extend(bid_party="B", ask_party="A", bid_order=0, ask_order=0, ticks=500, quantity=quantity)
+        expected += quantity.tolist()
+    retained = expected if max_trades is None else expected[len(expected) - max_trades:]
+    assert history.trades["quantity"].tolist() == retained
+    assert history.trades["trade"].tolist() == retained
+
+
+def test_trade_hook():
+    calls = []
+    class HookedMatcher(StockMatcher):
+        def trade_orders(self, bid, ask, ticks, quantity, asset):
+            calls.append((bid["party"], ask["party"], ask["order"], ticks, quantity))
+
+    market = HookedMatcher(crossing="batch")
+    market.place_bid(price=6.0, quantity=200, party="Bidder")
+    market.place_ask(price=4.0, quantity=200, party="Asker")
+    market.clear()
+
+    assert calls == [("Bidder", "Asker", "limit", 500, 200)]
+
+
+def test_trade_log(tmp_path):
+    path = tmp_path / "trades.bin"
+    market = StockMatcher(history=TradeLog(path, chunk_size=16))
+    trade_a_lot(market, 100)
+
+    # Only the latest chunk in memory
+    assert len(market.trades) < 16
+    market.flush_trades()
+    assert 0 == len(market.trades)
+
+    log = TradeLog(path)
+    trades = log.memmap()
+    assert 100 == len(log) == len(trades)
+    assert list(market.party_names(trades["ask_party"])) == [f"A{i}" for i in range(100)]
+    assert list(trades["trade"]) == list(range(100))
+
+    chunks = list(log.iter_chunks(chunk_size=30))
+    assert [len(chunk) for chunk in chunks] == [30, 30, 30, 10]
+    assert (np.concatenate(chunks) == trades).all()
+
+
+def test_trade_log_closed(tmp_path):
+    path = tmp_path / "trades.bin"
+    with StockMatcher(history=TradeLog(path, chunk_size=16)) as market:
+        trade_a_lot(market, 20)
+    # The tail of the buffer is written on close
+    assert 20 == len(TradeLog(path).memmap())
+    assert market._trades.log._file is None
@@ -0,0 +1,35 @@
+import pytest
+import sys
+sys.path.append('..')
+import os
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).parents[2]
+HEAVY = ("pandas", "matplotlib", "seaborn", "scipy")
+
+
+def imported_modules(statement):
+    "Heavy modules imported by the statement in a fresh interpreter"
+    code = f"import sys; {statement}; print(','.join(m for m in {HEAVY!r} if m in sys.modules))"
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run([sys.executable, "-c", code], env=env, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    return [module for module in result.stdout.strip().split(",") if module]
+
+
+@pytest.mark.parametrize("statement", [
+    "import ecosys",
+    "from ecosys.trading_platform.matcher.stockmarket import StockMatcher; StockMatcher().clear()",
+    "import ecosys.trading_platform.matcher.parallel",
+    "import ecosys.trading_platform.matcher.gateway",
+])
+def test_matcher_needs_only_numpy(statement):
+    assert imported_modules(statement) == []
+
+
+def test_frames_imported_on_demand():
+    statement = (
+        "from ecosys.trading_platform.matcher.stockmarket import StockMatcher; "
+        "StockMatcher().historical"
+    )
+    assert imported_modules(statement) == ["pandas"]
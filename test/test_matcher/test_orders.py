@@ -0,0 +1,145 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+
+
+def test_ids_returned():
+    market = StockMatcher()
+    first = market.place_bid(price=5.0, quantity=100, party="Bidder")
+    second = market.place_ask(price=6.0, quantity=100, party="Asker")
+    third = market.place_bid(order_type="market", quantity=10, party="Bidder")
+
+    assert [first, second, third] == [0, 1, 2]
+    assert list(market.order_book["limit"]["bid"]["id"]) == [0]
+
+
+def test_bulk_ids_in_given_order():
+    market = StockMatcher()
+    market.place_bid(price=5.0, quantity=1, party="Bidder")
+    ids = market.place_orders(
+        side=["ask", "bid", "ask"],
+        type=["limit", "market", "limit"],
+        price=[6.0, np.nan, 7.0], quantity=[1, 2, 3], party="Agent"
+    )
+
+    assert list(ids) == [1, 2, 3]
+    assert list(market.order_book["limit"]["ask"]["id"]) == [1, 3]
+    assert list(market.order_book["market"]["bid"]["id"]) == [2]
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+def test_cancel(backend):
+    market = StockMatcher(backend=backend)
+    cancelled = market.place_bid(price=6.0, quantity=100, party="Early")
+    market.place_bid(price=5.0, quantity=100, party="Late")
+    market.place_ask(price=4.0, quantity=50, party="Asker")
+
+    assert market.cancel(cancelled)
+    assert not market.cancel(cancelled)
+    assert 5.0 == market.highest_bid_price
+    market.clear()
+
+    assert list(market.party_names(market.trades["bid_party"])) == ["Late"]
+    assert list(market.trades["ask_id"]) == [2]
+
+
+def test_cancel_filled():
+    market = StockMatcher()
+    bid = market.place_bid(price=5.0, quantity=100, party="Bidder")
+    market.place_ask(price=5.0, quantity=100, party="Asker")
+    market.clear()
+
+    assert list(market.trades["bid_id"]) == [bid]
+    assert not market.cancel(bid)
+    assert not market.cancel(12345)
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+def test_amend_keeps_priority(backend):
+    market = StockMatcher(backend=backend)
+    first = market.place_bid(price=5.0, quantity=100, party="First")
+    market.place_bid(price=5.0, quantity=100, party="Second")
+
+    assert market.amend(first, quantity=40)
+    assert 140 == market.total_quantities["bid"]
+    market.place_ask(price=5.0, quantity=50, party="Asker")
+    market.clear()
+
+    assert list(market.party_names(market.trades["bid_party"])) == ["First", "Second"]
+    assert list(market.trades["quantity"]) == [40, 10]
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+def test_amend_loses_priority(backend):
+    market = StockMatcher(backend=backend)
+    first = market.place_bid(price=5.0, quantity=100, party="First")
+    market.place_bid(price=5.0, quantity=100, party="Second")
+
+    assert market.amend(first, quantity=150)
+    market.place_ask(price=5.0, quantity=150, party="Asker")
+    market.clear()
+
+    assert list(market.party_names(market.trades["bid_party"])) == ["Second", "First"]
+    assert list(market.trades["bid_id"]) == [1, first]
+
+    assert market.amend(first, price=5.5)
+    assert 5.5 == market.highest_bid_price
+    assert not market.amend(99, quantity=1)
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+def test_amend_invalid_quantity(backend):
+    market = StockMatcher(backend=backend, quantity_format=np.uint16)
+    order_id = market.place_bid(price=5.0, quantity=100, party="Bidder")
+
+    with pytest.raises(ValueError):
+        market.amend(order_id, quantity=-3)
+    with pytest.raises(OverflowError):
+        market.amend(order_id, quantity=70000)
+    assert 100 == market.total_quantities["bid"]
+    assert list(market.depth()["bid"]["quantity"]) == [100]
+
+    market.place_ask(price=5.0, quantity=100, party="Asker")
+    market.clear()
+    assert list(market.trades["quantity"]) == [100]
+
+
+def test_amend_to_zero_removes():
+    market = StockMatcher()
+    order_id = market.place_bid(price=5.0, quantity=100, party="Bidder")
+    assert market.amend(order_id, quantity=0, price=6.0)
+    assert 0 == market.order_book["limit"]["bid"].size
+    assert not market.cancel(order_id)
+
+
+def test_stop_keeps_id():
+    market = StockMatcher()
+    market.place_bid(price=5.0, quantity=10, party="Bidder")
+    market.place_ask(price=5.0, quantity=10, party="Asker")
+    market.clear()
+
+    stop = market.place_bid(order_type="stop", price=5.5, quantity=10, party="Stopper")
+    market.place_ask(price=6.0, quantity=10, party="Asker")
+    market.place_bid(price=6.0, quantity=5, party="Bidder")
+    market.clear()
+    market.place_ask(price=6.0, quantity=10, party="Asker")
+    market.clear()
+
+    assert stop in list(market.trades["bid_id"])
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+def test_index_survives_compaction(backend):
+    market = StockMatcher(backend=backend)
+    ids = [market.place_bid(price=5.0, quantity=1, party="Bidder") for i in range(300)]
+    for order_id in ids[:250]:
+        assert market.cancel(order_id)
+
+    bids = market.order_book["limit"]["bid"]
+    assert bids._end < 300
+    for order_id in ids[250:]:
+        assert bids.order(bids.locate(order_id))["id"] == order_id
+    assert market.cancel(ids[-1])
+    assert 49 == market.total_quantities["bid"]
@@ -0,0 +1,113 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.exchange import Exchange
+from ecosys.trading_platform.matcher.history import TradeLog
+from ecosys.trading_platform.matcher.parallel import ParallelExchange
+
+
+def random_flow(symbols, n, seed):
+    rng = np.random.RandomState(seed)
+    order_type = rng.choice(["limit", "limit", "market"], size=n)
+    return dict(
+        symbol=rng.choice(symbols, size=n),
+        side=rng.choice(["bid", "ask"], size=n),
+        type=order_type,
+        price=np.where(order_type == "market", np.nan, rng.randint(480, 520, size=n) / 100),
+        quantity=rng.randint(1, 50, size=n),
+        party=[f"P{i}" for i in range(n)],
+    )
+
+
+def test_same_as_serial():
+    symbols = [f"S{i}" for i in range(7)]
+    serial = Exchange(symbols)
+    with ParallelExchange(symbols, n_workers=3, capacity=50) as parallel:
+        for tick in range(3):
+            flow = random_flow(symbols, 300, seed=tick)
+            serial_ids = serial.place_orders(**flow)
+            parallel_ids = parallel.place_orders(**flow)
+            assert (serial_ids == parallel_ids).all()
+
+            n_before = {symbol: serial[symbol].n_trades for symbol in symbols}
+            serial.clear()
+            trades = parallel.clear()
+            for i, symbol in enumerate(symbols):
+                expected = serial[symbol].trades[n_before[symbol]:]
+                got = trades[trades["symbol"] == i][list(expected.dtype.names)]
+                assert got.tolist() == expected.tolist()
+
+        stats = parallel.stats()
+        serial_stats = serial.stats()
+        for field in stats.dtype.names:
+            np.testing.assert_array_equal(stats[field], serial_stats[field])
+
+
+def test_single_orders_and_errors():
+    with ParallelExchange(["AAA", "BBB"], n_workers=2) as exchange:
+        assert 0 == exchange.place_bid("AAA", price=5.0, quantity=100, party="Bidder")
+        assert 0 == exchange.place_ask("BBB", price=5.0, quantity=100, party="Asker")
+        assert 1 == exchange.place_ask("AAA", price=5.0, quantity=40, party="Asker")
+        with pytest.raises(ValueError):
+            exchange.place_bid("CCC", price=5.0, quantity=1, party="Bidder")
+
+        trades = exchange.clear()
+        assert list(trades["symbol"]) == [0]
+        assert list(trades["quantity"]) == [40]
+        assert len(exchange.clear()) == 0
+
+
+def test_overflow_places_nothing():
+    with ParallelExchange(["A", "B"], n_workers=2, quantity_format="u2") as exchange:
+        with pytest.raises(OverflowError):
+            exchange.place_orders(symbol=["A", "B"], side="bid", price=5.0, quantity=[70000, 10], party="Agent")
+        with pytest.raises(ValueError):
+            # Limit order without price
+            exchange.place_orders(symbol=["A", "B"], side="bid", price=[5.0, np.nan], quantity=10, party="Agent")
+        with pytest.raises(ValueError):
+            exchange.place_orders(symbol=["A", "B"], side="bid", price=5.0, quantity=[10, 2.7], party="Agent")
+
+        stats = exchange.stats()
+        assert list(stats["bid_quantity"]) == [0, 0]
+        assert list(exchange.place_orders(symbol=["A", "B"], side="bid", price=5.0, quantity=10, party="Agent")) == [0, 0]
+
+
+def test_worker_error_keeps_pipes_in_sync():
+    with ParallelExchange(["A", "B"], n_workers=2) as exchange:
+        # Order of A fails in its worker (unknown order type)
+        for worker, order_type in ((0, 99), (1, 0)):
+            order = np.zeros(1, dtype=exchange.order_dtype)
+            order[["symbol", "type", "price", "quantity"]] = (worker, order_type, 5.0, 10)
+            exchange._orders[worker][:1] = order
+            exchange._conns[worker].send(("place", 1, ["Agent"]))
+        with pytest.raises(IndexError):
+            exchange._recv_all([0, 1])
+
+        stats = exchange.stats()
+        assert list(stats["symbol"]) == ["A", "B"]
+        assert list(stats["bid_quantity"]) == [0, 10]
+
+
+def test_stats_of_mixed_length_symbols():
+    symbols = ["A", "BBBB", "CC"]
+    with ParallelExchange(symbols, n_workers=3) as exchange:
+        exchange.place_orders(symbol=symbols, side="bid", price=5.0, quantity=[1, 2, 3], party="Agent")
+        stats = exchange.stats()
+        # Workers reply the same dtype (concatenated without promotion)
+        for conn in exchange._conns:
+            conn.send(("stats",))
+        assert len({reply.dtype for reply in exchange._recv_all(range(3))}) == 1
+    assert stats.dtype["symbol"] == np.dtype("U4")
+    assert list(stats["symbol"]) == symbols
+    assert list(stats["bid_quantity"]) == [1, 2, 3]
+
+
+def test_trade_logs_closed(tmp_path):
+    with ParallelExchange(["A", "B"], n_workers=2, history=TradeLog(tmp_path / "trades.bin")) as exchange:
+        exchange.place_orders(symbol=["A", "A", "B", "B"], side=["bid", "ask"] * 2, price=5.0, quantity=[10, 10, 20, 20], party="Agent")
+        exchange.clear()
+
+    for symbol, quantity in (("A", 10), ("B", 20)):
+        trades = TradeLog(tmp_path / f"trades_{symbol}.bin").memmap()
+        assert list(trades["quantity"]) == [quantity]
@@ -0,0 +1,73 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+from ecosys.trading_platform.matcher.exchange import Exchange
+from ecosys.trading_platform.matcher.parties import PartyRegistry
+
+
+def test_registry():
+    parties = PartyRegistry()
+    assert 0 == parties.intern("Alice")
+    assert list(parties.intern(["Carol", "Bob", "Alice", "Carol"])) == [1, 2, 0, 1]
+    assert list(parties.names(np.array([2, 1]))) == ["Bob", "Carol"]
+    assert "Alice" == parties.names(0) == parties[0]
+    assert list(parties.intern(np.array([1, 2]))) == [1, 2]
+    assert 3 == len(parties) and "Bob" in parties and parties.get("Dave") is None
+
+
+def test_long_names_not_truncated():
+    market = StockMatcher()
+    market.place_bid(price=5.0, quantity=10, party="Pension fund of Finland")
+    market.place_ask(price=5.0, quantity=10, party="Market maker #1")
+    market.clear()
+
+    assert market.order_book["limit"]["bid"].dtype["party"] == np.uint32
+    assert list(market.historical["bid_party"]) == ["Pension fund of Finland"]
+    assert market.party_names(market.trades["ask_party"][0]) == "Market maker #1"
+
+
+def test_trade_hook_gets_names():
+    calls = []
+    class Matcher(StockMatcher):
+        def trade_orders(self, bid, ask, ticks, quantity, asset):
+            calls.append((bid["party"], ask["party"]))
+
+    market = Matcher()
+    market.place_bid(price=5.0, quantity=10, party="Bidder")
+    market.place_ask(price=5.0, quantity=10, party="Asker")
+    market.clear()
+    assert calls == [("Bidder", "Asker")]
+
+
+def test_string_parties():
+    market = StockMatcher(party_format="U10")
+    market.place_bid(price=5.0, quantity=10, party="Bidder")
+    assert market.parties is None
+    assert list(market.order_book["limit"]["bid"]["party"]) == ["Bidder"]
+
+
+def test_exchange_shares_registry():
+    exchange = Exchange(["AAA", "BBB"])
+    exchange.place_bid("AAA", price=5.0, quantity=10, party="Agent")
+    exchange.place_orders(symbol=["BBB", "AAA"], side="ask", price=5.0, quantity=10, party=["Other", "Agent"])
+
+    assert exchange["AAA"].parties is exchange["BBB"].parties is exchange.parties
+    assert list(exchange["AAA"].order_book["limit"]["ask"]["party"]) == [exchange.parties.get("Agent")]
+
+
+def test_unknown_ids():
+    parties = PartyRegistry()
+    parties.intern(["Alice", "Bob"])
+    assert list(parties.intern([1, 0])) == [1, 0]
+    for ids in (2, -1, [0, 7]):
+        with pytest.raises(ValueError):
+            parties.intern(ids)
+
+    market = StockMatcher()
+    with pytest.raises(ValueError):
+        market.place_bid(price=5.0, quantity=1, party=7)
+    with pytest.raises(ValueError):
+        market.place_orders(side="bid", price=5.0, quantity=1, party=[-1])
+    assert 0 == market.total_quantities["bid"]
@@ -0,0 +1,78 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+from ecosys.trading_platform.matcher.books import ArrayBook, LadderBook
+
+
+def make_orders(dtype, seq, ticks=None):
+    orders = np.zeros(len(seq), dtype=dtype)
+    orders["id"] = seq
+    orders["seq"] = seq
+    orders["quantity"] = 1
+    if ticks is not None:
+        orders["ticks"] = ticks
+    return orders
+
+
+@pytest.mark.parametrize("book_cls", [ArrayBook, LadderBook])
+def test_priced_out_of_sequence(book_cls):
+    dtype = StockMatcher._dtype_mapping["limit"]
+    book = book_cls(dtype, "bid")
+    book.append(make_orders(dtype, seq=[5, 3, 4], ticks=[500, 500, 400]))
+    book.append(make_orders(dtype, seq=[1, 2], ticks=[400, 500]))
+
+    assert book.order(book.best())["seq"] == 2
+    assert list(book["seq"][np.argsort(book.slots)]) == [5, 3, 4, 1, 2]
+    assert list(book._data["seq"][book.priority_order()]) == [2, 3, 5, 1, 4]
+
+    book.fill(book.best(), 1)
+    assert book.order(book.best())["seq"] == 3
+
+
+def test_unpriced_out_of_sequence():
+    dtype = StockMatcher._dtype_mapping["market"]
+    book = ArrayBook(dtype, "bid")
+    book.append(make_orders(dtype, seq=[2, 0]))
+    book.append(make_orders(dtype, seq=[1]))
+
+    filled = []
+    while book.size:
+        slot = book.best()
+        filled.append(book.order(slot)["seq"])
+        book.fill(slot, 1)
+    assert filled == [0, 1, 2]
+
+
+@pytest.mark.parametrize("book_cls", [ArrayBook, LadderBook])
+def test_compaction_sorts_by_sequence(book_cls):
+    dtype = StockMatcher._dtype_mapping["limit"]
+    book = book_cls(dtype, "ask")
+    seq = np.arange(200)[::-1]
+    book.append(make_orders(dtype, seq=seq, ticks=np.full(200, 500)))
+    for order_id in range(50, 200):
+        book.remove(book.locate(order_id))
+
+    assert book._in_sequence and book._end < 200
+    assert list(book["seq"]) == list(range(50))
+    assert book.order(book.best())["seq"] == 0
+    assert book.order(book.locate(42))["seq"] == 42
+
+
+def test_triggered_stop_queues_from_trigger():
+    market = StockMatcher()
+    market.place_bid(price=5.0, quantity=10, party="Bidder")
+    market.place_ask(price=5.0, quantity=10, party="Asker")
+    market.clear()
+
+    market.place_bid(order_type="stop", price=5.5, quantity=10, party="Stopper")
+    market.place_ask(price=6.0, quantity=5, party="Asker")
+    market.place_bid(price=6.0, quantity=5, party="Bidder")
+    market.clear()
+    market.place_bid(order_type="market", quantity=10, party="Marketer")
+    market.clear()
+
+    market_bids = market.order_book["market"]["bid"]
+    assert list(market.party_names(market_bids["party"])) == ["Stopper", "Marketer"]
+    assert (np.diff(market_bids["seq"].astype(np.int64)) > 0).all()
@@ -0,0 +1,45 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+from ecosys.trading_platform.matcher.books import ArrayBook, LadderBook
+
+
+@pytest.mark.parametrize("crossing", ["continuous", "batch"])
+def test_cascade_in_one_clear(crossing):
+    market = StockMatcher(crossing=crossing)
+    market.place_bid(price=5.0, quantity=10, party="Bidder")
+    market.place_ask(price=5.0, quantity=10, party="Asker")
+    market.clear()
+
+    market.place_bid(price=4.9, quantity=10, party="Bidder")
+    market.place_ask(price=4.9, quantity=10, party="Asker")
+    market.place_ask(price=5.2, quantity=10, party="Asker")
+    market.place_bid(price=4.8, quantity=10, party="Bidder")
+    market.place_bid(order_type="stop", price=4.95, quantity=10, party="Stop1")
+    market.place_ask(order_type="stop", price=5.1, quantity=10, party="Stop2")
+    market.clear()
+
+    trades = market.trades[1:]
+    assert list(trades["ticks"]) == [490, 520, 480]
+    assert list(market.party_names(trades["bid_party"])) == ["Bidder", "Stop1", "Bidder"]
+    assert list(market.party_names(trades["ask_party"])) == ["Asker", "Asker", "Stop2"]
+    assert 0 == market.order_book["stop"]["bid"].size == market.order_book["stop"]["ask"].size
+
+
+@pytest.mark.parametrize("book_cls", [ArrayBook, LadderBook])
+def test_better_than(book_cls):
+    dtype = StockMatcher._dtype_mapping["stop"]
+    for position, expected in (("bid", [3, 1, 4]), ("ask", [0, 2])):
+        book = book_cls(dtype, position)
+        orders = np.zeros(5, dtype=dtype)
+        orders["id"] = orders["seq"] = np.arange(5)
+        orders["ticks"] = [480, 510, 490, 520, 510]
+        orders["quantity"] = 1
+        book.append(orders[[1, 3, 0, 2, 4]])
+        book.remove(book.locate(0) if position == "bid" else book.locate(4))
+
+        slots = book.better_than(500)
+        assert sorted(book.order(slots)["id"].tolist()) == sorted(expected)
+        assert book.order(slots)["seq"].tolist() == sorted(book.order(slots)["seq"].tolist())
@@ -0,0 +1,71 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+def test_sweeps_levels(backend):
+    market = StockMatcher(backend=backend)
+    for i, price in enumerate([5.3, 5.1, 5.2, 5.1, 5.4]):
+        market.place_ask(price=price, quantity=10, party=f"A{i}")
+    market.place_bid(order_type="market", quantity=25, party="M1")
+    market.place_bid(order_type="market", quantity=10, party="M2")
+
+    filled = []
+    market.subscribe("order_filled", filled.append)
+    market.clear()
+
+    assert list(market.party_names(market.trades["ask_party"])) == ["A1", "A3", "A2", "A2", "A0"]
+    assert list(market.party_names(market.trades["bid_party"])) == ["M1", "M1", "M1", "M2", "M2"]
+    assert list(market.trades["ticks"]) == [510, 510, 520, 520, 530]
+    assert list(market.trades["quantity"]) == [10, 10, 5, 5, 5]
+    # Both books filled at once
+    assert 2 == len(filled)
+    assert market.lowest_ask_price == 5.3 and 15 == market.total_quantities["ask"]
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+def test_sweep_triggers_stops_in_trade_order(backend):
+    market = StockMatcher(backend=backend)
+    market.place_bid(order_type="stop", price=5.15, quantity=1, party="Stop0")
+    market.place_bid(order_type="stop", price=5.25, quantity=1, party="Stop1")
+    market.place_bid(price=5.2, quantity=10, party="B0")
+    market.place_bid(price=5.1, quantity=10, party="B1")
+    market.place_ask(price=6.0, quantity=1, party="Asker")
+    market.place_ask(order_type="market", quantity=20, party="Sweeper")
+    market.clear()
+
+    # The sweep trades at 5.20 (triggers Stop1) and then at 5.10 (Stop0)
+    assert list(market.trades["ticks"]) == [520, 510, 600]
+    assert market.trades["bid_id"][-1] == 1
+    assert 1 == market.order_book["market"]["bid"].size
+
+
+def test_market_with_market_after_limits():
+    market = StockMatcher()
+    market.place_bid(price=5.0, quantity=10, party="Bidder")
+    market.place_ask(price=5.0, quantity=10, party="Asker")
+    market.clear()
+
+    market.place_ask(price=5.1, quantity=5, party="Asker")
+    market.place_ask(order_type="market", quantity=20, party="MAsker")
+    market.place_bid(order_type="market", quantity=30, party="MBidder")
+    market.clear()
+
+    trades = market.trades[1:]
+    assert list(market.party_names(trades["ask_party"])) == ["Asker", "MAsker"]
+    assert list(trades["ticks"]) == [510, 510]
+    assert list(trades["quantity"]) == [5, 20]
+    assert 5 == market.total_quantities["bid"] and 0 == market.total_quantities["ask"]
+
+
+def test_no_price_for_market_orders():
+    market = StockMatcher()
+    market.place_ask(order_type="market", quantity=20, party="MAsker")
+    market.place_bid(order_type="market", quantity=30, party="MBidder")
+    market.clear()
+
+    assert 0 == len(market.trades)
+    assert 30 == market.total_quantities["bid"]
@@ -0,0 +1,67 @@
+import pytest
+import sys
+sys.path.append('..')
+from functools import partial
+import numpy as np
+from ecosys.tools.calculations.montecarlo import monte_carlo, gbm_paths, european, asian, barrier
+from ecosys.tools.calculations.option import black_scholes
+
+PARAMS = dict(S=100, T=1.0, r=0.03, sigma=0.25, q=0.01)
+
+
+def terminal(paths):
+    return paths[:, -1]
+
+
+@pytest.mark.parametrize("antithetic", [True, False])
+@pytest.mark.parametrize("control_variate", [True, False])
+def test_european_as_black_scholes(antithetic, control_variate):
+    result = monte_carlo(
+        partial(european, K=105), **PARAMS, n_paths=20000, n_steps=4, seed=1,
+        chunk_size=5000, antithetic=antithetic, control_variate=control_variate
+    )
+    expected = black_scholes(K=105, **PARAMS)["price"]
+    assert abs(result["price"] - expected) < 4 * result["std_error"]
+    assert 20000 == result["n_paths"]
+
+
+def test_variance_reduction():
+    kwargs = dict(**PARAMS, n_paths=20000, n_steps=4, seed=1)
+    plain = monte_carlo(partial(european, K=100), antithetic=False, control_variate=False, **kwargs)
+    reduced = monte_carlo(partial(european, K=100), antithetic=True, control_variate=True, **kwargs)
+    assert reduced["std_error"] < 0.5 * plain["std_error"]
+
+
+def test_same_for_any_workers():
+    kwargs = dict(**PARAMS, n_paths=8000, n_steps=12, seed=7, chunk_size=1000, jump_intensity=0.5, jump_std=0.1)
+    payoff = partial(asian, K=100)
+    single = monte_carlo(payoff, n_workers=1, **kwargs)
+    many = monte_carlo(payoff, n_workers=2, **kwargs)
+    assert single == many
+    assert single != monte_carlo(payoff, n_workers=1, **{**kwargs, "seed": 8})
+
+
+def test_jumps_martingale():
+    result = monte_carlo(terminal, **PARAMS, n_paths=40000, n_steps=8, seed=3, control_variate=False,
+                         jump_intensity=1.0, jump_mean=-0.1, jump_std=0.2)
+    expected = PARAMS["S"] * np.exp(-PARAMS["q"] * PARAMS["T"])
+    assert abs(result["price"] - expected) < 4 * result["std_error"]
+
+
+def test_portfolio_payoff():
+    def payoff(paths):
+        return np.stack([european(paths, 100), barrier(paths, 100, 130), barrier(paths, 100, 130, knock_in=True)], axis=1)
+    result = monte_carlo(payoff, **PARAMS, n_paths=4000, n_steps=50, seed=1)
+
+    assert result["price"].shape == (3,)
+    # Knock-out and knock-in sum to the vanilla
+    assert result["price"][1] + result["price"][2] == pytest.approx(result["price"][0])
+
+
+def test_paths():
+    paths = gbm_paths(100, 1.0, 0.0, 0.2, 10, 5, rng=np.random.default_rng(0), antithetic=True)
+    assert paths.shape == (10, 6)
+    assert (paths[:, 0] == 100).all()
+    # Diffusion of the antithetic pairs cancels out
+    drift = -0.5 * 0.2 ** 2 * 1.0 / 5
+    np.testing.assert_allclose(np.log(paths[:5] / 100) + np.log(paths[5:] / 100), np.broadcast_to(2 * drift * np.arange(6), (5, 6)), atol=1e-12)
@@ -0,0 +1,77 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.tools.calculations.option import (
+    black_scholes, european_call_price, european_put_price, delta_call, delta_put, gamma, vega,
+    implied_volatility
+)
+
+
+def test_known_prices():
+    assert european_call_price(100, 100, 1, 0.05, 0.2) == pytest.approx(10.4506, abs=1e-4)
+    assert european_put_price(100, 100, 1, 0.05, 0.2) == pytest.approx(5.5735, abs=1e-4)
+
+
+def test_put_call_parity():
+    S, K, T, r, sigma, q = 100, np.linspace(50, 150, 11), 0.5, 0.03, 0.25, 0.02
+    calls = black_scholes(S, K, T, r, sigma, q, call=True)
+    puts = black_scholes(S, K, T, r, sigma, q, call=False)
+
+    np.testing.assert_allclose(calls["price"] - puts["price"], S * np.exp(-q * T) - K * np.exp(-r * T))
+    np.testing.assert_allclose(calls["delta"] - puts["delta"], np.exp(-q * T))
+    np.testing.assert_allclose(calls["gamma"], puts["gamma"])
+    np.testing.assert_allclose(calls["vega"], puts["vega"])
+
+
+def test_broadcast_chain():
+    strikes = np.arange(80, 121, dtype=float)[:, None]
+    maturities = np.array([0.25, 0.5, 1.0])
+    call = (strikes >= 100)
+    chain = black_scholes(100, strikes, maturities, 0.01, 0.2, call=call)
+
+    for values in chain.values():
+        assert values.shape == (41, 3)
+    np.testing.assert_allclose(chain["price"][-1], european_call_price(100, 120, maturities, 0.01, 0.2))
+    np.testing.assert_allclose(chain["price"][0], european_put_price(100, 80, maturities, 0.01, 0.2))
+
+
+@pytest.mark.parametrize("call", [True, False])
+def test_greeks_finite_differences(call):
+    S, K, T, r, sigma, q = 105.0, np.array([90.0, 100.0, 110.0]), 0.75, 0.04, 0.3, 0.01
+    h = 1e-5
+    price = lambda **kwargs: black_scholes(**{**dict(S=S, K=K, T=T, r=r, sigma=sigma, q=q, call=call), **kwargs})["price"]
+    greeks = black_scholes(S, K, T, r, sigma, q, call=call)
+
+    np.testing.assert_allclose(greeks["delta"], (price(S=S + h) - price(S=S - h)) / (2 * h), rtol=1e-5)
+    np.testing.assert_allclose(greeks["gamma"], (price(S=S + 1e-3) - 2 * price() + price(S=S - 1e-3)) / 1e-6, rtol=1e-4)
+    np.testing.assert_allclose(greeks["vega"], (price(sigma=sigma + h) - price(sigma=sigma - h)) / (2 * h), rtol=1e-5)
+    np.testing.assert_allclose(greeks["theta"], -(price(T=T + h) - price(T=T - h)) / (2 * h), rtol=1e-5)
+    np.testing.assert_allclose(greeks["rho"], (price(r=r + h) - price(r=r - h)) / (2 * h), rtol=1e-5)
+
+    delta = delta_call if call else delta_put
+    np.testing.assert_allclose(delta(S, K, T, r, sigma, q), greeks["delta"])
+    np.testing.assert_allclose(gamma(S, K, T, r, sigma, q), greeks["gamma"])
+    np.testing.assert_allclose(vega(S, K, T, r, sigma, q), greeks["vega"])
+
+
+@pytest.mark.parametrize("call", [True, False])
+def test_implied_volatility_roundtrip(call):
+    strikes = np.linspace(60, 140, 41)[:, None]
+    maturities = np.array([0.05, 0.5, 2.0])
+    sigma = 0.1 + 0.5 * np.random.RandomState(0).random_sample((41, 3))
+    chain = black_scholes(100, strikes, maturities, 0.02, sigma, 0.01, call=call)
+
+    implied = implied_volatility(chain["price"], 100, strikes, maturities, 0.02, 0.01, call=call)
+    # Volatility does not show in the prices of deep in/out of the money options
+    solvable = chain["vega"] > 1e-4
+    assert implied.shape == (41, 3)
+    np.testing.assert_allclose(implied[solvable], sigma[solvable], rtol=1e-6)
+
+
+def test_implied_volatility_bounds():
+    # Below intrinsic, at the upper bound and very high volatility
+    implied = implied_volatility([5.0, 100.0, 99.0], 100, [90, 90, 90], 1.0, 0.0)
+    assert np.isnan(implied[:2]).all()
+    assert implied[2] > 5
+    assert black_scholes(100, 90, 1.0, 0.0, implied[2])["price"] == pytest.approx(99.0)
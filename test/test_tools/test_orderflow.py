@@ -0,0 +1,44 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.trading_platform.matcher.stockmarket import StockMatcher
+from ecosys.tools.generate.orderflow import random_orders, ladder, crossed_book, stop_cascade
+
+
+def test_seeded():
+    first = random_orders(100, seed=1, stop_share=0.1)
+    second = random_orders(100, seed=1, stop_share=0.1)
+    for column in first:
+        np.testing.assert_array_equal(first[column], second[column])
+    assert np.isnan(first["price"][first["type"] == "market"]).all()
+
+
+def test_ladder_rests():
+    market = StockMatcher()
+    market.place_orders(ladder("ask", 20, orders_per_level=3, seed=0))
+    market.clear()
+
+    assert 0 == market.n_trades
+    assert 100.01 == market.lowest_ask_price
+    assert 20 == len(market.depth(levels=100)["ask"])
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+def test_crossed_book(backend):
+    market = StockMatcher(backend=backend)
+    market.place_orders(crossed_book(10, seed=0))
+    market.clear()
+
+    assert market.n_trades > 0
+    assert market.highest_bid_price is None or market.lowest_ask_price is None
+
+
+@pytest.mark.parametrize("backend", ["array", "ladder"])
+def test_stop_cascade(backend):
+    market = StockMatcher(backend=backend)
+    market.place_orders(stop_cascade(25))
+    market.clear()
+
+    assert 26 == market.n_trades
+    assert 0 == market.order_book["stop"]["bid"].size == market.order_book["stop"]["ask"].size
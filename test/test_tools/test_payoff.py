@@ -0,0 +1,71 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.tools.calculations.payoff import Portfolio
+
+PRICES = np.linspace(50, 150, 101)
+
+
+def test_legs():
+    portfolio = Portfolio().call(100, premium=5).put(90, quantity=-2, premium=3).share(95, quantity=10)
+    payoffs = portfolio.leg_payoffs(PRICES)
+
+    assert payoffs.shape == (3, 101)
+    np.testing.assert_allclose(payoffs[0], np.maximum(PRICES - 100, 0) - 5)
+    np.testing.assert_allclose(payoffs[1], -2 * (np.maximum(90 - PRICES, 0) - 3))
+    np.testing.assert_allclose(payoffs[2], 10 * (PRICES - 95))
+    np.testing.assert_allclose(portfolio.payoff(PRICES), payoffs.sum(axis=0))
+
+
+def test_cached():
+    portfolio = Portfolio().call(100, premium=5)
+    first = portfolio.leg_payoffs(PRICES)
+    assert portfolio.leg_payoffs(PRICES.copy()) is first
+    assert not first.flags.writeable
+
+    portfolio.put(100, premium=5)
+    assert portfolio.leg_payoffs(PRICES).shape == (2, 101)
+    assert portfolio.leg_payoffs(PRICES[:10]).shape == (2, 10)
+
+
+def test_scalar_and_nd_prices():
+    portfolio = Portfolio().call(100, premium=5).put(100, premium=4)
+    assert portfolio.payoff(110.0) == pytest.approx(1.0)
+    assert portfolio.leg_payoffs(110.0).shape == (2,)
+    np.testing.assert_allclose(portfolio.leg_payoffs(110.0), [5.0, -4.0])
+
+    grid = PRICES[:12].reshape(3, 4)
+    assert portfolio.payoff(grid).shape == (3, 4)
+    assert portfolio.leg_payoffs(grid).shape == (2, 3, 4)
+    np.testing.assert_allclose(portfolio.payoff(grid).ravel(), portfolio.payoff(PRICES[:12]))
+
+
+def test_summary_straddle():
+    straddle = Portfolio().call(100, premium=5).put(100, premium=4)
+    summary = straddle.summary(PRICES)
+
+    assert -9 == summary["max_loss"]
+    assert 41 == summary["max_profit"]
+    np.testing.assert_allclose(summary["breakevens"], [91, 109])
+    assert (-1, 1) == summary["slopes"]
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        Portfolio().add("future", 100)
+
+
+def test_plot_payoff():
+    pytest.importorskip("matplotlib")
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from ecosys.tools.plotting import plot_payoff
+
+    portfolio = Portfolio().call(100, premium=5).put(100, premium=4)
+    plot_payoff(portfolio, pricerange=PRICES)
+    lines = plt.gca().get_lines()
+    np.testing.assert_allclose(lines[2].get_ydata(), portfolio.payoff(PRICES))
+    assert [line.get_label() for line in lines[:3]] == portfolio.labels + ["Portfolio"]
+    plt.close("all")
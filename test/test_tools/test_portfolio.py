@@ -0,0 +1,58 @@
+import pytest
+import sys
+sys.path.append('..')
+import numpy as np
+from ecosys.tools.calculate.portfolio import (
+    sharpe, sharpe_ratio, sortino_ratio, max_drawdown, rolling_volatility, covariance
+)
+from ecosys.tools.generate.portfolio import efficient_frontier, random_portfolios
+
+RETURNS = np.random.RandomState(0).normal(0.001, 0.02, size=(20, 250))
+
+
+def test_ratios():
+    np.testing.assert_allclose(
+        sharpe_ratio(RETURNS, r_riskfree=0.0001, periods=252),
+        sharpe(RETURNS.mean(axis=1), 0.0001, RETURNS.std(axis=1, ddof=1)) * np.sqrt(252)
+    )
+    downside = np.sqrt((np.minimum(RETURNS[0], 0) ** 2).mean())
+    assert sortino_ratio(RETURNS)[0] == pytest.approx(RETURNS[0].mean() / downside)
+
+
+def test_rolling_as_windows():
+    window = 30
+    volatility = rolling_volatility(RETURNS, window)
+    ratios = sharpe_ratio(RETURNS, window=window)
+    sortinos = sortino_ratio(RETURNS, window=window)
+
+    assert volatility.shape == ratios.shape == (20, 221)
+    for end in (window, 100, 250):
+        chunk = RETURNS[:, end - window:end]
+        np.testing.assert_allclose(volatility[:, end - window], chunk.std(axis=1, ddof=1))
+        np.testing.assert_allclose(ratios[:, end - window], sharpe_ratio(chunk))
+        np.testing.assert_allclose(sortinos[:, end - window], sortino_ratio(chunk))
+
+
+def test_max_drawdown():
+    returns = np.array([[0.1, -0.5, 0.2, 1.0], [-0.1, 0.05, 0.1, 0.0], [0.1, 0.1, 0.1, 0.1]])
+    np.testing.assert_allclose(max_drawdown(returns), [0.5, 0.1, 0.0])
+
+
+def test_covariance():
+    np.testing.assert_allclose(covariance(RETURNS), np.cov(RETURNS))
+
+
+def test_efficient_frontier():
+    means = RETURNS.mean(axis=1)
+    cov = covariance(RETURNS)
+    frontier = efficient_frontier(means, cov, n_points=20)
+
+    np.testing.assert_allclose(frontier["weights"].sum(axis=1), 1)
+    np.testing.assert_allclose(frontier["returns"][[0, -1]], [frontier["returns"][0], means.max()])
+    assert (np.diff(frontier["volatility"]) > 0).all()
+
+    # No fully invested portfolio beats the frontier
+    randoms = random_portfolios(1000, means, cov, seed=0)
+    np.testing.assert_allclose(randoms["weights"].sum(axis=1), 1)
+    frontier_volatility = np.interp(randoms["returns"], frontier["returns"], frontier["volatility"])
+    assert (randoms["volatility"] >= frontier_volatility - 1e-12).all()